@@ -0,0 +1,96 @@
+"""
+A stand in for the slack Web API that records the calls made to it.
+
+It can wait before answering and answer some calls with a 429 like slack does
+when a rate limit is reached.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Callable
+
+import attrs
+from aiohttp import web
+
+# Calls made by slack_bolt to find out who the bot is, which are never rate limited
+_UNLIMITED = frozenset({"auth.test"})
+
+
+@attrs.define
+class FakeSlack:
+    # Seconds to wait before answering each call
+    latency: float = 0
+
+    # The fraction of calls answered with a 429
+    rate_limited_fraction: float = 0
+
+    retry_after_seconds: int = 1
+    random: Callable[[], float] = random.random
+
+    calls: dict[str, int] = attrs.field(factory=dict)
+    rate_limited: int = 0
+
+    # Calls to the response url of slash commands
+    responses: int = 0
+
+    url: str = ""
+    _runner: web.AppRunner | None = None
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/api/"
+
+    @property
+    def response_url(self) -> str:
+        return f"{self.url}/respond"
+
+    async def api(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method not in _UNLIMITED and self.random() < self.rate_limited_fraction:
+            self.rate_limited += 1
+            return web.json_response(
+                {"ok": False, "error": "ratelimited"},
+                status=429,
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if method == "auth.test":
+            return web.json_response(
+                {
+                    "ok": True,
+                    "url": "https://fake.slack.com/",
+                    "team": "fake",
+                    "user": "tracker",
+                    "team_id": "T00000000",
+                    "user_id": "U00000000",
+                    "bot_id": "B00000000",
+                }
+            )
+
+        await request.read()
+        return web.json_response({"ok": True, "ts": f"{time.time():.6f}"})
+
+    async def respond(self, request: web.Request) -> web.Response:
+        await request.read()
+        self.responses += 1
+        return web.Response(text="ok")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/api/{method}", self.api)
+        app.router.add_post("/respond", self.respond)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        _, port = self._runner.addresses[0]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
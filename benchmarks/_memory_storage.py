@@ -0,0 +1,119 @@
+"""
+Storage kept in dictionaries, for running the server in benchmarks without a
+database.
+"""
+
+import asyncio
+import datetime
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, cast
+
+import attrs
+
+from slack_github_tracker import storage
+
+type _Key = tuple[str, str, int]
+
+
+def _key(pr: storage.protocols.PR) -> _Key:
+    return storage.requests.pr_key(pr)
+
+
+def _pr(key: _Key) -> storage.requests.PR:
+    organisation, repo, pr_number = key
+    return storage.requests.PR(organisation=organisation, repo=repo, pr_number=pr_number)
+
+
+@attrs.define
+class MemoryStorage:
+    """
+    Copies made with ``attrs.evolve`` share what has been stored, so one can
+    be given a ``TrackedPRs`` like ``storage.Storage`` is for slack commands.
+    """
+
+    # Seconds each operation waits, to stand in for a round trip to a database
+    latency: float = 0
+
+    _tracked: storage.TrackedPRs | None = attrs.field(default=None, kw_only=True)
+
+    _channels: dict[_Key, set[str]] = attrs.field(factory=dict, kw_only=True)
+    _versions: dict[_Key, datetime.datetime] = attrs.field(factory=dict, kw_only=True)
+    _reviews: dict[_Key, dict[str, storage.protocols.Review]] = attrs.field(
+        factory=dict, kw_only=True
+    )
+    _deliveries: dict[str, datetime.datetime] = attrs.field(factory=dict, kw_only=True)
+
+    async def _wait(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def track(self, pr: storage.protocols.PR, channel_id: str) -> None:
+        self._channels.setdefault(_key(pr), set()).add(channel_id)
+
+    async def store_pr_request(self, pr_request: storage.protocols.PRRequest, /) -> None:
+        await self._wait()
+        self.track(pr_request.pr, pr_request.channel_id)
+        if self._tracked is not None:
+            self._tracked.add(pr_request.pr)
+
+    async def tracked_prs(
+        self, *, added_since: datetime.datetime | None = None
+    ) -> Sequence[storage.protocols.PR]:
+        # Nothing is stored for when a PR was tracked, so every PR is returned
+        await self._wait()
+        return [_pr(key) for key in self._channels]
+
+    async def is_tracked(self, pr: storage.protocols.PR, /) -> bool:
+        await self._wait()
+        return _key(pr) in self._channels
+
+    async def tracking_channels(self, pr: storage.protocols.PR, /) -> Sequence[str]:
+        await self._wait()
+        return sorted(self._channels.get(_key(pr), ()))
+
+    async def store_pr_version(self, version: storage.protocols.PRVersion, /) -> bool:
+        await self._wait()
+        key = _key(version.pr)
+        if key in self._versions and self._versions[key] > version.updated_at:
+            return False
+        self._versions[key] = version.updated_at
+        return True
+
+    async def pr_versions(self) -> Sequence[storage.protocols.PRVersion]:
+        await self._wait()
+        return [
+            storage.requests.PRVersion(pr=_pr(key), updated_at=updated_at)
+            for key, updated_at in self._versions.items()
+        ]
+
+    async def store_review(self, review: storage.protocols.Review, /) -> None:
+        await self._wait()
+        reviews = self._reviews.setdefault(_key(review.pr), {})
+        previous = reviews.get(review.reviewer)
+        if previous is None or previous.submitted_at <= review.submitted_at:
+            reviews[review.reviewer] = review
+
+    async def reviews(self, pr: storage.protocols.PR, /) -> Sequence[storage.protocols.Review]:
+        await self._wait()
+        return list(self._reviews.get(_key(pr), {}).values())
+
+    async def has_delivery(self, delivery_id: str, /) -> bool:
+        await self._wait()
+        return delivery_id in self._deliveries
+
+    async def store_deliveries(self, delivery_ids: Sequence[str], /) -> None:
+        await self._wait()
+        received = datetime.datetime.utcnow()
+        for delivery_id in delivery_ids:
+            self._deliveries.setdefault(delivery_id, received)
+
+    async def prune_deliveries(self, *, older_than: datetime.datetime) -> int:
+        await self._wait()
+        old = [delivery for delivery, at in self._deliveries.items() if at < older_than]
+        for delivery in old:
+            del self._deliveries[delivery]
+        return len(old)
+
+
+if TYPE_CHECKING:
+    _S: storage.protocols.Storage = cast(MemoryStorage, None)
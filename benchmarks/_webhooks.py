@@ -0,0 +1,132 @@
+"""
+Helpers for benchmarks that send the recorded webhooks in ``tests/fixtures/github``
+to a running server.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import pathlib
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import attrs
+
+from slack_github_tracker import recorded, replay
+
+FIXTURES = pathlib.Path(__file__).parent.parent / "tests" / "fixtures" / "github"
+
+WEBHOOK_SECRET = "benchmark-webhook-secret"
+
+
+def recorded_webhooks() -> list[recorded.RecordedWebhook]:
+    return recorded.from_directory(FIXTURES)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _client_process(
+    url: str, concurrency: int, duration: float, queue: "multiprocessing.Queue[replay.Results]"
+) -> None:
+    queue.put(
+        asyncio.run(
+            replay.send_webhooks(
+                url,
+                recorded_webhooks(),
+                secret=WEBHOOK_SECRET,
+                concurrency=concurrency,
+                duration=duration,
+            )
+        )
+    )
+
+
+def send_webhooks_from_processes(
+    url: str, *, clients: int, concurrency: int, duration: float
+) -> replay.Results:
+    """
+    Send webhooks from several processes so the load generator isn't limited
+    to a single core.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue: multiprocessing.Queue[replay.Results] = context.Queue()
+    processes = [
+        context.Process(target=_client_process, args=(url, concurrency, duration, queue))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+
+    results = replay.Results()
+    for _ in processes:
+        results.merge(queue.get())
+    for process in processes:
+        process.join()
+
+    return results
+
+
+@attrs.define
+class RunningServer:
+    port: int
+    process: subprocess.Popen[bytes]
+
+    @property
+    def webhook_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/github/webhook"
+
+    @classmethod
+    def start(cls, *args: str) -> "RunningServer":
+        port = free_port()
+        env = {
+            **os.environ,
+            "SLACK_BOT_TOKEN": "xoxb-benchmark",
+            "SLACK_SIGNING_SECRET": "benchmark-signing-secret",
+            "GITHUB_WEBHOOK_SECRET": WEBHOOK_SECRET,
+            "ALEMBIC_DB_URL": "postgresql://localhost/unused_by_benchmark",
+        }
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "slack_github_tracker",
+                "serve-http",
+                "--port",
+                str(port),
+                *args,
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        server = cls(port=port, process=process)
+        server.wait_for_port()
+        return server
+
+    def wait_for_port(self, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with {self.process.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise TimeoutError("Server did not start listening")
+
+    def stop(self) -> None:
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
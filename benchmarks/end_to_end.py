@@ -0,0 +1,509 @@
+"""
+Measure the server from webhook to slack message under sustained load.
+
+For each scenario the server is started in its own process with slack
+pointed at a fake slack Web API in this process. The recorded webhooks in
+``tests/fixtures/github`` are sent to ``/github/webhook`` while ``/track_pr``
+slash commands are sent to ``/slack/events``. The PRs in the fixtures are
+tracked in a channel that isn't in digest mode, so every event that is
+processed sends a message to the fake slack.
+
+The ``updated_at`` and ``submitted_at`` of every webhook are changed to the
+same time so that sending the same fixtures over and over isn't ignored for
+being older than the changes already applied.
+
+Storage is kept in memory in the server process unless ``--postgres-url`` is
+given, in which case missing tables are made in that database and the PRs in
+the fixtures are tracked there. Use a scratch database for this.
+
+For each scenario the throughput and latency of both routes are reported,
+along with the memory used by the server process before and after the load,
+the largest backlog of github events seen, how long the backlog took to empty
+after the load stopped, and the calls made to slack.
+
+Run with::
+
+  > ./dev bench end_to_end --duration 30 --github-rate 200 --slack-rate 20
+"""
+
+import asyncio
+import datetime
+import hashlib
+import hmac
+import itertools
+import json
+import multiprocessing
+import os
+import pathlib
+import re
+import time
+from collections.abc import Callable, Mapping
+from urllib import parse
+
+import aiohttp
+import attrs
+import click
+import slack_bolt
+import sqlalchemy
+from slack_sdk.web.async_client import AsyncWebClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from slack_github_tracker import cli, http_server, recorded, replay, storage
+
+from . import _fake_slack, _webhooks
+from ._memory_storage import MemoryStorage
+
+SIGNING_SECRET = "harness-signing-secret"
+
+CHANNEL_ID = "C0HARNESS"
+
+PR_URL = "https://github.com/delfick/slack-github-tracker/pull/1"
+
+# Every webhook is changed to say it happened at this time
+_TIMESTAMPS = re.compile(rb'"(updated_at|submitted_at)": "[^"]+"')
+_NOW = datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%SZ").encode()
+
+
+@attrs.frozen
+class Scenario:
+    name: str
+
+    # Seconds the fake slack waits before answering
+    slack_latency: float = 0
+
+    # Fraction of slack calls answered with a 429
+    slack_rate_limited: float = 0
+
+    # Seconds each storage operation waits when storage is kept in memory
+    storage_latency: float = 0
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario(name="baseline"),
+        Scenario(name="slow_slack", slack_latency=0.25),
+        Scenario(name="rate_limited_slack", slack_rate_limited=0.2),
+        Scenario(name="slow_storage", storage_latency=0.02),
+    ]
+}
+
+
+@attrs.frozen
+class HarnessServer(http_server.Server):
+    slack_api_url: str | None = None
+
+    # Used for all storage instead of the database when provided
+    memory_storage: MemoryStorage | None = None
+
+    def make_slack_app(self) -> slack_bolt.async_app.AsyncApp:
+        if self.slack_api_url is None:
+            return super().make_slack_app()
+
+        return slack_bolt.async_app.AsyncApp(
+            client=AsyncWebClient(token=self.slack_bot_token, base_url=self.slack_api_url),
+            signing_secret=self.slack_signing_secret,
+        )
+
+    def make_storage(
+        self,
+        *,
+        database: sqlalchemy.ext.asyncio.AsyncEngine,
+        tracked_prs: storage.TrackedPRs | None = None,
+    ) -> storage.protocols.Storage:
+        if self.memory_storage is None:
+            return super().make_storage(database=database, tracked_prs=tracked_prs)
+        return attrs.evolve(self.memory_storage, tracked=tracked_prs)
+
+
+@attrs.frozen
+class ServeOptions:
+    port: int
+    slack_api_url: str
+    postgres_url: str | None
+    storage_latency: float
+    tracked: tuple[storage.requests.PR, ...]
+    log_path: str
+
+
+def serve(options: ServeOptions) -> None:
+    with open(options.log_path, "a") as log_file:
+        logger = cli.setup_logging(False, stream=log_file)
+
+        memory_storage: MemoryStorage | None = None
+        if options.postgres_url is None:
+            memory_storage = MemoryStorage(latency=options.storage_latency)
+            for pr in options.tracked:
+                memory_storage.track(pr, CHANNEL_ID)
+
+        HarnessServer(
+            postgres_url=options.postgres_url or "postgresql://localhost/unused_by_harness",
+            slack_bot_token="xoxb-harness",
+            slack_signing_secret=SIGNING_SECRET,
+            github_webhook_secret=_webhooks.WEBHOOK_SECRET,
+            port=options.port,
+            logger=logger,
+            graceful_timeout_seconds=10,
+            slack_api_url=options.slack_api_url,
+            memory_storage=memory_storage,
+        ).serve_forever()
+
+
+def fresh_webhooks() -> list[recorded.RecordedWebhook]:
+    return [
+        attrs.evolve(
+            webhook, body=_TIMESTAMPS.sub(lambda m: b'"%s": "%s"' % (m[1], _NOW), webhook.body)
+        )
+        for webhook in _webhooks.recorded_webhooks()
+    ]
+
+
+def tracked_prs(webhooks: list[recorded.RecordedWebhook]) -> tuple[storage.requests.PR, ...]:
+    found: set[storage.requests.PR] = set()
+    for webhook in webhooks:
+        body = json.loads(webhook.body)
+        found.add(
+            storage.requests.PR(
+                organisation=body["repository"]["owner"]["login"],
+                repo=body["repository"]["name"],
+                pr_number=body["pull_request"]["number"],
+            )
+        )
+    return tuple(sorted(found, key=lambda pr: (pr.organisation, pr.repo, pr.pr_number)))
+
+
+async def track_in_database(postgres_url: str, prs: tuple[storage.requests.PR, ...]) -> None:
+    url = sqlalchemy.engine.url.make_url(postgres_url).set(drivername="postgresql+psycopg")
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(storage.metadata.create_all)
+        database_storage = storage.Storage(engine)
+        for pr in prs:
+            await database_storage.store_pr_request(
+                storage.requests.PRRequest(pr=pr, user_id="U0HARNESS", channel_id=CHANNEL_ID)
+            )
+    finally:
+        await engine.dispose()
+
+
+def slash_commands(response_url: str) -> Callable[[], tuple[bytes, Mapping[str, str]]]:
+    """
+    Return a function that makes a signed ``/track_pr`` slash command
+    """
+    counter = itertools.count()
+
+    def make_request() -> tuple[bytes, Mapping[str, str]]:
+        body = parse.urlencode(
+            {
+                "token": "harness",
+                "team_id": "T00000000",
+                "team_domain": "harness",
+                "channel_id": CHANNEL_ID,
+                "channel_name": "harness",
+                "user_id": "U0HARNESS",
+                "user_name": "harness",
+                "command": "/track_pr",
+                "text": PR_URL,
+                "api_app_id": "A00000000",
+                "is_enterprise_install": "false",
+                "response_url": response_url,
+                "trigger_id": f"harness.{next(counter)}",
+            }
+        ).encode()
+
+        timestamp = str(int(time.time()))
+        signature = hmac.new(
+            SIGNING_SECRET.encode(), b"v0:%s:%s" % (timestamp.encode(), body), hashlib.sha256
+        ).hexdigest()
+        return body, {
+            "content-type": "application/x-www-form-urlencoded",
+            "x-slack-request-timestamp": timestamp,
+            "x-slack-signature": f"v0={signature}",
+        }
+
+    return make_request
+
+
+def resident_memory(pid: int) -> int | None:
+    """
+    Return the bytes of memory used by the process, or None when that can't
+    be found from /proc
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+@attrs.define
+class Backlog:
+    url: str
+    samples: list[int] = attrs.field(factory=list)
+
+    async def read(self, session: aiohttp.ClientSession) -> int | None:
+        try:
+            async with session.get(self.url) as response:
+                found = await response.json()
+        except (aiohttp.ClientError, TimeoutError, ValueError):
+            return None
+        backlog = int(found["checks"]["event_backlog"]["value"])
+        self.samples.append(backlog)
+        return backlog
+
+    async def watch(self, session: aiohttp.ClientSession, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            await self.read(session)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=0.25)
+            except TimeoutError:
+                pass
+
+    async def wait_until_empty(
+        self, session: aiohttp.ClientSession, timeout: float
+    ) -> float | None:
+        """
+        Return the seconds taken for the backlog to be empty, or None if it
+        didn't empty within the timeout
+        """
+        start = time.perf_counter()
+        while time.perf_counter() - start < timeout:
+            if await self.read(session) == 0:
+                return time.perf_counter() - start
+            await asyncio.sleep(0.1)
+        return None
+
+
+@attrs.define
+class Report:
+    scenario: Scenario
+    github: replay.Results
+    slack: replay.Results
+    memory_before: int | None
+    memory_after_load: int | None
+    memory_after_drain: int | None
+    max_backlog: int
+    drain_seconds: float | None
+    slack_calls: dict[str, int]
+    slack_rate_limited: int
+    slack_responses: int
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "scenario": attrs.asdict(self.scenario),
+            "github_webhook": self.github.as_dict(),
+            "slack_events": self.slack.as_dict(),
+            "memory_bytes": {
+                "before": self.memory_before,
+                "after_load": self.memory_after_load,
+                "after_drain": self.memory_after_drain,
+            },
+            "max_event_backlog": self.max_backlog,
+            "drain_seconds": self.drain_seconds,
+            "slack_calls": self.slack_calls,
+            "slack_rate_limited": self.slack_rate_limited,
+            "slack_responses": self.slack_responses,
+        }
+
+    def summary(self) -> list[str]:
+        def mib(value: int | None) -> str:
+            return "?" if value is None else f"{value / 1024 / 1024:.1f}MiB"
+
+        drained = "never" if self.drain_seconds is None else f"{self.drain_seconds:.2f}s"
+        return [
+            f"== {self.scenario.name}",
+            self.github.summary("  /github/webhook"),
+            self.slack.summary("  /slack/events"),
+            f"  memory: before={mib(self.memory_before)}"
+            f" after_load={mib(self.memory_after_load)}"
+            f" after_drain={mib(self.memory_after_drain)}",
+            f"  event backlog: max={self.max_backlog} drained_in={drained}",
+            f"  slack: calls={dict(sorted(self.slack_calls.items()))}"
+            f" rate_limited={self.slack_rate_limited} responses={self.slack_responses}",
+        ]
+
+
+async def wait_for_port(port: int, process: multiprocessing.process.BaseProcess) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise RuntimeError(f"Server exited with {process.exitcode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            await writer.wait_closed()
+            return
+    raise TimeoutError("Server did not start listening")
+
+
+async def run_scenario(
+    scenario: Scenario,
+    *,
+    duration: float,
+    concurrency: int,
+    github_rate: float | None,
+    slack_rate: float | None,
+    drain_timeout: float,
+    postgres_url: str | None,
+    log_path: str,
+) -> Report:
+    webhooks = fresh_webhooks()
+    prs = tracked_prs(webhooks)
+    if postgres_url is not None:
+        await track_in_database(postgres_url, prs)
+
+    fake_slack = _fake_slack.FakeSlack(
+        latency=scenario.slack_latency, rate_limited_fraction=scenario.slack_rate_limited
+    )
+    await fake_slack.start()
+
+    port = _webhooks.free_port()
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve,
+        args=(
+            ServeOptions(
+                port=port,
+                slack_api_url=fake_slack.api_url,
+                postgres_url=postgres_url,
+                storage_latency=scenario.storage_latency,
+                tracked=prs,
+                log_path=log_path,
+            ),
+        ),
+    )
+    process.start()
+    assert process.pid is not None
+
+    try:
+        await wait_for_port(port, process)
+        base_url = f"http://127.0.0.1:{port}"
+        backlog = Backlog(url=f"{base_url}/readyz")
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+            memory_before = resident_memory(process.pid)
+
+            stop = asyncio.Event()
+            watching = asyncio.create_task(backlog.watch(session, stop))
+            try:
+                github, slack = await asyncio.gather(
+                    replay.send_webhooks(
+                        f"{base_url}/github/webhook",
+                        webhooks,
+                        secret=_webhooks.WEBHOOK_SECRET,
+                        concurrency=concurrency,
+                        duration=duration,
+                        rate=github_rate,
+                    ),
+                    replay.send(
+                        f"{base_url}/slack/events",
+                        slash_commands(fake_slack.response_url),
+                        concurrency=max(1, concurrency // 4),
+                        duration=duration,
+                        rate=slack_rate,
+                    ),
+                )
+            finally:
+                stop.set()
+                await watching
+
+            memory_after_load = resident_memory(process.pid)
+            drain_seconds = await backlog.wait_until_empty(session, drain_timeout)
+            memory_after_drain = resident_memory(process.pid)
+    finally:
+        process.terminate()
+        await asyncio.to_thread(process.join, 30)
+        if process.is_alive():
+            process.kill()
+            await asyncio.to_thread(process.join)
+        await fake_slack.stop()
+
+    return Report(
+        scenario=scenario,
+        github=github,
+        slack=slack,
+        memory_before=memory_before,
+        memory_after_load=memory_after_load,
+        memory_after_drain=memory_after_drain,
+        max_backlog=max(backlog.samples, default=0),
+        drain_seconds=drain_seconds,
+        slack_calls=dict(fake_slack.calls),
+        slack_rate_limited=fake_slack.rate_limited,
+        slack_responses=fake_slack.responses,
+    )
+
+
+@click.command(help=__doc__)
+@click.option(
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    type=click.Choice(list(SCENARIOS)),
+    help="Run only these scenarios. Runs all of them by default",
+)
+@click.option("--duration", default=10.0, help="Seconds to send requests in each scenario")
+@click.option("--concurrency", default=16, help="Concurrent github webhooks")
+@click.option(
+    "--github-rate",
+    type=float,
+    default=None,
+    help="Github webhooks per second. As fast as the concurrency allows by default",
+)
+@click.option("--slack-rate", type=float, default=10.0, help="Slash commands per second")
+@click.option(
+    "--drain-timeout", default=60.0, help="Seconds to wait for the backlog to empty after load"
+)
+@click.option(
+    "--postgres-url",
+    default=None,
+    help="Use this database rather than keeping storage in memory",
+)
+@click.option(
+    "--server-log",
+    default=os.devnull,
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    help="Append the logs of the server to this file",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the results as json")
+def main(
+    scenarios: tuple[str, ...],
+    duration: float,
+    concurrency: int,
+    github_rate: float | None,
+    slack_rate: float,
+    drain_timeout: float,
+    postgres_url: str | None,
+    server_log: pathlib.Path,
+    as_json: bool,
+) -> None:
+    reports: list[Report] = []
+    for name in scenarios or SCENARIOS:
+        report = asyncio.run(
+            run_scenario(
+                SCENARIOS[name],
+                duration=duration,
+                concurrency=concurrency,
+                github_rate=github_rate,
+                slack_rate=slack_rate,
+                drain_timeout=drain_timeout,
+                postgres_url=postgres_url,
+                log_path=str(server_log),
+            )
+        )
+        reports.append(report)
+        if not as_json:
+            for line in report.summary():
+                click.echo(line)
+
+    if as_json:
+        click.echo(json.dumps([report.as_dict() for report in reports], indent=2))
+
+
+if __name__ == "__main__":
+    main()
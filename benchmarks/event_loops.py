@@ -0,0 +1,47 @@
+"""
+Compare the standard library event loop against uvloop.
+
+For each event loop a server is started with ``serve-http --event-loop`` and
+the recorded webhooks in ``tests/fixtures/github`` are replayed against it for
+a fixed amount of time, reporting requests per second and latency percentiles.
+
+Run with::
+
+  > ./dev bench event_loops --duration 20
+"""
+
+import asyncio
+
+import click
+
+from slack_github_tracker import options, replay
+
+from . import _webhooks
+
+
+@click.command(help=__doc__)
+@click.option("--concurrency", default=32, help="Number of concurrent requests")
+@click.option("--duration", default=10.0, help="Seconds to send webhooks to each server")
+def main(concurrency: int, duration: float) -> None:
+    webhooks = _webhooks.recorded_webhooks()
+
+    for event_loop in options.EventLoop:
+        server = _webhooks.RunningServer.start("--event-loop", event_loop.value)
+        try:
+            results = asyncio.run(
+                replay.send_webhooks(
+                    server.webhook_url,
+                    webhooks,
+                    secret=_webhooks.WEBHOOK_SECRET,
+                    concurrency=concurrency,
+                    duration=duration,
+                )
+            )
+        finally:
+            server.stop()
+
+        click.echo(results.summary(f"event_loop={event_loop.value}"))
+
+
+if __name__ == "__main__":
+    main()
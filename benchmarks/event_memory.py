@@ -0,0 +1,72 @@
+"""
+Measure the memory held by each queued github event.
+
+The recorded webhooks in ``tests/fixtures/github`` are interpreted over and
+over and the events are kept in a list like a backlog in the event queue.
+This is compared with a backlog that keeps the parsed body of each webhook,
+which is what an event that held on to the body would cost.
+
+Run with::
+
+  > ./dev bench event_memory --events 10000
+"""
+
+import gc
+import json
+import tracemalloc
+from collections.abc import Callable
+
+import click
+import structlog
+
+from slack_github_tracker import recorded
+from slack_github_tracker.handlers import github
+
+from . import _webhooks
+
+
+def measure(count: int, make: Callable[[], list[object]]) -> float:
+    """
+    Return the bytes held per item after making ``count`` items
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        backlog: list[object] = []
+        while len(backlog) < count:
+            backlog.extend(make())
+        gc.collect()
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (end - start) / len(backlog)
+
+
+@click.command(help=__doc__)
+@click.option("--events", "count", default=10_000, help="Number of events in each backlog")
+def main(count: int) -> None:
+    logger = structlog.get_logger()
+    webhooks: list[recorded.RecordedWebhook] = [
+        webhook for webhook in _webhooks.recorded_webhooks() if webhook.event == "pull_request"
+    ]
+    interpreter = github.interpret.pull_request.PullRequestEventInterpreter()
+
+    def events() -> list[object]:
+        return [
+            event
+            for webhook in webhooks
+            for event in interpreter.interpret(webhook.incoming(logger))
+        ]
+
+    def bodies() -> list[object]:
+        return [json.loads(webhook.body) for webhook in webhooks]
+
+    per_event = measure(count, events)
+    per_body = measure(count, bodies)
+    click.echo(f"events: {per_event:.0f} bytes each, {per_event * count / 1024:.0f}KiB queued")
+    click.echo(f"bodies: {per_body:.0f} bytes each, {per_body * count / 1024:.0f}KiB queued")
+
+
+if __name__ == "__main__":
+    main()
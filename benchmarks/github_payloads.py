@@ -0,0 +1,101 @@
+"""
+Measure decoding the recorded webhooks in ``tests/fixtures/github`` into the
+typed models the interpreters read.
+
+For each way of decoding, the CPU time per webhook is reported along with the
+memory that is still held once decoding is done, and the most memory that was
+held while decoding.
+
+* ``json`` parses the body into a dictionary, which is what the webhook
+  route does and what was read by the interpreters before the models.
+* ``models`` structures the parsed body into the models with the structure
+  functions generated by ``interpret.payloads``, after which the
+  dictionary can be dropped.
+* ``models (detailed)`` does the same with structure functions that use
+  cattrs' detailed validation, which collects every error in the body.
+
+The standard library can't skip parts of a JSON document, so the whole body
+is still parsed once. The models keep what is read from it small.
+
+Run with::
+
+  > ./dev bench github_payloads --rounds 2000
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import click
+
+from slack_github_tracker.handlers import github
+
+from . import _webhooks
+
+payloads = github.interpret.payloads
+
+MODELS: dict[str, type[payloads.PullRequestPayload | payloads.PullRequestReviewPayload]] = {
+    "pull_request": payloads.PullRequestPayload,
+    "pull_request_review": payloads.PullRequestReviewPayload,
+}
+
+
+def measure(rounds: int, decode: Callable[[], list[object]]) -> tuple[float, float, float]:
+    """
+    Return the CPU seconds per webhook, then the bytes held per webhook once
+    decoded, then the most bytes held per webhook while decoding
+    """
+    decode()
+    gc.collect()
+
+    start = time.process_time()
+    count = 0
+    for _ in range(rounds):
+        count += len(decode())
+    took = (time.process_time() - start) / count
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        decoded = decode()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return took, (after - before) / len(decoded), (peak - before) / len(decoded)
+
+
+@click.command(help=__doc__)
+@click.option("--rounds", default=2000, help="Number of times to decode every webhook")
+def main(rounds: int) -> None:
+    webhooks = [
+        (webhook.body, MODELS[webhook.event])
+        for webhook in _webhooks.recorded_webhooks()
+        if webhook.event in MODELS
+    ]
+
+    detailed = payloads.make_converter(detailed_validation=True)
+
+    ways: dict[str, Callable[[], list[object]]] = {
+        "json": lambda: [json.loads(body) for body, _ in webhooks],
+        "models": lambda: [
+            payloads.converter.structure(json.loads(body), kls) for body, kls in webhooks
+        ],
+        "models (detailed)": lambda: [
+            detailed.structure(json.loads(body), kls) for body, kls in webhooks
+        ],
+    }
+
+    for name, decode in ways.items():
+        took, held, peak = measure(rounds, decode)
+        click.echo(
+            f"{name}: {took * 1e6:.1f}us cpu, {held / 1024:.2f}KiB held,"
+            f" {peak / 1024:.1f}KiB peak per webhook"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Time the code that runs for every webhook and slack command, without a
+server or network.
+
+Each case is run in a loop until it has taken at least ``--min-time`` seconds
+and this is repeated ``--repeats`` times. The median time per call is
+reported, along with the fastest repeat.
+
+Results are printed as json. Save them with ``--save`` before a change and
+compare with ``--baseline`` after it. Cases that got slower by more than
+``--tolerance`` are listed and the command exits with a failure. Baselines are
+only comparable on the machine they were made on.
+
+``Storage.store_pr_request`` needs a postgres database and is skipped unless
+``--postgres-url`` is given. Missing tables are created in that database and
+the rows made by the benchmark are deleted afterwards.
+
+Run with::
+
+  > ./dev bench hot_paths --save /tmp/before.json
+  > ./dev bench hot_paths --baseline /tmp/before.json
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import pathlib
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any, cast
+
+import attrs
+import click
+import sanic
+import sqlalchemy
+import structlog
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from slack_github_tracker import cli, storage
+from slack_github_tracker.handlers import github
+from slack_github_tracker.handlers.server import _handlers as server_handlers
+from slack_github_tracker.handlers.slack import _interpret as interpret
+from slack_github_tracker.handlers.slack import _tracking as tracking
+from slack_github_tracker.storage import _prs as prs
+
+from . import _webhooks
+
+PR_URL = "https://github.com/delfick/slack-github-tracker/pull/12"
+
+COMMAND: dict[str, object] = {
+    "token": "oBaw0jt6jmXl7HD8geO7qlAA",
+    "team_id": "TS8HER95B",
+    "team_domain": "myslack",
+    "channel_id": "C090Z73QS0Y",
+    "channel_name": "slack-app-play",
+    "user_id": "US8Z4ESLL",
+    "user_name": "delfick",
+    "command": "/track_pr",
+    "api_app_id": "A08V9SZMPF2",
+    "text": PR_URL,
+    "is_enterprise_install": "false",
+    "response_url": "https://hooks.slack.com/commands/TS8HER95B/8101191819973/BYn2EBedZ",
+    "trigger_id": "8089503654311.890590854181.e23e5b2da9894a19f13784ce1a01cafc",
+}
+
+MESSAGE: dict[str, object] = {
+    "type": "message",
+    "ts": "1731457385.123459",
+    "client_msg_id": "6bc1aa80-4a15-4f5e-a21b-6bc0b9d0e5d3",
+    "text": "hello",
+    "team": "TS8HER95B",
+    "user": "US8Z4ESLL",
+    "channel": "C090Z73QS0Y",
+    "event_ts": "1731457385.123459",
+    "channel_type": "channel",
+}
+
+
+@attrs.frozen
+class Case:
+    name: str
+    run: Callable[[int], Awaitable[None]]
+
+
+@attrs.frozen
+class Timing:
+    name: str
+    iterations: int
+    seconds_per_call: list[float]
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.seconds_per_call)
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "iterations": self.iterations,
+            "median_ns": self.median * 1e9,
+            "min_ns": min(self.seconds_per_call) * 1e9,
+        }
+
+
+def sync_case(name: str, func: Callable[[], object]) -> Case:
+    async def run(iterations: int) -> None:
+        for _ in range(iterations):
+            func()
+
+    return Case(name=name, run=run)
+
+
+def async_case(name: str, func: Callable[[], Awaitable[object]]) -> Case:
+    async def run(iterations: int) -> None:
+        for _ in range(iterations):
+            await func()
+
+    return Case(name=name, run=run)
+
+
+@attrs.frozen
+class FakeRequest:
+    """
+    The parts of ``sanic.Request`` that ``GithubWebhook.handle`` uses
+    """
+
+    headers: dict[str, str]
+    body: bytes
+
+    @property
+    def json(self) -> object:
+        return json.loads(self.body)
+
+
+@attrs.define
+class DiscardEvents:
+    appended: int = 0
+
+    def append(self, event: github.protocols.Event, /, *, tenant: str = "") -> None:
+        self.appended += 1
+
+
+def webhook_cases(logger: Any) -> Iterator[Case]:
+    webhooks = _webhooks.recorded_webhooks()
+    hooks = github.hooks.Hooks(
+        logger=logger,
+        event_adder=DiscardEvents(),
+        event_interpreter=github.interpret.EventInterpreter(),
+        tenants=github.tenants.Tenants(default_secret=_webhooks.WEBHOOK_SECRET),
+    )
+    webhook_handler = server_handlers.GithubWebhook(
+        logger=logger, hooks=hooks, deliveries=github.deliveries.Deliveries(logger=logger)
+    )
+
+    # Each request needs its own delivery id so it isn't dropped as a duplicate
+    signed = [(webhook, webhook.signed(_webhooks.WEBHOOK_SECRET)) for webhook in webhooks]
+    counter = iter(range(sys.maxsize))
+
+    async def handle() -> None:
+        index = next(counter)
+        webhook, headers = signed[index % len(signed)]
+        request = FakeRequest(
+            headers={**headers, "x-github-delivery": f"bench-{index}"}, body=webhook.body
+        )
+        await webhook_handler.handle(cast(sanic.Request, request))
+
+    yield async_case("github_webhook_handle", handle)
+
+    body = webhooks[0].body
+    yield sync_case(
+        "determine_expected_signature", lambda: hooks.determine_expected_signature(body)
+    )
+
+    interpreter = github.interpret.EventInterpreter()
+    incomings = [webhook.incoming(logger) for webhook in webhooks]
+
+    def interpret_all() -> None:
+        for incoming in incomings:
+            for _ in interpreter.interpret(incoming):
+                pass
+
+    yield sync_case("event_interpreter_all_fixtures", interpret_all)
+
+
+def slack_cases() -> Iterator[Case]:
+    messages = interpret.MessageDeserializer(interpret.Message)
+    commands = interpret.CommandDeserializer(interpret.Command)
+    track_pr = tracking.TrackPRMessageDeserializer()
+
+    yield sync_case("message_deserializer", lambda: messages.deserialize(MESSAGE))
+    yield sync_case("command_deserializer", lambda: commands.deserialize(COMMAND))
+    yield sync_case("track_pr_message_deserializer", lambda: track_pr.deserialize(COMMAND))
+    yield sync_case("pr_from_text", lambda: tracking.PR.from_text(PR_URL))
+
+
+def storage_case(engine: AsyncEngine) -> Case:
+    event_storage = storage.Storage(engine)
+    request = storage.requests.PRRequest(
+        pr=storage.requests.PR(organisation="benchmark", repo="hot_paths", pr_number=1),
+        user_id="U_BENCHMARK",
+        channel_id="C_BENCHMARK",
+    )
+    return async_case("storage_store_pr_request", lambda: event_storage.store_pr_request(request))
+
+
+async def measure(case: Case, *, min_time: float, repeats: int) -> Timing:
+    # Find how many calls take at least min_time so timer overhead doesn't matter
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        await case.run(iterations)
+        took = time.perf_counter() - start
+        if took >= min_time:
+            break
+        iterations *= 2 if took <= 0 else max(2, min(10, int(min_time / took) + 1))
+
+    seconds_per_call: list[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await case.run(iterations)
+        seconds_per_call.append((time.perf_counter() - start) / iterations)
+
+    return Timing(name=case.name, iterations=iterations, seconds_per_call=seconds_per_call)
+
+
+async def run_cases(
+    *, only: tuple[str, ...], min_time: float, repeats: int, postgres_url: str | None
+) -> list[Timing]:
+    logger = structlog.get_logger()
+    cases = [*webhook_cases(logger), *slack_cases()]
+
+    engine: AsyncEngine | None = None
+    if postgres_url:
+        url = sqlalchemy.engine.url.make_url(postgres_url).set(drivername="postgresql+psycopg")
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.run_sync(storage.metadata.create_all)
+        cases.append(storage_case(engine))
+
+    try:
+        return [
+            await measure(case, min_time=min_time, repeats=repeats)
+            for case in cases
+            if not only or case.name in only
+        ]
+    finally:
+        if engine is not None:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    sqlalchemy.delete(prs.Request).where(prs.Request.organisation == "benchmark")
+                )
+            await engine.dispose()
+
+
+def compare(
+    results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], tolerance: float
+) -> list[str]:
+    """
+    Print how each case changed from the baseline and return the cases that
+    got slower by more than the tolerance
+    """
+    regressions: list[str] = []
+    for name, result in results.items():
+        if name not in baseline:
+            click.echo(f"{name:>32}: not in baseline", err=True)
+            continue
+
+        change = result["median_ns"] / baseline[name]["median_ns"] - 1
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+
+        click.echo(
+            f"{name:>32}: {baseline[name]['median_ns']:>12.0f}ns -> {result['median_ns']:>12.0f}ns"
+            f" ({change:+.1%}){' REGRESSION' if regressed else ''}",
+            err=True,
+        )
+    return regressions
+
+
+@click.command(help=__doc__)
+@click.option("--only", multiple=True, help="Only run the case with this name")
+@click.option("--min-time", default=0.2, help="Seconds each repeat of a case should take")
+@click.option("--repeats", default=5, type=click.IntRange(min=1), help="Repeats of each case")
+@click.option(
+    "--postgres-url",
+    default=os.environ.get("BENCHMARK_POSTGRES_URL"),
+    help="Database to time Storage.store_pr_request against. Defaults to $BENCHMARK_POSTGRES_URL",
+)
+@click.option("--save", type=click.Path(path_type=pathlib.Path), help="Write the results here")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, path_type=pathlib.Path),
+    help="Compare the results with those saved in this file",
+)
+@click.option(
+    "--tolerance",
+    default=0.2,
+    type=click.FloatRange(min=0),
+    help="How much slower than the baseline a case can be before it's a regression",
+)
+def main(
+    only: tuple[str, ...],
+    min_time: float,
+    repeats: int,
+    postgres_url: str | None,
+    save: pathlib.Path | None,
+    baseline: pathlib.Path | None,
+    tolerance: float,
+) -> None:
+    # Logs made by the code being timed would otherwise be rendered to the terminal
+    with open(os.devnull, "w") as devnull:
+        cli.setup_logging(False, stream=devnull)
+        timings = asyncio.run(
+            run_cases(only=only, min_time=min_time, repeats=repeats, postgres_url=postgres_url)
+        )
+
+    results = {timing.name: timing.as_dict() for timing in timings}
+    output = {
+        "created": datetime.datetime.now(datetime.UTC).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    click.echo(json.dumps(output, indent=2))
+
+    if save is not None:
+        save.write_text(json.dumps(output, indent=2) + "\n")
+
+    if baseline is not None:
+        regressions = compare(
+            cast(dict[str, dict[str, Any]], output["results"]),
+            json.loads(baseline.read_text())["results"],
+            tolerance,
+        )
+        if regressions:
+            raise click.ClickException(f"Slower than the baseline: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Measure how long the event loop spends logging.
+
+The same burst of "Event dropped" logs that ``GithubWebhook.handle`` makes is
+logged from a coroutine with logs written inline, written through the queue
+and listener thread used by ``--queued-logging``, and written through the
+queue with the same sampling ``GithubWebhook`` uses.
+
+Logs go to a temporary file, or with ``--slow-reader`` to a pipe that is read
+in small chunks like a busy log collector reading stderr.
+
+Both the wall clock time and the CPU time of the event loop thread are
+reported. Rendering in the listener thread still needs the GIL, so the wall
+clock time of a loop that is always busy doesn't improve, but the loop no
+longer blocks on writes and its own CPU time goes down.
+
+Run with::
+
+  > ./dev bench logging_overhead --logs 50000
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from typing import IO
+
+import click
+
+from slack_github_tracker import cli, logs, protocols
+
+
+async def log_burst(
+    logger: protocols.Logger, count: int, *, sampler: logs.RateSampler | None
+) -> tuple[float, float]:
+    """
+    Return the wall clock and CPU seconds the event loop spent making ``count`` logs
+    """
+    start = time.perf_counter()
+    start_cpu = time.thread_time()
+    for index in range(count):
+        bound = logger.bind(github_delivery=str(uuid.uuid4()))
+        reason = "Unrecognised webhook event"
+        suppressed: int | None = 0
+        if sampler is not None:
+            suppressed = sampler.sample(reason)
+        if suppressed is not None:
+            bound.info("Event dropped", reason=reason, suppressed=suppressed)
+
+        if index % 100 == 0:
+            # Give other tasks a turn like they would get between requests
+            await asyncio.sleep(0)
+    return time.perf_counter() - start, time.thread_time() - start_cpu
+
+
+@contextlib.contextmanager
+def temporary_file() -> Iterator[IO[str]]:
+    with tempfile.TemporaryFile("w") as stream:
+        yield stream
+
+
+@contextlib.contextmanager
+def slow_pipe() -> Iterator[IO[str]]:
+    read_fd, write_fd = os.pipe()
+    stop = threading.Event()
+
+    def read() -> None:
+        with open(read_fd, "rb") as reader:
+            while reader.read1(4096):
+                time.sleep(0.002 if not stop.is_set() else 0)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    with open(write_fd, "w") as stream:
+        try:
+            yield stream
+        finally:
+            stop.set()
+    reader.join()
+
+
+def run_mode(name: str, count: int, *, queued: bool, sampled: bool, slow_reader: bool) -> None:
+    root = logging.getLogger()
+    with slow_pipe() if slow_reader else temporary_file() as stream:
+        logger = cli.setup_logging(False, queued=queued, stream=stream)
+        sampler = logs.RateSampler() if sampled else None
+
+        loop_seconds, loop_cpu = asyncio.run(log_burst(logger, count, sampler=sampler))
+
+        start = time.perf_counter()
+        logs.stop_listeners()
+        drain_seconds = time.perf_counter() - start
+
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+    click.echo(
+        f"{name:>15}: {loop_seconds:.3f}s on the event loop"
+        f" ({loop_seconds / count * 1_000_000:.1f}us per log),"
+        f" {loop_cpu:.3f}s of event loop CPU,"
+        f" {drain_seconds:.3f}s for the listener to catch up"
+    )
+
+
+@click.command(help=__doc__)
+@click.option("--logs", "count", default=50_000, help="Number of logs to make in each mode")
+@click.option("--slow-reader", is_flag=True, help="Write logs to a pipe that is read slowly")
+def main(count: int, slow_reader: bool) -> None:
+    run_mode("inline", count, queued=False, sampled=False, slow_reader=slow_reader)
+    run_mode("queued", count, queued=True, sampled=False, slow_reader=slow_reader)
+    run_mode("queued+sampled", count, queued=True, sampled=True, slow_reader=slow_reader)
+
+
+if __name__ == "__main__":
+    main()
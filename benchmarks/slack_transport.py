@@ -0,0 +1,276 @@
+"""
+Compare the per event latency of receiving slack events through the
+``/slack/events`` http route against receiving them over Socket Mode.
+
+Both paths dispatch to the same bolt app. Socket Mode connects to a local fake
+of the Slack websocket server so no network access is required.
+
+Run with::
+
+  > ./dev bench slack_transport --events 2000
+"""
+
+import asyncio
+import itertools
+import json
+import socket
+import statistics
+import time
+import uuid
+
+import aiohttp
+import attrs
+import click
+import sanic
+import slack_bolt
+import structlog
+from aiohttp import web
+from hypercorn.asyncio import serve as hypercorn_serve
+from hypercorn.config import Config
+from machinery import helpers as hp
+from slack_sdk.signature import SignatureVerifier
+from slack_sdk.web.async_client import AsyncWebClient
+
+from slack_github_tracker import cli, handlers, protocols
+
+SIGNING_SECRET = "benchmark-signing-secret"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def event_body(index: int) -> dict[str, object]:
+    return {
+        "token": "verification-token",
+        "team_id": "T1",
+        "api_app_id": "A1",
+        "type": "event_callback",
+        "event_id": f"Ev{index:08d}",
+        "event_time": int(time.time()),
+        "event": {
+            "type": "app_mention",
+            "user": "U2",
+            "text": "<@U1> hello",
+            "ts": f"{time.time():.6f}",
+            "channel": "C1",
+            "event_ts": f"{time.time():.6f}",
+        },
+    }
+
+
+@attrs.define
+class FakeSlack:
+    """
+    Just enough of the Slack Web API and Socket Mode websocket for a bolt app
+    to connect and receive events.
+    """
+
+    port: int = attrs.field(factory=free_port)
+    _acks: dict[str, asyncio.Future[None]] = attrs.field(factory=dict)
+    _ws: web.WebSocketResponse | None = None
+    _connected: asyncio.Event = attrs.field(factory=asyncio.Event)
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/"
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/auth.test", self.auth_test)
+        app.router.add_post("/api/apps.connections.open", self.connections_open)
+        app.router.add_get("/link", self.link)
+        return app
+
+    async def auth_test(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"ok": True, "url": "https://bench.slack.com/", "team_id": "T1", "user_id": "U1"}
+            | {"bot_id": "B1", "team": "bench", "user": "bench"}
+        )
+
+    async def connections_open(self, request: web.Request) -> web.Response:
+        return web.json_response({"ok": True, "url": f"ws://127.0.0.1:{self.port}/link"})
+
+    async def link(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_str(json.dumps({"type": "hello", "num_connections": 1}))
+        self._ws = ws
+        self._connected.set()
+
+        async for message in ws:
+            if message.type is not aiohttp.WSMsgType.TEXT:
+                continue
+            envelope_id = json.loads(message.data).get("envelope_id")
+            fut = self._acks.pop(envelope_id, None)
+            if fut is not None and not fut.done():
+                fut.set_result(None)
+
+        return ws
+
+    async def send_event(self, body: dict[str, object]) -> None:
+        await self._connected.wait()
+        assert self._ws is not None
+
+        envelope_id = str(uuid.uuid4())
+        fut = self._acks[envelope_id] = asyncio.get_running_loop().create_future()
+        await self._ws.send_str(
+            json.dumps(
+                {
+                    "envelope_id": envelope_id,
+                    "type": "events_api",
+                    "accepts_response_payload": False,
+                    "retry_attempt": 0,
+                    "retry_reason": "",
+                    "payload": body,
+                }
+            )
+        )
+        await fut
+
+
+def make_slack_app(fake_slack: FakeSlack) -> slack_bolt.async_app.AsyncApp:
+    slack_app = slack_bolt.async_app.AsyncApp(
+        client=AsyncWebClient(token="xoxb-benchmark", base_url=fake_slack.api_url),
+        signing_secret=SIGNING_SECRET,
+    )
+
+    @slack_app.event("app_mention")
+    async def app_mention() -> None:
+        pass
+
+    return slack_app
+
+
+def summarise(name: str, latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"{name:>12}: events={len(ordered)}"
+        f" mean={statistics.fmean(ordered) * 1000:.3f}ms"
+        f" p50={statistics.median(ordered) * 1000:.3f}ms"
+        f" p99={p99 * 1000:.3f}ms"
+    )
+
+
+async def bench_http(
+    logger: protocols.Logger, fake_slack: FakeSlack, events: int, warmup: int
+) -> list[float]:
+    port = free_port()
+    slack_app = make_slack_app(fake_slack)
+
+    app = sanic.Sanic("benchmark_slack_transport", configure_logging=False)
+    app.config.MOTD = False
+    handlers.server.register_sanic_routes(
+        logger=logger,
+        sanic_app=app,
+        registry=handlers.server.Registry(
+            slack_app=slack_app,
+            github_webhooks=handlers.github.hooks.Hooks(
+                logger=logger,
+                event_adder=handlers.github.handler.EventHandler(logger=logger),
+                event_interpreter=handlers.github.interpret.EventInterpreter(),
+                tenants=handlers.github.tenants.Tenants(),
+            ),
+            github_deliveries=handlers.github.deliveries.Deliveries(logger=logger),
+            slack_signing_secret=SIGNING_SECRET,
+        ),
+    )
+
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    shutdown = asyncio.Event()
+    server = hp.async_as_background(hypercorn_serve(app, config, shutdown_trigger=shutdown.wait))
+
+    verifier = SignatureVerifier(SIGNING_SECRET)
+    latencies: list[float] = []
+    try:
+        async with aiohttp.ClientSession() as session:
+            for index in itertools.count():
+                try:
+                    async with session.get(f"http://127.0.0.1:{port}/"):
+                        break
+                except aiohttp.ClientConnectionError:
+                    if index > 100:
+                        raise
+                    await asyncio.sleep(0.05)
+
+            for index in range(warmup + events):
+                body = json.dumps(event_body(index))
+                timestamp = str(int(time.time()))
+                signature = verifier.generate_signature(timestamp=timestamp, body=body)
+                assert signature is not None
+                start = time.perf_counter()
+                async with session.post(
+                    f"http://127.0.0.1:{port}/slack/events",
+                    data=body,
+                    headers={
+                        "Content-Type": "application/json",
+                        "X-Slack-Request-Timestamp": timestamp,
+                        "X-Slack-Signature": signature,
+                    },
+                ) as response:
+                    await response.read()
+                    assert response.status == 200, response.status
+                if index >= warmup:
+                    latencies.append(time.perf_counter() - start)
+    finally:
+        shutdown.set()
+        await server
+
+    return latencies
+
+
+async def bench_socket_mode(
+    logger: protocols.Logger, fake_slack: FakeSlack, events: int, warmup: int
+) -> list[float]:
+    socket_mode = handlers.server.SocketMode(
+        logger=logger, slack_app=make_slack_app(fake_slack), app_token="xapp-benchmark"
+    )
+
+    final_future = hp.create_future(name="bench_socket_mode[final_future]")
+    task = hp.async_as_background(socket_mode.run(final_future))
+
+    latencies: list[float] = []
+    try:
+        for index in range(warmup + events):
+            start = time.perf_counter()
+            await fake_slack.send_event(event_body(index))
+            if index >= warmup:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        final_future.cancel()
+        await hp.wait_for_all_futures(task, name="bench_socket_mode[wait_for_task]")
+
+    return latencies
+
+
+async def run_benchmark(events: int, warmup: int) -> None:
+    logger = structlog.get_logger().bind()
+    fake_slack = FakeSlack()
+
+    runner = web.AppRunner(fake_slack.make_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", fake_slack.port).start()
+    try:
+        http = await bench_http(logger, fake_slack, events, warmup)
+        socket_mode = await bench_socket_mode(logger, fake_slack, events, warmup)
+    finally:
+        await runner.cleanup()
+
+    click.echo(summarise("http", http))
+    click.echo(summarise("socket_mode", socket_mode))
+
+
+@click.command(help=__doc__)
+@click.option("--events", default=1000, help="Number of events to time for each transport")
+@click.option("--warmup", default=50, help="Number of events to send before timing starts")
+def main(events: int, warmup: int) -> None:
+    cli.setup_logging(dev_logging=True)
+    asyncio.run(run_benchmark(events, warmup))
+
+
+if __name__ == "__main__":
+    main()
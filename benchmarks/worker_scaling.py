@@ -0,0 +1,54 @@
+"""
+Measure how webhook throughput scales with the number of worker processes.
+
+For each worker count a server is started with ``serve-http --workers`` and the
+recorded webhooks in ``tests/fixtures/github`` are sent to it from several
+client processes for a fixed amount of time.
+
+Run with::
+
+  > ./dev bench worker_scaling --workers 1 --workers 2 --workers 4
+"""
+
+import time
+
+import click
+
+from . import _webhooks
+
+
+@click.command(help=__doc__)
+@click.option(
+    "--workers",
+    "worker_counts",
+    multiple=True,
+    type=int,
+    default=[1, 2, 4],
+    help="Worker counts to measure",
+)
+@click.option("--clients", default=4, help="Number of processes sending webhooks")
+@click.option("--concurrency", default=16, help="Concurrent requests per client process")
+@click.option("--duration", default=10.0, help="Seconds to send webhooks for each worker count")
+def main(worker_counts: tuple[int, ...], clients: int, concurrency: int, duration: float) -> None:
+    baseline: float | None = None
+
+    for workers in worker_counts:
+        server = _webhooks.RunningServer.start("--workers", str(workers))
+        try:
+            # Give every worker a moment to bind the port
+            time.sleep(1)
+            results = _webhooks.send_webhooks_from_processes(
+                server.webhook_url, clients=clients, concurrency=concurrency, duration=duration
+            )
+        finally:
+            server.stop()
+
+        if baseline is None:
+            baseline = results.requests_per_second
+
+        scaling = results.requests_per_second / baseline if baseline else 0
+        click.echo(f"{results.summary(f'workers={workers}')} scaling={scaling:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
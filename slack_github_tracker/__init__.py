@@ -1,3 +1,15 @@
-from . import cli, http_server
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import cli, http_server
 
 __all__ = ["cli", "http_server"]
+
+
+def __getattr__(name: str) -> object:
+    # Submodules are imported when they are first used so that importing the
+    # command line doesn't also import the server
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,74 @@
+import collections
+import time
+from collections.abc import Callable
+
+import attrs
+
+
+@attrs.define
+class TTLCache[T_Key, T_Value]:
+    """
+    A bounded mapping where each entry expires ``ttl`` seconds after it was set.
+
+    Once ``maxsize`` entries are held, setting a new key evicts the least
+    recently used entry. All operations are O(1) amortized.
+    """
+
+    maxsize: int
+    ttl: float
+    clock: Callable[[], float] = time.monotonic
+
+    _entries: collections.OrderedDict[T_Key, tuple[float, T_Value]] = attrs.field(
+        init=False, factory=collections.OrderedDict
+    )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: T_Key) -> bool:
+        found = self._entries.get(key)
+        return found is not None and found[0] > self.clock()
+
+    def get(self, key: T_Key) -> T_Value | None:
+        found = self._entries.get(key)
+        if found is None:
+            return None
+
+        expires, value = found
+        if expires <= self.clock():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: T_Key, value: T_Value) -> None:
+        now = self.clock()
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        self.expire(now=now)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: T_Key) -> T_Value | None:
+        found = self._entries.pop(key, None)
+        if found is None:
+            return None
+        return found[1]
+
+    def expire(self, *, now: float | None = None) -> None:
+        """
+        Remove expired entries from the least recently used end of the cache.
+
+        This stops at the first entry that hasn't expired, and entries further
+        along are removed when they are next looked at.
+        """
+        if now is None:
+            now = self.clock()
+
+        while self._entries:
+            expires, _ = next(iter(self._entries.values()))
+            if expires > now:
+                break
+            self._entries.popitem(last=False)
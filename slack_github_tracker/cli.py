@@ -1,13 +1,19 @@
 import functools
 import logging
 import os
+import pathlib
 from collections.abc import Callable
-from typing import Any
+from typing import IO, TYPE_CHECKING, Any
 
 import click
 import structlog
 
-from . import http_server, protocols
+from . import logs, options, protocols
+
+if TYPE_CHECKING:
+    # The server pulls in sanic, slack_bolt, hypercorn and sqlalchemy. These are
+    # imported when a command needs them so that the command line starts quickly
+    from . import http_server
 
 
 class EnvSecret(click.ParamType):
@@ -25,7 +31,16 @@ class EnvSecret(click.ParamType):
         return value
 
 
-def setup_logging(dev_logging: bool) -> protocols.Logger:
+def setup_logging(
+    dev_logging: bool, *, queued: bool = False, stream: IO[str] | None = None
+) -> protocols.Logger:
+    """
+    Make structlog and stdlib logging write to ``stream``, which defaults to
+    stderr.
+
+    When ``queued`` is True, log records are rendered and written from a
+    separate thread so the event loop doesn't wait on that work.
+    """
     timestamper = structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S")
     shared_processors: list[structlog.typing.Processor] = [
         # structlog.contextvars.merge_contextvars,
@@ -37,6 +52,7 @@ def setup_logging(dev_logging: bool) -> protocols.Logger:
     structlog.configure(
         processors=[
             *shared_processors,
+            *((logs.capture_exc_info,) if queued else ()),
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
         wrapper_class=structlog.stdlib.BoundLogger,
@@ -62,9 +78,12 @@ def setup_logging(dev_logging: bool) -> protocols.Logger:
             ),
         ],
     )
-    handler = logging.StreamHandler()
+    handler: logging.Handler = logging.StreamHandler(stream)
     handler.setFormatter(formatter)
 
+    if queued:
+        handler = logs.queued(handler)
+
     root_logger = logging.getLogger()
     root_logger.propagate = False
     root_logger.addHandler(handler)
@@ -81,9 +100,35 @@ def start_http_server(
     postgres_url: str,
     port: int,
     dev_logging: bool,
-    server_kls: type[http_server.Server],
+    queued_logging: bool,
+    digest_interval_seconds: float,
+    digest_channels: tuple[str, ...],
+    slack_transport: str,
+    slack_app_token: str | None,
+    shared_delivery_dedup: bool,
+    workers: int,
+    event_loop: str,
+    ready_max_event_backlog: int,
+    ready_max_pool_usage: float,
+    ready_max_loop_lag_seconds: float,
+    slow_event_seconds: float,
+    otlp_endpoint: str | None,
+    record_deliveries_dir: pathlib.Path | None,
+    record_deliveries_max_mib: int,
+    record_deliveries_max_age_days: float,
+    github_token: str | None,
+    github_api_url: str,
+    pr_backfill_concurrency: int,
+    github_tenants_file: pathlib.Path | None,
+    max_events_in_progress: int,
+    drain_grace: float,
+    server_kls: type["http_server.Server"],
 ) -> None:
-    logger = setup_logging(dev_logging)
+    import attrs
+
+    from . import supervisor
+
+    logger = setup_logging(dev_logging, queued=queued_logging)
     server = server_kls(
         postgres_url=postgres_url,
         slack_bot_token=slack_bot_token,
@@ -91,8 +136,37 @@ def start_http_server(
         github_webhook_secret=github_webhook_secret,
         port=port,
         logger=logger,
+        digest_interval_seconds=digest_interval_seconds,
+        digest_channels=frozenset(digest_channels),
+        slack_transport=options.SlackTransport(slack_transport),
+        slack_app_token=slack_app_token,
+        shared_delivery_dedup=shared_delivery_dedup,
+        workers=workers,
+        event_loop=options.EventLoop(event_loop),
+        ready_max_event_backlog=ready_max_event_backlog,
+        ready_max_pool_usage=ready_max_pool_usage,
+        ready_max_loop_lag_seconds=ready_max_loop_lag_seconds,
+        slow_event_seconds=slow_event_seconds,
+        otlp_endpoint=otlp_endpoint,
+        record_deliveries_dir=record_deliveries_dir,
+        record_deliveries_max_bytes=record_deliveries_max_mib * 1024 * 1024,
+        record_deliveries_max_age_seconds=record_deliveries_max_age_days * 24 * 3600,
+        github_token=github_token,
+        github_api_url=github_api_url,
+        pr_backfill_concurrency=pr_backfill_concurrency,
+        github_tenants_file=github_tenants_file,
+        max_events_in_progress=max_events_in_progress,
+        drain_grace_seconds=drain_grace,
     )
-    server.serve_forever()
+
+    if workers == 1:
+        server.serve_forever()
+        return
+
+    def serve_worker(index: int) -> None:
+        attrs.evolve(server, logger=logger.bind(worker=index)).serve_forever()
+
+    supervisor.Supervisor(logger=logger, workers=workers, target=serve_worker).run()
 
 
 def http_server_args[**P_Args, T_Ret](func: Callable[P_Args, T_Ret]) -> Callable[P_Args, T_Ret]:
@@ -131,6 +205,140 @@ def http_server_args[**P_Args, T_Ret](func: Callable[P_Args, T_Ret]) -> Callable
         is_flag=True,
         help="Print out the logs as human readable",
     )
+    @click.option(
+        "--queued-logging",
+        is_flag=True,
+        help="Render and write logs from a separate thread rather than on the event loop",
+    )
+    @click.option(
+        "--digest-interval-seconds",
+        help="How often to send the digest for channels in digest mode",
+        default=900,
+        type=click.FloatRange(min=1),
+    )
+    @click.option(
+        "--digest-channel",
+        "digest_channels",
+        help="Id of a slack channel that receives periodic digests rather than a message per event",
+        multiple=True,
+    )
+    @click.option(
+        "--slack-transport",
+        help="Whether slack events come through the http route or a socket mode websocket",
+        default=options.SlackTransport.HTTP.value,
+        type=click.Choice([transport.value for transport in options.SlackTransport]),
+    )
+    @click.option(
+        "--slack-app-token",
+        help="The app level token used for socket mode or 'env:NAME_OF_ENV_VAR'",
+        default=None,
+        type=EnvSecret(),
+    )
+    @click.option(
+        "--shared-delivery-dedup",
+        is_flag=True,
+        help="Record github delivery ids in postgres so duplicates are dropped across replicas",
+    )
+    @click.option(
+        "--workers",
+        help="The number of worker processes that share the port",
+        default=1,
+        type=click.IntRange(min=1),
+    )
+    @click.option(
+        "--event-loop",
+        help="The asyncio event loop implementation to use. uvloop needs the uvloop extra",
+        default=options.EventLoop.ASYNCIO.value,
+        type=click.Choice([event_loop.value for event_loop in options.EventLoop]),
+    )
+    @click.option(
+        "--ready-max-event-backlog",
+        help="/readyz fails when more github events than this are waiting or being processed",
+        default=1000,
+        type=click.IntRange(min=1),
+    )
+    @click.option(
+        "--ready-max-pool-usage",
+        help="/readyz fails when more than this fraction of database connections are in use",
+        default=0.9,
+        type=click.FloatRange(min=0, max=1),
+    )
+    @click.option(
+        "--ready-max-loop-lag-seconds",
+        help="/readyz fails when the event loop is running later than this",
+        default=0.5,
+        type=click.FloatRange(min=0),
+    )
+    @click.option(
+        "--slow-event-seconds",
+        help="Log the time taken by each stage of github events that take at least this long",
+        default=5,
+        type=click.FloatRange(min=0),
+    )
+    @click.option(
+        "--otlp-endpoint",
+        help="Send traces of github events to this OpenTelemetry collector url"
+        " using OTLP/HTTP JSON, for example http://localhost:4318/v1/traces",
+        default=None,
+    )
+    @click.option(
+        "--record-deliveries-dir",
+        help="Keep the raw body and headers of github webhooks in compressed files in this folder",
+        default=None,
+        type=click.Path(file_okay=False, path_type=pathlib.Path),
+    )
+    @click.option(
+        "--record-deliveries-max-mib",
+        help="Delete the oldest recorded webhooks when they take up more than this many MiB",
+        default=1024,
+        type=click.IntRange(min=1),
+    )
+    @click.option(
+        "--record-deliveries-max-age-days",
+        help="Delete recorded webhooks after this many days",
+        default=7,
+        type=click.FloatRange(min=0, min_open=True),
+    )
+    @click.option(
+        "--github-token",
+        help="A token for the github API or 'env:NAME_OF_ENV_VAR'."
+        " The state of PRs is fetched from github when they start being tracked if this is set",
+        default=None,
+        type=EnvSecret(),
+    )
+    @click.option(
+        "--github-api-url",
+        help="The url of the github REST API",
+        default="https://api.github.com",
+    )
+    @click.option(
+        "--pr-backfill-concurrency",
+        help="How many PRs to fetch from github at the same time",
+        default=4,
+        type=click.IntRange(min=1),
+    )
+    @click.option(
+        "--github-tenants-file",
+        help="A json file with a list of tenants, each an object with an installation_target_id,"
+        " a secret for its webhooks, optional hook_secrets of hook id to secret and an optional"
+        " weight. Webhooks from other tenants are checked with --github-webhook-secret",
+        default=None,
+        type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    )
+    @click.option(
+        "--max-events-in-progress",
+        help="How many github events to process at the same time,"
+        " with events shared fairly between tenants when there are more waiting",
+        default=32,
+        type=click.IntRange(min=1),
+    )
+    @click.option(
+        "--drain-grace",
+        help="Seconds that /readyz fails for after being asked to stop,"
+        " before the server stops accepting requests and drains outstanding work",
+        default=5,
+        type=click.FloatRange(min=0),
+    )
     @functools.wraps(func)
     def wrapped(*args: P_Args.args, **kwargs: P_Args.kwargs) -> T_Ret:
         return func(*args, **kwargs)
@@ -148,7 +356,34 @@ def serve_http(
     postgres_url: str,
     port: int,
     dev_logging: bool,
+    queued_logging: bool,
+    digest_interval_seconds: float,
+    digest_channels: tuple[str, ...],
+    slack_transport: str,
+    slack_app_token: str | None,
+    shared_delivery_dedup: bool,
+    workers: int,
+    event_loop: str,
+    ready_max_event_backlog: int,
+    ready_max_pool_usage: float,
+    ready_max_loop_lag_seconds: float,
+    slow_event_seconds: float,
+    otlp_endpoint: str | None,
+    record_deliveries_dir: pathlib.Path | None,
+    record_deliveries_max_mib: int,
+    record_deliveries_max_age_days: float,
+    github_token: str | None,
+    github_api_url: str,
+    pr_backfill_concurrency: int,
+    github_tenants_file: pathlib.Path | None,
+    max_events_in_progress: int,
+    drain_grace: float,
 ) -> None:
+    if slack_transport == options.SlackTransport.SOCKET_MODE.value and not slack_app_token:
+        raise click.UsageError("--slack-app-token is required when using socket mode")
+
+    from . import http_server
+
     return start_http_server(
         slack_bot_token=slack_bot_token,
         slack_signing_secret=slack_signing_secret,
@@ -156,13 +391,152 @@ def serve_http(
         postgres_url=postgres_url,
         port=port,
         dev_logging=dev_logging,
+        queued_logging=queued_logging,
+        digest_interval_seconds=digest_interval_seconds,
+        digest_channels=digest_channels,
+        slack_transport=slack_transport,
+        slack_app_token=slack_app_token,
+        shared_delivery_dedup=shared_delivery_dedup,
+        workers=workers,
+        event_loop=event_loop,
+        ready_max_event_backlog=ready_max_event_backlog,
+        ready_max_pool_usage=ready_max_pool_usage,
+        ready_max_loop_lag_seconds=ready_max_loop_lag_seconds,
+        slow_event_seconds=slow_event_seconds,
+        otlp_endpoint=otlp_endpoint,
+        record_deliveries_dir=record_deliveries_dir,
+        record_deliveries_max_mib=record_deliveries_max_mib,
+        record_deliveries_max_age_days=record_deliveries_max_age_days,
+        github_token=github_token,
+        github_api_url=github_api_url,
+        pr_backfill_concurrency=pr_backfill_concurrency,
+        github_tenants_file=github_tenants_file,
+        max_events_in_progress=max_events_in_progress,
+        drain_grace=drain_grace,
         server_kls=http_server.Server,
     )
 
 
+@click.command
+@click.argument(
+    "paths",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, path_type=pathlib.Path),
+)
+@click.option(
+    "--url",
+    help="The github webhook route of the running server",
+    default="http://127.0.0.1:3000/github/webhook",
+)
+@click.option(
+    "--github-webhook-secret",
+    help="The secret the server checks github webhooks with or 'env:NAME_OF_ENV_VAR'",
+    default="env:GITHUB_WEBHOOK_SECRET",
+    type=EnvSecret(),
+)
+@click.option(
+    "--rate",
+    help="Webhooks to send per second. Sends as fast as the concurrency allows by default",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--concurrency",
+    help="The most webhooks to have in flight at once",
+    default=8,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--duration",
+    help="Seconds to send webhooks for",
+    default=10,
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--requests",
+    "total",
+    help="Stop after sending this many webhooks",
+    default=None,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    help="Print the results as json",
+)
+def replay_webhooks(
+    *,
+    paths: tuple[pathlib.Path, ...],
+    url: str,
+    github_webhook_secret: str,
+    rate: float | None,
+    concurrency: int,
+    duration: float,
+    total: int | None,
+    as_json: bool,
+) -> None:
+    """
+    Send recorded github webhooks to a running server in a loop and report
+    the throughput, latency and response statuses.
+
+    Each path is a recorded webhook like those in tests/fixtures/github, a
+    directory of them, or a folder or segment file written by
+    --record-deliveries-dir.
+    """
+    import asyncio
+    import json
+
+    from . import recorded, replay
+
+    webhooks = recorded.from_paths(paths)
+    if not webhooks:
+        raise click.UsageError("No recorded webhooks were found")
+
+    results = asyncio.run(
+        replay.send_webhooks(
+            url,
+            webhooks,
+            secret=github_webhook_secret,
+            concurrency=concurrency,
+            duration=duration,
+            rate=rate,
+            total=total,
+        )
+    )
+
+    if as_json:
+        click.echo(json.dumps(results.as_dict(), indent=2))
+    else:
+        click.echo(results.summary("replay"))
+
+
+@click.command
+@click.argument("directory", type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path))
+@click.argument("delivery")
+def show_delivery(*, directory: pathlib.Path, delivery: str) -> None:
+    """
+    Print a github webhook recorded with --record-deliveries-dir.
+
+    The output is in the same format as the files in tests/fixtures/github,
+    so it can be saved and given to replay-webhooks.
+    """
+    from . import recorded
+    from .handlers import github
+
+    found = github.recorder.DeliveryLog(directory).find(delivery)
+    if found is None:
+        raise click.ClickException(f"No recorded webhook with delivery id {delivery}")
+
+    click.echo(recorded.RecordedWebhook.from_delivery(found).dump(), nl=False)
+
+
 @click.group(help="Interact with slack github tracker")
 def main() -> None:
     pass
 
 
 main.add_command(serve_http)
+main.add_command(replay_webhooks)
+main.add_command(show_delivery)
@@ -0,0 +1,321 @@
+"""
+A client for the github REST API.
+
+Responses are cached with their ``ETag`` and asked for again with
+``If-None-Match``, so a resource that hasn't changed costs a 304 that github
+doesn't count against the rate limit. Identical requests made at the same
+time share one request to github.
+
+Requests wait their turn to stay within the rate limit, and a request that
+github refuses because of a secondary rate limit is made again after the
+``Retry-After`` github gives.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from urllib import parse
+
+import aiohttp
+import attrs
+
+from . import caching, metrics
+from .protocols import Logger
+
+_ACCEPT = "application/vnd.github+json"
+_API_VERSION = "2022-11-28"
+
+
+@attrs.define(kw_only=True)
+class GithubAPIError(Exception):
+    status: int
+    url: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"Github returned {self.status} for {self.url}: {self.message}"
+
+
+@attrs.frozen
+class Response:
+    status: int
+    body: object
+    etag: str | None = None
+
+    # Whether github said the cached response was still current
+    from_cache: bool = False
+
+
+@attrs.define
+class RateLimit:
+    """
+    What github said about the rate limit in its latest response
+    """
+
+    limit: int | None = None
+    remaining: int | None = None
+
+    # Seconds since the epoch when the remaining requests go back up to the limit
+    reset: float = 0
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+
+        if reset > self.reset or self.remaining is None or remaining < self.remaining:
+            self.limit, self.remaining, self.reset = limit, remaining, reset
+
+    def delay(self, *, now: float, reserve: int, in_flight: int = 0) -> float:
+        """
+        Return how long to wait before the next request.
+
+        Nothing waits while more than ``reserve`` requests remain. After that
+        the remaining requests are spread out until the reset, and once none
+        remain everything waits for the reset. Requests that are ``in_flight``
+        aren't counted as remaining.
+        """
+        if self.remaining is None or now >= self.reset:
+            return 0
+        remaining = max(self.remaining - in_flight, 0)
+        if remaining > reserve:
+            return 0
+        return (self.reset - now) / remaining if remaining else self.reset - now
+
+
+@attrs.define
+class GithubClient:
+    """
+    Makes requests to github through one pool of connections.
+
+    The session is made on first use, so the client must be used from one
+    event loop and closed with ``close`` when it's no longer needed.
+    """
+
+    _logger: Logger
+    token: str | None = attrs.field(repr=False)
+    base_url: str = "https://api.github.com"
+    _metrics: metrics.Metrics = attrs.field(factory=metrics.Metrics, kw_only=True)
+
+    max_connections: int = attrs.field(default=10, kw_only=True)
+    timeout_seconds: float = attrs.field(default=30, kw_only=True)
+
+    # Cached responses are kept until they are pushed out by newer responses or expire
+    cache_size: int = attrs.field(default=1000, kw_only=True)
+    cache_ttl_seconds: float = attrs.field(default=24 * 3600, kw_only=True)
+
+    # Requests are spread out once this many or fewer remain before the rate limit resets
+    rate_limit_reserve: int = attrs.field(default=100, kw_only=True)
+
+    # How many times a request refused by a rate limit is made again
+    rate_limited_retries: int = attrs.field(default=2, kw_only=True)
+
+    clock: Callable[[], float] = attrs.field(default=time.time, kw_only=True)
+    sleep: Callable[[float], Awaitable[None]] = attrs.field(default=asyncio.sleep, kw_only=True)
+
+    rate_limit: RateLimit = attrs.field(init=False, factory=RateLimit)
+
+    _session: aiohttp.ClientSession | None = attrs.field(init=False, default=None)
+    _cache: caching.TTLCache[str, Response] = attrs.field(init=False)
+    _in_flight: dict[str, asyncio.Task[Response]] = attrs.field(init=False, factory=dict)
+
+    # Requests take turns waiting for the rate limit so they share its budget,
+    # with requests that github hasn't answered yet taken out of what remains
+    _turns: asyncio.Lock = attrs.field(init=False, factory=asyncio.Lock)
+    _unanswered: int = attrs.field(init=False, default=0)
+    _paused_until: float = attrs.field(init=False, default=0)
+
+    _requests: metrics.Counter = attrs.field(init=False)
+    _coalesced: metrics.Counter = attrs.field(init=False)
+    _throttled: metrics.Counter = attrs.field(init=False)
+
+    @_cache.default
+    def _make_cache(self) -> caching.TTLCache[str, Response]:
+        return caching.TTLCache(maxsize=self.cache_size, ttl=self.cache_ttl_seconds)
+
+    @_requests.default
+    def _make_requests(self) -> metrics.Counter:
+        return self._metrics.counter(
+            "github_api_requests_total", "Requests made to the github API", ("status",)
+        )
+
+    @_coalesced.default
+    def _make_coalesced(self) -> metrics.Counter:
+        return self._metrics.counter(
+            "github_api_coalesced_total",
+            "Requests to the github API answered by an identical request already in flight",
+        )
+
+    @_throttled.default
+    def _make_throttled(self) -> metrics.Counter:
+        return self._metrics.counter(
+            "github_api_throttled_seconds_total",
+            "Time spent waiting to stay within the github API rate limit",
+        )
+
+    def url(self, path: str, params: Mapping[str, str] | None = None) -> str:
+        url = f"{self.base_url.rstrip('/')}/{path.lstrip('/')}"
+        if params:
+            url = f"{url}?{parse.urlencode(sorted(params.items()))}"
+        return url
+
+    async def get(self, path: str, *, params: Mapping[str, str] | None = None) -> Response:
+        url = self.url(path, params)
+
+        task = self._in_flight.get(url)
+        if task is not None:
+            self._coalesced.inc()
+        else:
+            # The request belongs to the client so a caller that is cancelled
+            # doesn't cancel it for everything else waiting on it
+            task = self._in_flight[url] = asyncio.get_running_loop().create_task(self._get(url))
+            task.add_done_callback(lambda done: self._request_done(url, done))
+
+        return await asyncio.shield(task)
+
+    def _request_done(self, url: str, task: asyncio.Task[Response]) -> None:
+        if self._in_flight.get(url) is task:
+            del self._in_flight[url]
+        # Retrieve it so it isn't logged as never retrieved when nothing was waiting
+        if not task.cancelled():
+            task.exception()
+
+    async def pull_request(
+        self, organisation: str, repo: str, pr_number: int
+    ) -> dict[str, object]:
+        path = f"/repos/{organisation}/{repo}/pulls/{pr_number}"
+        response = await self.get(path)
+        if not isinstance(response.body, dict):
+            raise GithubAPIError(
+                status=response.status, url=self.url(path), message="Expected a json object"
+            )
+        return response.body
+
+    async def pull_request_reviews(
+        self, organisation: str, repo: str, pr_number: int
+    ) -> list[dict[str, object]]:
+        """
+        Return the first hundred reviews of the PR, oldest first
+        """
+        path = f"/repos/{organisation}/{repo}/pulls/{pr_number}/reviews"
+        response = await self.get(path, params={"per_page": "100"})
+        if not isinstance(response.body, list):
+            raise GithubAPIError(
+                status=response.status, url=self.url(path), message="Expected a json list"
+            )
+        return [review for review in response.body if isinstance(review, dict)]
+
+    async def close(self) -> None:
+        in_flight = list(self._in_flight.values())
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _make_session(self) -> aiohttp.ClientSession:
+        headers = {"Accept": _ACCEPT, "X-GitHub-Api-Version": _API_VERSION}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return aiohttp.ClientSession(
+            headers=headers,
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+        )
+
+    async def _throttle(self) -> None:
+        """
+        Wait for this request's turn and count it as unanswered, which the
+        caller undoes once github answers
+        """
+        async with self._turns:
+            now = self.clock()
+            delay = max(
+                self.rate_limit.delay(
+                    now=now, reserve=self.rate_limit_reserve, in_flight=self._unanswered
+                ),
+                self._paused_until - now,
+            )
+            if delay > 0:
+                self._logger.info(
+                    "Waiting to stay within the github rate limit",
+                    delay=round(delay, 3),
+                    remaining=self.rate_limit.remaining,
+                )
+                self._throttled.inc(amount=delay)
+                await self.sleep(delay)
+
+            self._unanswered += 1
+
+    def _retry_after(self, headers: Mapping[str, str]) -> float | None:
+        """
+        Return how long github said to wait before trying again, or None when
+        the response wasn't because of a rate limit
+        """
+        if "retry-after" in headers:
+            try:
+                return max(0, float(headers["retry-after"]))
+            except ValueError:
+                return None
+        if headers.get("x-ratelimit-remaining") == "0":
+            return max(0, self.rate_limit.reset - self.clock())
+        return None
+
+    async def _get(self, url: str) -> Response:
+        if self._session is None:
+            self._session = self._make_session()
+
+        cached = self._cache.get(url)
+        headers = {}
+        if cached is not None and cached.etag is not None:
+            headers["If-None-Match"] = cached.etag
+
+        retries = self.rate_limited_retries
+        while True:
+            await self._throttle()
+
+            try:
+                async with self._session.get(url, headers=headers) as response:
+                    self.rate_limit.update(response.headers)
+                    self._requests.inc(str(response.status))
+
+                    if response.status == 304 and cached is not None:
+                        # Setting it again means it doesn't expire while github says it's current
+                        self._cache.set(url, cached)
+                        return attrs.evolve(cached, from_cache=True)
+
+                    if response.status in (403, 429) and retries > 0:
+                        retry_after = self._retry_after(response.headers)
+                        if retry_after is not None:
+                            # Every request waits, not just this one
+                            retries -= 1
+                            self._paused_until = max(
+                                self._paused_until, self.clock() + retry_after
+                            )
+                            self._logger.warning(
+                                "Github rate limited a request", url=url, retry_after=retry_after
+                            )
+                            continue
+
+                    if response.status >= 400:
+                        raise GithubAPIError(
+                            status=response.status, url=url, message=(await response.text())[:200]
+                        )
+
+                    found = Response(
+                        status=response.status,
+                        body=await response.json(),
+                        etag=response.headers.get("ETag"),
+                    )
+                    break
+            finally:
+                self._unanswered -= 1
+
+        if found.etag is not None:
+            self._cache.set(url, found)
+        return found
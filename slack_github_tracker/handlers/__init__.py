@@ -1,3 +1,3 @@
-from . import background, github, server, slack
+from . import background, digest, github, server, slack
 
-__all__ = ["server", "slack", "github", "background"]
+__all__ = ["server", "slack", "github", "background", "digest"]
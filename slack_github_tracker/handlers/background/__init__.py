@@ -1,4 +1,5 @@
 from . import _protocols as protocols
+from . import _scheduler as scheduler
 from . import _tasks as tasks
 
-__all__ = ["tasks", "protocols"]
+__all__ = ["tasks", "protocols", "scheduler"]
@@ -10,3 +10,10 @@ class TaskAdder(Protocol):
 
 class TasksAdder(Protocol):
     def append(self, task_adder: TaskAdder) -> None: ...
+
+
+class Schedule(Protocol):
+    def next_after(self, moment: float, /) -> float:
+        """
+        Return the unix time of the first run after ``moment``
+        """
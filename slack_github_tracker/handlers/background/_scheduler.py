@@ -0,0 +1,311 @@
+import asyncio
+import datetime
+import heapq
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from typing import TYPE_CHECKING, cast
+
+import attrs
+from machinery import helpers as hp
+
+from slack_github_tracker import metrics
+from slack_github_tracker.protocols import Logger
+
+from . import _protocols as protocols
+
+
+@attrs.frozen
+class Interval:
+    """
+    Run every ``seconds`` seconds
+    """
+
+    seconds: float
+
+    def next_after(self, moment: float, /) -> float:
+        return moment + self.seconds
+
+
+def _parse_field(field: str, *, minimum: int, maximum: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+            if step < 1:
+                raise ValueError(f"Step must be at least 1: {field}")
+
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start_str, end_str = part.split("-", 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = int(part)
+            end = maximum if step > 1 else start
+
+        if start < minimum or end > maximum or start > end:
+            raise ValueError(f"Field out of range {minimum}-{maximum}: {field}")
+
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@attrs.frozen
+class Cron:
+    """
+    Run at the times matched by a five field cron expression in UTC.
+
+    The fields are minute, hour, day of month, month and day of week where
+    Sunday is 0 or 7. Each field can be ``*``, a number, a range like ``1-5``,
+    a step like ``*/15`` or ``10-50/20``, or a comma separated list of these.
+    Like cron, when both day fields are restricted a day matching either is
+    used.
+    """
+
+    expression: str
+
+    _minutes: frozenset[int] = attrs.field(init=False)
+    _hours: frozenset[int] = attrs.field(init=False)
+    _days: frozenset[int] = attrs.field(init=False)
+    _months: frozenset[int] = attrs.field(init=False)
+    _weekdays: frozenset[int] = attrs.field(init=False)
+    _any_day: bool = attrs.field(init=False)
+    _any_weekday: bool = attrs.field(init=False)
+
+    def __attrs_post_init__(self) -> None:
+        fields = self.expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected five fields in cron expression: {self.expression}")
+        minute, hour, day, month, weekday = fields
+
+        weekdays = _parse_field(weekday, minimum=0, maximum=7)
+        # 7 is another way of saying Sunday
+        weekdays = frozenset(0 if value == 7 else value for value in weekdays)
+
+        object.__setattr__(self, "_minutes", _parse_field(minute, minimum=0, maximum=59))
+        object.__setattr__(self, "_hours", _parse_field(hour, minimum=0, maximum=23))
+        object.__setattr__(self, "_days", _parse_field(day, minimum=1, maximum=31))
+        object.__setattr__(self, "_months", _parse_field(month, minimum=1, maximum=12))
+        object.__setattr__(self, "_weekdays", weekdays)
+        object.__setattr__(self, "_any_day", day == "*")
+        object.__setattr__(self, "_any_weekday", weekday == "*")
+
+    def _day_matches(self, when: datetime.datetime) -> bool:
+        day = when.day in self._days
+        # datetime counts from Monday and cron counts from Sunday
+        weekday = (when.weekday() + 1) % 7 in self._weekdays
+        if self._any_day:
+            return weekday
+        if self._any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, moment: float, /) -> float:
+        when = datetime.datetime.fromtimestamp(moment, datetime.UTC).replace(
+            second=0, microsecond=0
+        ) + datetime.timedelta(minutes=1)
+
+        # Every expression that can match will match within a few years
+        limit = when + datetime.timedelta(days=366 * 5)
+        while when < limit:
+            if when.month not in self._months:
+                year, month = divmod(when.month, 12)
+                when = when.replace(
+                    year=when.year + year, month=month + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(when):
+                when = when.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif when.hour not in self._hours:
+                when = when.replace(minute=0) + datetime.timedelta(hours=1)
+            elif when.minute not in self._minutes:
+                when += datetime.timedelta(minutes=1)
+            else:
+                return when.timestamp()
+
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+
+@attrs.frozen
+class Job:
+    name: str
+    schedule: protocols.Schedule
+    run: Callable[[], Awaitable[None]]
+
+    # Each run is delayed by a random amount up to this many seconds
+    jitter: float = 0
+
+    # Whether to run as soon as the job is added rather than after the first interval
+    run_at_start: bool = False
+
+
+@attrs.define
+class JobStats:
+    runs: int = 0
+    failures: int = 0
+
+    # Runs that were due while the previous run was still going
+    skipped: int = 0
+
+    last_duration: float = 0
+
+    # Seconds between when a run was due and when it started
+    last_lateness: float = 0
+    max_lateness: float = 0
+
+
+@attrs.define(eq=False)
+class _JobState:
+    job: Job
+    stats: JobStats = attrs.field(factory=JobStats)
+
+    # When the next run is due, before jitter is added
+    scheduled: float = 0
+    running: asyncio.Task[None] | None = None
+
+
+@attrs.define
+class Scheduler:
+    """
+    Runs jobs on a schedule from a single background task.
+
+    The next run of every job is kept in one heap and the task sleeps until
+    the earliest one is due. A run that is due while the previous run of the
+    same job is still going is skipped. Runs that were missed because the
+    process was busy are not caught up, the job runs once and is then
+    scheduled after the current time.
+
+    The scheduler is a ``background.protocols.TaskAdder`` so it is started by
+    appending it to the background tasks, and it stops when the final future
+    of the background tasks is done.
+    """
+
+    _logger: Logger
+    _metrics: metrics.Metrics = attrs.field(factory=metrics.Metrics)
+    clock: Callable[[], float] = time.time
+    random: Callable[[], float] = random.random
+
+    _jobs: dict[str, _JobState] = attrs.field(init=False, factory=dict)
+    _heap: list[tuple[float, int, _JobState]] = attrs.field(init=False, factory=list)
+    _counter: int = attrs.field(init=False, default=0)
+    _wake: asyncio.Future[None] | None = attrs.field(init=False, default=None)
+
+    _duration: metrics.Histogram = attrs.field(init=False)
+    _lateness: metrics.Histogram = attrs.field(init=False)
+    _skipped: metrics.Counter = attrs.field(init=False)
+
+    @_duration.default
+    def _make_duration(self) -> metrics.Histogram:
+        return self._metrics.histogram(
+            "scheduled_job_duration_seconds", "Time taken by each run of a job", ("job",)
+        )
+
+    @_lateness.default
+    def _make_lateness(self) -> metrics.Histogram:
+        return self._metrics.histogram(
+            "scheduled_job_lateness_seconds",
+            "Time between when a job was due and when it started",
+            ("job",),
+        )
+
+    @_skipped.default
+    def _make_skipped(self) -> metrics.Counter:
+        return self._metrics.counter(
+            "scheduled_job_skipped_total",
+            "Runs skipped because the previous run was still going",
+            ("job",),
+        )
+
+    def __iter__(self) -> Iterator[Job]:
+        for state in self._jobs.values():
+            yield state.job
+
+    def stats(self, name: str) -> JobStats:
+        return self._jobs[name].stats
+
+    def add(self, job: Job) -> None:
+        if job.name in self._jobs:
+            raise ValueError(f"A job called {job.name} was already added")
+
+        state = self._jobs[job.name] = _JobState(job=job)
+        now = self.clock()
+        state.scheduled = now if job.run_at_start else job.schedule.next_after(now)
+        self._push(state)
+
+    def _push(self, state: _JobState) -> None:
+        due = state.scheduled + self.random() * state.job.jitter
+        self._counter += 1
+        heapq.heappush(self._heap, (due, self._counter, state))
+        if self._wake is not None and not self._wake.done():
+            self._wake.set_result(None)
+
+    def __call__(self, final_future: asyncio.Future[None], task_holder: hp.TaskHolder) -> None:
+        task_holder.add(self.run(final_future=final_future, task_holder=task_holder))
+
+    async def run(self, *, final_future: asyncio.Future[None], task_holder: hp.TaskHolder) -> None:
+        try:
+            while not final_future.done():
+                now = self.clock()
+                while self._heap and self._heap[0][0] <= now:
+                    due, _, state = heapq.heappop(self._heap)
+                    self._start(state, due=due, task_holder=task_holder)
+                    self._reschedule(state, now=now)
+
+                # Adding a job wakes us up in case it is due before the earliest job
+                wake = self._wake = hp.create_future(name="Scheduler::run[wake]")
+                timeout = None if not self._heap else max(0, self._heap[0][0] - self.clock())
+                try:
+                    await asyncio.wait(
+                        [final_future, wake], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    wake.cancel()
+        finally:
+            self._wake = None
+
+    def _reschedule(self, state: _JobState, *, now: float) -> None:
+        scheduled = state.job.schedule.next_after(state.scheduled)
+        while scheduled <= now:
+            scheduled = state.job.schedule.next_after(scheduled)
+        state.scheduled = scheduled
+        self._push(state)
+
+    def _start(self, state: _JobState, *, due: float, task_holder: hp.TaskHolder) -> None:
+        name = state.job.name
+        if state.running is not None and not state.running.done():
+            state.stats.skipped += 1
+            self._skipped.inc(name)
+            self._logger.warning("Skipping job that is still running", job=name)
+            return
+
+        state.running = task_holder.add(self._run(state, due=due))
+
+    async def _run(self, state: _JobState, *, due: float) -> None:
+        name = state.job.name
+        stats = state.stats
+
+        lateness = max(0, self.clock() - due)
+        stats.last_lateness = lateness
+        stats.max_lateness = max(stats.max_lateness, lateness)
+        self._lateness.observe(lateness, name)
+
+        start = time.perf_counter()
+        try:
+            await state.job.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            stats.failures += 1
+            self._logger.exception("Job failed", job=name)
+        finally:
+            stats.runs += 1
+            stats.last_duration = time.perf_counter() - start
+            self._duration.observe(stats.last_duration, name)
+
+
+if TYPE_CHECKING:
+    _I: protocols.Schedule = cast(Interval, None)
+    _C: protocols.Schedule = cast(Cron, None)
+    _S: protocols.TaskAdder = cast(Scheduler, None)
@@ -0,0 +1,4 @@
+from . import _protocols as protocols
+from . import _scheduler as scheduler
+
+__all__ = ["scheduler", "protocols"]
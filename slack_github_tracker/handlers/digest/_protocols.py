@@ -0,0 +1,21 @@
+from typing import Protocol
+
+from slack_github_tracker import storage
+
+
+class Change(Protocol):
+    @property
+    def pr(self) -> storage.protocols.PR:
+        """The pull request this change is for"""
+
+    @property
+    def description(self) -> str:
+        """A short human readable description of what changed"""
+
+
+class MessageSender(Protocol):
+    async def chat_postMessage(self, *, channel: str, text: str) -> object: ...
+
+
+class Deliverer(Protocol):
+    async def deliver(self, *, channel_id: str, change: Change, sender: MessageSender) -> None: ...
@@ -0,0 +1,110 @@
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, cast
+
+import attrs
+
+from slack_github_tracker import storage, tracing
+from slack_github_tracker.protocols import Logger
+
+from .. import background, slack
+from . import _protocols as protocols
+
+
+@attrs.frozen
+class Change:
+    pr: storage.protocols.PR
+    description: str
+
+
+@attrs.define
+class DigestScheduler:
+    """
+    Used to deliver changes to tracked PRs into Slack channels.
+
+    Channels in ``channels`` are in digest mode. Changes for those channels are
+    accumulated in memory and sent as a single message per channel every
+    ``interval`` seconds by the scheduled job made from ``job``.
+
+    Changes for any other channel are sent straight away.
+    """
+
+    _logger: Logger
+
+    # How many seconds between each flush of the accumulated changes
+    interval: float
+
+    # The channels that receive digests rather than a message per change
+    channels: frozenset[str] = frozenset()
+
+    _pending: dict[str, list[protocols.Change]] = attrs.field(init=False, factory=dict)
+
+    @property
+    def pending(self) -> int:
+        return sum(len(changes) for changes in self._pending.values())
+
+    def add(self, channel_id: str, change: protocols.Change, /) -> None:
+        self._pending.setdefault(channel_id, []).append(change)
+
+    async def deliver(
+        self, *, channel_id: str, change: protocols.Change, sender: protocols.MessageSender
+    ) -> None:
+        if channel_id in self.channels:
+            self.add(channel_id, change)
+        else:
+            with tracing.span("slack.chat_postMessage"):
+                await sender.chat_postMessage(channel=channel_id, text=self.render([change]))
+
+    def render(self, changes: Sequence[protocols.Change]) -> str:
+        by_pr: dict[tuple[str, str, int], list[protocols.Change]] = {}
+        for change in changes:
+            key = (change.pr.organisation, change.pr.repo, change.pr.pr_number)
+            by_pr.setdefault(key, []).append(change)
+
+        if len(changes) == 1:
+            (change,) = changes
+            return f"{slack.tracking.display(change.pr)}: {change.description}"
+
+        lines = ["Changes to tracked PRs since the last digest:"]
+        for pr_changes in by_pr.values():
+            descriptions = ", ".join(change.description for change in pr_changes)
+            lines.append(f"• {slack.tracking.display(pr_changes[0].pr)}: {descriptions}")
+        return "\n".join(lines)
+
+    async def flush(self, sender: protocols.MessageSender) -> None:
+        pending, self._pending = self._pending, {}
+
+        for channel_id, changes in pending.items():
+            try:
+                await sender.chat_postMessage(channel=channel_id, text=self.render(changes))
+            except Exception:
+                self._logger.exception(
+                    "Failed to send digest", channel_id=channel_id, dropped=len(changes)
+                )
+
+    def abandon(self) -> None:
+        """
+        Log the digests that will not be sent because the server is stopping
+        """
+        pending, self._pending = self._pending, {}
+        for channel_id, changes in pending.items():
+            self._logger.error(
+                "Abandoning digest", channel_id=channel_id, digest=self.render(changes)
+            )
+
+    def job(self, sender: protocols.MessageSender) -> background.scheduler.Job:
+        """
+        Return the job that sends the accumulated changes every ``interval`` seconds
+        """
+
+        async def flush() -> None:
+            if self._pending:
+                await self.flush(sender)
+
+        return background.scheduler.Job(
+            name="digest", schedule=background.scheduler.Interval(self.interval), run=flush
+        )
+
+
+if TYPE_CHECKING:
+    _C: protocols.Change = cast(Change, None)
+    _D: protocols.Deliverer = cast(DigestScheduler, None)
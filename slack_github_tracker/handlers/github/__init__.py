@@ -1,7 +1,27 @@
+from . import _backfill as backfill
+from . import _deliveries as deliveries
 from . import _errors as errors
+from . import _event as event
 from . import _handler as handler
 from . import _hooks as hooks
 from . import _interpret as interpret
 from . import _protocols as protocols
+from . import _recorder as recorder
+from . import _reviews as reviews
+from . import _tenants as tenants
+from . import _versions as versions
 
-__all__ = ["protocols", "hooks", "interpret", "errors", "handler"]
+__all__ = [
+    "protocols",
+    "hooks",
+    "interpret",
+    "errors",
+    "event",
+    "handler",
+    "deliveries",
+    "reviews",
+    "versions",
+    "recorder",
+    "backfill",
+    "tenants",
+]
@@ -0,0 +1,161 @@
+import asyncio
+from typing import TYPE_CHECKING, cast
+
+import attrs
+from machinery import helpers as hp
+
+from slack_github_tracker import metrics, storage
+from slack_github_tracker.protocols import Logger
+
+from .. import background
+from . import _protocols as protocols
+from . import _reviews as reviews
+from ._interpret import payloads
+
+
+@attrs.define
+class Backfill:
+    """
+    Fetches the current state and reviews of PRs from github when they start
+    being tracked, so a quiet PR isn't unknown until its next webhook.
+
+    ``request`` only queues the PR. At most ``max_concurrent`` PRs are
+    fetched at a time, and a PR that is already queued or being fetched
+    isn't queued again, so many ``/track_pr`` commands at once can't use up
+    the github rate limit or the database pool.
+
+    What is fetched goes through the same ``PRVersions`` and ``Reviews`` as
+    webhooks, so whichever of them has the later change wins.
+    """
+
+    _logger: Logger
+    _github: protocols.GithubAPI
+    _storage: storage.protocols.Storage
+    _versions: protocols.Versions
+    _reviews: reviews.Reviews
+    _metrics: metrics.Metrics = attrs.field(factory=metrics.Metrics, kw_only=True)
+    max_concurrent: int = attrs.field(default=4, kw_only=True)
+
+    _queue: list[storage.protocols.PR] | hp.Queue = attrs.field(init=False, factory=list)
+    _requested: set[tuple[str, str, int]] = attrs.field(init=False, factory=set)
+    _slots: asyncio.Semaphore = attrs.field(init=False)
+    _backfills: metrics.Counter = attrs.field(init=False)
+
+    @_slots.default
+    def _make_slots(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.max_concurrent)
+
+    @_backfills.default
+    def _make_backfills(self) -> metrics.Counter:
+        self._metrics.callback(
+            "github_pr_backfill_backlog",
+            "PRs waiting for or in the middle of a backfill from github",
+            metrics.Kind.GAUGE,
+            lambda: self.backlog,
+        )
+        return self._metrics.counter(
+            "github_pr_backfills_total",
+            "Requests to backfill the state of a PR from github",
+            ("outcome",),
+        )
+
+    @property
+    def backlog(self) -> int:
+        return len(self._requested)
+
+    def request(self, pr: storage.protocols.PR, /) -> None:
+        key = storage.requests.pr_key(pr)
+        if key in self._requested:
+            self._backfills.inc("deduplicated")
+            return
+
+        self._requested.add(key)
+        self._queue.append(pr)
+
+    def __call__(self, final_future: asyncio.Future[None], task_holder: hp.TaskHolder) -> None:
+        task_holder.add(self.run(final_future=final_future, task_holder=task_holder))
+
+    async def run(self, *, final_future: asyncio.Future[None], task_holder: hp.TaskHolder) -> None:
+        queue = hp.Queue(final_future, name="Backfill::run[queue]")
+        queued, self._queue = self._queue, queue
+        for pr in queued:
+            queue.append(pr)
+
+        async for pr in queue:
+            await self._slots.acquire()
+            task = asyncio.get_running_loop().create_task(self._backfill_in_slot(pr))
+            task.add_done_callback(hp.reporter)
+            task_holder.add_task(task)
+
+    async def _backfill_in_slot(self, pr: storage.protocols.PR) -> None:
+        try:
+            await self.backfill(pr)
+        except Exception:
+            self._backfills.inc("failed")
+            self._logger.exception(
+                "Failed to backfill PR from github",
+                organisation=pr.organisation,
+                repo=pr.repo,
+                pr_number=pr.pr_number,
+            )
+        else:
+            self._backfills.inc("backfilled")
+        finally:
+            self._requested.discard(storage.requests.pr_key(pr))
+            self._slots.release()
+
+    async def backfill(self, pr: storage.protocols.PR) -> None:
+        found = await self._github.pull_request(pr.organisation, pr.repo, pr.pr_number)
+        pull_request = payloads.converter.structure(found, payloads.PullRequest)
+        if self._versions.advance(pr, pull_request.updated_at):
+            await self._storage.store_pr_version(
+                storage.requests.PRVersion(pr=pr, updated_at=pull_request.updated_at)
+            )
+
+        summary = await self._reviews.summary(pr, self._storage)
+        for found_review in await self._github.pull_request_reviews(
+            pr.organisation, pr.repo, pr.pr_number
+        ):
+            # Pending reviews haven't been submitted and have no submitted_at, and
+            # reviews by deleted accounts have no user
+            if found_review.get("submitted_at") is None or found_review.get("user") is None:
+                continue
+
+            try:
+                review = payloads.converter.structure(found_review, payloads.Review)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                self._logger.exception(
+                    "Failed to read review from github",
+                    organisation=pr.organisation,
+                    repo=pr.repo,
+                    pr_number=pr.pr_number,
+                    review_id=found_review.get("id"),
+                )
+                continue
+
+            try:
+                state = reviews.ReviewState(review.state.lower())
+            except ValueError:
+                continue
+
+            previous = summary.reviewers.get(review.user.login)
+            current = summary.apply(
+                review.user.login, state, review_id=review.id, submitted_at=review.submitted_at
+            )
+            if current is None or current == previous:
+                continue
+
+            await self._storage.store_review(
+                storage.requests.Review(
+                    pr=pr,
+                    reviewer=review.user.login,
+                    state=current.state,
+                    review_id=current.review_id,
+                    submitted_at=current.submitted_at,
+                )
+            )
+
+
+if TYPE_CHECKING:
+    _B: protocols.Backfill = cast(Backfill, None)
+    _T: background.protocols.TaskAdder = cast(Backfill, None)
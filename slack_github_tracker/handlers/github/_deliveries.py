@@ -0,0 +1,157 @@
+import asyncio
+import collections
+import datetime
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Protocol, cast
+
+import attrs
+
+from slack_github_tracker import caching
+from slack_github_tracker.protocols import Logger
+
+from .. import background
+from . import _protocols as protocols
+
+# Github lets people redeliver webhooks from the last three days
+_REDELIVERY_WINDOW = datetime.timedelta(days=3)
+
+
+def _default_seen() -> caching.TTLCache[str, bool]:
+    return caching.TTLCache(maxsize=100_000, ttl=_REDELIVERY_WINDOW.total_seconds())
+
+
+class _DeliveryStorage(Protocol):
+    async def has_delivery(self, delivery_id: str, /) -> bool: ...
+
+    async def store_deliveries(self, delivery_ids: Sequence[str], /) -> None: ...
+
+    async def prune_deliveries(self, *, older_than: datetime.datetime) -> int: ...
+
+
+@attrs.define
+class Deliveries:
+    """
+    Used to drop webhooks from github that have the same ``x-github-delivery``
+    as a webhook that was already received.
+
+    Delivery ids are remembered in memory. Sharing them between replicas is
+    opt-in: when ``storage`` is provided each webhook is also looked for in
+    the database, giving up after ``lookup_timeout`` seconds, and delivery
+    ids are written to it. Writes are batched and made by the scheduled jobs
+    from ``jobs``, so a redelivery that reaches another replica before the
+    next flush isn't recognised. Those jobs also prune delivery ids that are
+    too old to be redelivered.
+
+    At most ``max_unstored`` delivery ids wait to be written, and the oldest
+    are dropped when the database can't keep up.
+    """
+
+    _logger: Logger
+    _storage: _DeliveryStorage | None = None
+    _seen: caching.TTLCache[str, bool] = attrs.field(factory=_default_seen)
+    lookup_timeout: float = attrs.field(default=0.5, kw_only=True)
+    max_unstored: int = attrs.field(default=10_000, kw_only=True)
+
+    # The number of deliveries that were dropped for being duplicates
+    duplicates: int = attrs.field(init=False, default=0)
+
+    # The number of delivery ids that were never written to the database
+    dropped: int = attrs.field(init=False, default=0)
+
+    _unstored: collections.OrderedDict[str, None] = attrs.field(
+        init=False, factory=collections.OrderedDict
+    )
+
+    @property
+    def unstored(self) -> int:
+        return len(self._unstored)
+
+    async def is_duplicate(self, delivery: str, /) -> bool:
+        if delivery in self._seen:
+            self.duplicates += 1
+            return True
+
+        self._seen.set(delivery, True)
+        if self._storage is None:
+            return False
+
+        try:
+            async with asyncio.timeout(self.lookup_timeout):
+                found = await self._storage.has_delivery(delivery)
+        except Exception:
+            self._logger.exception("Failed to look for delivery in the database")
+            found = False
+
+        if found:
+            self.duplicates += 1
+            return True
+
+        self._unstored[delivery] = None
+        self._drop_oldest()
+        return False
+
+    def forget(self, delivery: str, /) -> None:
+        """
+        Used when a delivery failed to be processed so that a redelivery of it
+        is not dropped.
+        """
+        self._seen.pop(delivery)
+        self._unstored.pop(delivery, None)
+
+    async def flush(self) -> None:
+        if self._storage is None or not self._unstored:
+            return
+
+        unstored, self._unstored = self._unstored, collections.OrderedDict()
+        try:
+            await self._storage.store_deliveries(list(unstored))
+        except Exception:
+            self._logger.exception("Failed to store deliveries", count=len(unstored))
+            # Tried again at the next flush, before those that came in since
+            unstored.update(self._unstored)
+            self._unstored = unstored
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        while len(self._unstored) > self.max_unstored:
+            self._unstored.popitem(last=False)
+            self.dropped += 1
+
+    async def prune(self) -> None:
+        if self._storage is None:
+            return
+
+        try:
+            pruned = await self._storage.prune_deliveries(
+                older_than=datetime.datetime.utcnow() - _REDELIVERY_WINDOW
+            )
+        except Exception:
+            self._logger.exception("Failed to prune deliveries")
+        else:
+            self._logger.info("Pruned stored deliveries", pruned=pruned)
+
+    def jobs(
+        self, *, flush_every: float = 2, prune_every: float = 3600
+    ) -> list[background.scheduler.Job]:
+        """
+        Return the jobs that write and prune delivery ids in the database
+        """
+        if self._storage is None:
+            return []
+
+        return [
+            background.scheduler.Job(
+                name="github_deliveries_flush",
+                schedule=background.scheduler.Interval(flush_every),
+                run=self.flush,
+            ),
+            background.scheduler.Job(
+                name="github_deliveries_prune",
+                schedule=background.scheduler.Interval(prune_every),
+                run=self.prune,
+            ),
+        ]
+
+
+if TYPE_CHECKING:
+    _D: protocols.Deliveries = cast(Deliveries, None)
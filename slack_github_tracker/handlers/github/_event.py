@@ -1,9 +1,204 @@
+import datetime
+import sys
+from typing import TYPE_CHECKING, ClassVar, cast
+
 import attrs
 
+from slack_github_tracker import storage
+
+from .. import digest
 from . import _protocols as protocols
+from . import _reviews as reviews
 
 
 @attrs.frozen
 class EmptyEvent:
     async def process(self, info: protocols.EventProcessInfo, /) -> None:
         pass
+
+
+@attrs.frozen
+class PullRequest:
+    organisation: str = attrs.field(converter=sys.intern)
+    repo: str = attrs.field(converter=sys.intern)
+    pr_number: int
+
+
+@attrs.frozen
+class PullRequestEvent:
+    """
+    Base for events about a change to a pull request.
+
+    Events wait in a queue until they are processed, so each one holds only
+    the few fields from the webhook that it needs rather than the body.
+    """
+
+    pr: PullRequest
+
+    # The login of whoever made the change
+    sender: str = attrs.field(converter=sys.intern)
+
+    action: ClassVar[str]
+
+    @property
+    def description(self) -> str:
+        return f"{self.action} by {self.sender}"
+
+    async def process(self, info: protocols.EventProcessInfo, /) -> None:
+        await self.deliver(info, self.description)
+
+    async def deliver(self, info: protocols.EventProcessInfo, description: str) -> None:
+        change = digest.scheduler.Change(pr=self.pr, description=description)
+        for channel_id in await info.storage.tracking_channels(self.pr):
+            await info.digest.deliver(
+                channel_id=channel_id, change=change, sender=info.slack_app.client
+            )
+
+
+@attrs.frozen
+class PullRequestStateEvent(PullRequestEvent):
+    """
+    Base for events that change the state of the PR itself.
+
+    Github doesn't deliver webhooks in order, so an event is ignored when a
+    change from later than the PR's ``updated_at`` has already been applied.
+    Other processes apply changes too, so storage decides, and the versions
+    in memory only save asking storage about events that are already too old.
+    """
+
+    updated_at: datetime.datetime
+
+    async def process(self, info: protocols.EventProcessInfo, /) -> None:
+        version = storage.requests.PRVersion(pr=self.pr, updated_at=self.updated_at)
+        applied = info.versions.advance(self.pr, self.updated_at)
+        if applied:
+            # Another process may have stored a later change
+            applied = await info.storage.store_pr_version(version)
+
+        if not applied:
+            info.logger.info(
+                "Ignoring github event older than the last applied change",
+                github_event=type(self).__name__,
+                updated_at=self.updated_at.isoformat(),
+            )
+            return
+
+        await super().process(info)
+
+
+@attrs.frozen
+class PullRequestOpened(PullRequestStateEvent):
+    title: str
+    action = "opened"
+
+    @property
+    def description(self) -> str:
+        return f"opened by {self.sender}: {self.title}"
+
+
+@attrs.frozen
+class PullRequestClosed(PullRequestStateEvent):
+    action = "closed"
+
+
+@attrs.frozen
+class PullRequestMerged(PullRequestStateEvent):
+    action = "merged"
+
+
+@attrs.frozen
+class PullRequestReopened(PullRequestStateEvent):
+    action = "reopened"
+
+
+@attrs.frozen
+class PullRequestReadyForReview(PullRequestStateEvent):
+    action = "marked ready for review"
+
+
+@attrs.frozen
+class PullRequestConvertedToDraft(PullRequestStateEvent):
+    action = "converted to draft"
+
+
+@attrs.frozen
+class PullRequestSynchronized(PullRequestStateEvent):
+    # The commit the branch pointed at before and after the push
+    before: str
+    after: str
+
+    action = "updated"
+
+    @property
+    def description(self) -> str:
+        return f"updated by {self.sender} to {self.after[:7]}"
+
+
+@attrs.frozen
+class PullRequestReviewEvent(PullRequestEvent):
+    """
+    Base for events that change the state of a review.
+
+    The review summary of the PR is updated when the event is processed and
+    the reviewer's new state is stored.
+    """
+
+    reviewer: str = attrs.field(converter=sys.intern)
+    state: reviews.ReviewState
+    review_id: int
+    submitted_at: datetime.datetime
+
+    _reviews: reviews.Reviews = attrs.field(eq=False, repr=False)
+
+    async def process(self, info: protocols.EventProcessInfo, /) -> None:
+        summary = await self._reviews.summary(self.pr, info.storage)
+        current = summary.apply(
+            self.reviewer, self.state, review_id=self.review_id, submitted_at=self.submitted_at
+        )
+        if current is None:
+            info.logger.info(
+                "Ignoring review older than the one already recorded",
+                reviewer=self.reviewer,
+                review_id=self.review_id,
+            )
+            return
+
+        await info.storage.store_review(
+            storage.requests.Review(
+                pr=self.pr,
+                reviewer=self.reviewer,
+                state=current.state,
+                review_id=current.review_id,
+                submitted_at=current.submitted_at,
+            )
+        )
+        await self.deliver(info, f"{self.description}: {summary.describe()}")
+
+
+@attrs.frozen
+class PullRequestReviewSubmitted(PullRequestReviewEvent):
+    action = "reviewed"
+
+    @property
+    def description(self) -> str:
+        match self.state:
+            case reviews.ReviewState.APPROVED:
+                return f"approved by {self.reviewer}"
+            case reviews.ReviewState.CHANGES_REQUESTED:
+                return f"changes requested by {self.reviewer}"
+            case _:
+                return f"reviewed by {self.reviewer}"
+
+
+@attrs.frozen
+class PullRequestReviewDismissed(PullRequestReviewEvent):
+    action = "dismissed"
+
+    @property
+    def description(self) -> str:
+        return f"review from {self.reviewer} dismissed by {self.sender}"
+
+
+if TYPE_CHECKING:
+    _PR: storage.protocols.PR = cast(PullRequest, None)
+    _E: protocols.Event = cast(PullRequestEvent, None)
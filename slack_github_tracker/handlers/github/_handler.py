@@ -1,4 +1,9 @@
 import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from collections.abc import Iterator, Mapping
 from typing import TYPE_CHECKING, cast
 
 import attrs
@@ -6,44 +11,217 @@ import slack_bolt
 import sqlalchemy
 from machinery import helpers as hp
 
+from slack_github_tracker import metrics, storage, tracing
 from slack_github_tracker.protocols import Logger
 
-from .. import background
+from .. import background, digest
 from . import _protocols as protocols
+from . import _versions as versions
+
+
+@attrs.frozen
+class _Queued:
+    event: protocols.Event
+
+    # The context the event was added from, which the event is processed in
+    context: contextvars.Context
+
+    enqueued_ns: int
+
+    tenant: str
 
 
 @attrs.define
 class _EventAppend:
-    _events: list[protocols.Event] | hp.Queue = attrs.field(factory=list)
+    """
+    Queues events with weighted fair queueing between tenants.
+
+    Each event is given a finish tag of the tenant's previous finish tag, or
+    the finish tag of the event last taken off the queue if that is later,
+    plus one over the tenant's weight. Events are taken in order of their
+    finish tags, so a tenant that sends a burst of events waits behind its
+    own backlog rather than making every other tenant wait behind it.
+    """
+
+    _weights: Mapping[str, float] = attrs.field(factory=dict)
+    _metrics: metrics.Metrics = attrs.field(factory=metrics.Metrics)
+
+    _queue: list[tuple[float, int, _Queued]] = attrs.field(init=False, factory=list)
+    _finish_tags: dict[str, float] = attrs.field(init=False, factory=dict)
+    _backlogs: dict[str, int] = attrs.field(init=False, factory=dict)
+    _virtual_time: float = attrs.field(init=False, default=0)
+    _order: Iterator[int] = attrs.field(init=False, factory=itertools.count)
+    _appended: asyncio.Future[None] | None = attrs.field(init=False, default=None)
 
-    def __call__(self, event: protocols.Event) -> None:
-        self._events.append(event)
+    _tenant_backlog: metrics.Gauge = attrs.field(init=False)
+    _tenant_wait: metrics.Histogram = attrs.field(init=False)
 
-    def _change_to_queue(self, final_future: asyncio.Future[None]) -> hp.Queue:
-        queue = hp.Queue(final_future, name="_EventAppend::run[queue]")
+    @_tenant_backlog.default
+    def _make_tenant_backlog(self) -> metrics.Gauge:
+        return self._metrics.gauge(
+            "github_event_tenant_backlog",
+            "Github events from each tenant waiting to be processed",
+            ("tenant",),
+        )
 
-        events = self._events
-        self._events = queue
+    @_tenant_wait.default
+    def _make_tenant_wait(self) -> metrics.Histogram:
+        return self._metrics.histogram(
+            "github_event_tenant_queue_wait_seconds",
+            "Time github events from each tenant waited before being processed",
+            ("tenant",),
+        )
 
-        for event in events:
-            queue.append(event)
+    def __call__(self, event: protocols.Event, /, *, tenant: str = "") -> None:
+        start_tag = max(self._virtual_time, self._finish_tags.get(tenant, 0))
+        finish_tag = start_tag + 1 / self._weights.get(tenant, 1)
+        self._finish_tags[tenant] = finish_tag
+        self._backlogs[tenant] = self._backlogs.get(tenant, 0) + 1
+        self._tenant_backlog.inc(tenant)
 
-        return queue
+        queued = _Queued(
+            event=event,
+            context=contextvars.copy_context(),
+            enqueued_ns=time.time_ns(),
+            tenant=tenant,
+        )
+        heapq.heappush(self._queue, (finish_tag, next(self._order), queued))
+
+        if self._appended is not None and not self._appended.done():
+            self._appended.set_result(None)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def backlogs(self) -> dict[str, int]:
+        """
+        Return how many events from each tenant are waiting
+        """
+        return dict(self._backlogs)
+
+    def pending(self) -> list[protocols.Event]:
+        return [queued.event for _, _, queued in sorted(self._queue)]
+
+    def _pop(self) -> _Queued:
+        finish_tag, _, queued = heapq.heappop(self._queue)
+        self._virtual_time = finish_tag
+
+        tenant = queued.tenant
+        self._tenant_backlog.dec(tenant)
+        self._tenant_wait.observe((time.time_ns() - queued.enqueued_ns) / 1e9, tenant)
+        self._backlogs[tenant] -= 1
+        if not self._backlogs[tenant]:
+            # Its finish tag is now behind the virtual time, so there's no need to keep it
+            del self._backlogs[tenant]
+            del self._finish_tags[tenant]
+
+        return queued
+
+    def _wait_for_append(self) -> asyncio.Future[None]:
+        appended: asyncio.Future[None] = hp.create_future(name="_EventAppend::_wait_for_append")
+        self._appended = appended
+        return appended
 
 
 @attrs.frozen
 class _Info:
     logger: Logger
     database: sqlalchemy.ext.asyncio.AsyncEngine
+    storage: storage.protocols.Storage
+    versions: protocols.Versions
     background_tasks: background.protocols.TasksAdder
     slack_app: slack_bolt.async_app.AsyncApp
+    digest: digest.protocols.Deliverer
 
 
 @attrs.frozen
 class EventHandler:
     _logger: Logger
+    _metrics: metrics.Metrics = attrs.field(factory=metrics.Metrics)
+    _tracer: tracing.Tracer = attrs.field()
+
+    # How much of the event processing each tenant gets when others are busy too,
+    # where tenants not in here have a weight of one
+    _tenant_weights: Mapping[str, float] = attrs.field(factory=dict, kw_only=True)
 
-    append: _EventAppend = attrs.field(factory=_EventAppend)
+    # Events are taken from the queue while fewer than this many are being processed
+    max_in_progress: int = attrs.field(default=32, kw_only=True)
+
+    append: _EventAppend = attrs.field()
+
+    # The latest change applied to each PR, so events that arrive late are ignored
+    versions: protocols.Versions = attrs.field()
+
+    _processing: metrics.Histogram = attrs.field(init=False)
+    _in_progress: metrics.Gauge = attrs.field(init=False)
+
+    @append.default
+    def _make_append(self) -> _EventAppend:
+        return _EventAppend(weights=self._tenant_weights, metrics=self._metrics)
+
+    @versions.default
+    def _make_versions(self) -> protocols.Versions:
+        return versions.PRVersions(logger=self._logger)
+
+    @_tracer.default
+    def _make_tracer(self) -> tracing.Tracer:
+        return tracing.Tracer(logger=self._logger)
+
+    @_processing.default
+    def _make_processing(self) -> metrics.Histogram:
+        self._metrics.callback(
+            "github_event_queue_depth",
+            "Github events waiting to be processed",
+            metrics.Kind.GAUGE,
+            lambda: len(self.append),
+        )
+        return self._metrics.histogram(
+            "github_event_processing_seconds",
+            "Time taken to process each kind of github event",
+            ("event",),
+        )
+
+    @_in_progress.default
+    def _make_in_progress(self) -> metrics.Gauge:
+        return self._metrics.gauge(
+            "github_events_in_progress", "Github events that are currently being processed"
+        )
+
+    @property
+    def backlog(self) -> int:
+        """
+        The number of events that have been received but not finished
+        """
+        return len(self.append) + int(self._in_progress.value())
+
+    def abandon(self) -> None:
+        """
+        Log the events that will not be processed because the server is stopping
+        """
+        pending = self.append.pending()
+        for event in pending:
+            self._logger.error("Abandoning github event", github_event=repr(event))
+        self._logger.error(
+            "Abandoning github events",
+            queued=len(pending),
+            in_progress=int(self._in_progress.value()),
+        )
+
+    async def _process(self, queued: _Queued, info: _Info) -> None:
+        # This runs in a copy of the context the event was added from, so the
+        # current trace is the trace of the webhook the event came from
+        name = type(queued.event).__name__
+        parent = tracing.current()
+        trace = (
+            tracing.Trace(name=name) if parent is None else parent.branch(name, event_type=name)
+        )
+        trace.add_span("queue_wait", start_ns=queued.enqueued_ns, end_ns=trace.root.start_ns)
+
+        try:
+            with tracing.use(trace), self._processing.time(name), trace.span("process"):
+                await queued.event.process(info)
+        finally:
+            self._tracer.finish(trace)
 
     async def run(
         self,
@@ -53,20 +231,54 @@ class EventHandler:
         database: sqlalchemy.ext.asyncio.AsyncEngine,
         background_tasks: background.protocols.TasksAdder,
         slack_app: slack_bolt.async_app.AsyncApp,
+        digest: digest.protocols.Deliverer,
+        event_storage: storage.protocols.Storage | None = None,
     ) -> None:
-        queue = self.append._change_to_queue(final_future)
-
-        async for event in queue:
-            task_holder.add(
-                event.process(
-                    _Info(
-                        logger=self._logger,
-                        database=database,
-                        background_tasks=background_tasks,
-                        slack_app=slack_app,
-                    )
+        loop = asyncio.get_running_loop()
+        if event_storage is None:
+            event_storage = storage.Storage(database, metrics=self._metrics)
+
+        finished: asyncio.Future[None] = hp.create_future(name="EventHandler::run[finished]")
+
+        def on_finished(task: asyncio.Task[None]) -> None:
+            # Counted here rather than in the task so events cancelled before
+            # they start are still counted as finished
+            self._in_progress.dec()
+            if not finished.done():
+                finished.set_result(None)
+
+        while not final_future.done():
+            if not self.append:
+                await hp.wait_for_first_future(
+                    final_future, self.append._wait_for_append(), name="EventHandler::run[idle]"
+                )
+                continue
+
+            if self._in_progress.value() >= self.max_in_progress:
+                finished = hp.create_future(name="EventHandler::run[finished]")
+                await hp.wait_for_first_future(
+                    final_future, finished, name="EventHandler::run[busy]"
                 )
+                continue
+
+            queued = self.append._pop()
+            coro = self._process(
+                queued,
+                _Info(
+                    logger=self._logger,
+                    database=database,
+                    storage=event_storage,
+                    versions=self.versions,
+                    background_tasks=background_tasks,
+                    slack_app=slack_app,
+                    digest=digest,
+                ),
             )
+            task = loop.create_task(coro, context=queued.context)
+            self._in_progress.inc()
+            task.add_done_callback(on_finished)
+            task.add_done_callback(hp.reporter)
+            task_holder.add_task(task)
 
 
 if TYPE_CHECKING:
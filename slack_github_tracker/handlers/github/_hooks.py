@@ -4,10 +4,12 @@ from typing import TYPE_CHECKING, cast
 
 import attrs
 
+from slack_github_tracker import storage
 from slack_github_tracker.protocols import Logger
 
 from . import _errors as errors
 from . import _protocols as protocols
+from . import _tenants as tenants
 
 
 @attrs.frozen
@@ -34,25 +36,74 @@ class Incoming:
     hook_installation_target_type: str
 
 
+def _pr_key(body: dict[str, object]) -> tuple[str, str, int] | None:
+    """
+    Return the PR a webhook is about without interpreting it, or None if it
+    isn't about a PR
+    """
+    pull_request = body.get("pull_request")
+    repository = body.get("repository")
+    if not isinstance(pull_request, dict) or not isinstance(repository, dict):
+        return None
+
+    owner = repository.get("owner")
+    organisation = owner.get("login") if isinstance(owner, dict) else None
+    repo = repository.get("name")
+    pr_number = pull_request.get("number")
+    if (
+        not isinstance(organisation, str)
+        or not isinstance(repo, str)
+        or not isinstance(pr_number, int)
+    ):
+        return None
+
+    return organisation, repo, pr_number
+
+
+def signature(secret: str, body: bytes) -> str:
+    """
+    Return the value github puts in the ``x-hub-signature-256`` header when it
+    sends this body to a webhook with this secret
+    """
+    hash_object = hmac.new(secret.encode("utf-8"), msg=body, digestmod=hashlib.sha256)
+    return f"sha256={hash_object.hexdigest()}"
+
+
 @attrs.frozen
 class Hooks:
-    _secret: str
     _logger: Logger
     _event_adder: protocols.EventHandler
     _event_interpreter: protocols.EventInterpreter
 
-    def register(self, incoming: protocols.Incoming, /) -> None:
+    # The secret of each tenant that webhooks are checked with
+    _tenants: tenants.Tenants
+
+    # Webhooks about PRs that aren't in here are dropped before they are interpreted
+    _tracked: storage.TrackedPRs | None = None
+
+    async def register(self, incoming: protocols.Incoming, /) -> None:
+        if self._tracked is not None:
+            key = _pr_key(incoming.body)
+            if key is not None and not await self._tracked.is_tracked(*key):
+                raise errors.GithubWebhookDropped(reason="Untracked PR")
+
+        tenant = self._tenants.tenant(
+            hook_id=incoming.hook_id, installation_target_id=incoming.hook_installation_target_id
+        )
         found: bool = False
         for event in self._event_interpreter.interpret(incoming):
-            self._event_adder.append(event)
+            self._event_adder.append(event, tenant=tenant)
             found = True
 
         if not found:
             raise errors.GithubWebhookDropped(reason="Unrecognised webhook event")
 
-    def determine_expected_signature(self, body: bytes) -> str:
-        hash_object = hmac.new(self._secret.encode("utf-8"), msg=body, digestmod=hashlib.sha256)
-        return f"sha256={hash_object.hexdigest()}"
+    def determine_expected_signature(
+        self, body: bytes, /, *, hook_id: str = "", installation_target_id: str = ""
+    ) -> str | None:
+        return self._tenants.signature(
+            body, hook_id=hook_id, installation_target_id=installation_target_id
+        )
 
 
 if TYPE_CHECKING:
@@ -1,5 +1,6 @@
+from . import _payloads as payloads
 from . import _pull_request as pull_request
 from . import _pull_request_review as pull_request_review
 from ._interpret import EventInterpreter
 
-__all__ = ["EventInterpreter", "pull_request", "pull_request_review"]
+__all__ = ["EventInterpreter", "payloads", "pull_request", "pull_request_review"]
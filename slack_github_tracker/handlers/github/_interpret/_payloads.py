@@ -0,0 +1,107 @@
+"""
+Typed models of the parts of github webhooks that the interpreters read.
+
+Each model only has the fields we use. Structure functions for the models
+are generated once when this module is imported, and fields of the body
+that aren't in a model are never looked at.
+"""
+
+import datetime
+
+import attrs
+import cattrs
+from cattrs.gen import make_dict_structure_fn
+
+from .. import _errors as errors
+from .. import _protocols as protocols
+
+
+@attrs.frozen
+class User:
+    login: str
+
+
+@attrs.frozen
+class Repository:
+    name: str
+    owner: User
+
+
+@attrs.frozen
+class PullRequest:
+    number: int
+    title: str
+    updated_at: datetime.datetime
+
+    # Only in pull_request webhooks
+    merged: bool = False
+
+
+@attrs.frozen
+class Review:
+    id: int
+    state: str
+    user: User
+    submitted_at: datetime.datetime
+
+
+@attrs.frozen
+class PullRequestPayload:
+    action: str
+    pull_request: PullRequest
+    repository: Repository
+    sender: User
+
+    # Only in synchronize webhooks
+    before: str = ""
+    after: str = ""
+
+
+@attrs.frozen
+class PullRequestReviewPayload:
+    action: str
+    review: Review
+    pull_request: PullRequest
+    repository: Repository
+    sender: User
+
+
+def _structure_timestamp(value: object, _: type) -> datetime.datetime:
+    """
+    Return a timestamp from github as a naive datetime in UTC
+    """
+    if not isinstance(value, str):
+        raise TypeError("Expected a timestamp")
+    when = datetime.datetime.fromisoformat(value)
+    return when.astimezone(datetime.UTC).replace(tzinfo=None)
+
+
+def make_converter(*, detailed_validation: bool = False) -> cattrs.Converter:
+    converter = cattrs.Converter(detailed_validation=detailed_validation)
+    converter.register_structure_hook(datetime.datetime, _structure_timestamp)
+
+    # Models are made before the models they are used in
+    for kls in (
+        User,
+        Repository,
+        PullRequest,
+        Review,
+        PullRequestPayload,
+        PullRequestReviewPayload,
+    ):
+        converter.register_structure_hook(kls, make_dict_structure_fn(kls, converter))
+    return converter
+
+
+converter = make_converter()
+
+
+def structure[T](incoming: protocols.Incoming, kls: type[T]) -> T:
+    """
+    Return the body of this webhook as a ``kls``, dropping the webhook if
+    fields are missing or have the wrong type
+    """
+    try:
+        return converter.structure(incoming.body, kls)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise errors.GithubWebhookDropped(reason=f"Malformed {incoming.event} webhook") from e
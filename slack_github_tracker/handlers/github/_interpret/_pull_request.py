@@ -5,16 +5,63 @@ import attrs
 
 from .. import _event as event
 from .. import _protocols as protocols
+from . import _payloads as payloads
+
+
+def pull_request(
+    payload: payloads.PullRequestPayload | payloads.PullRequestReviewPayload,
+) -> event.PullRequest:
+    return event.PullRequest(
+        organisation=payload.repository.owner.login,
+        repo=payload.repository.name,
+        pr_number=payload.pull_request.number,
+    )
 
 
 @attrs.frozen
 class PullRequestEventInterpreter:
+    """
+    Makes events for the pull_request webhook actions we report on.
+
+    Only the fields each event needs are taken from the body so that nothing
+    keeps the body alive while the event is queued.
+    """
+
     def interpret(self, incoming: protocols.Incoming) -> Iterator[protocols.Event]:
         if incoming.event != "pull_request":
             return
 
-        if False:
-            yield event.EmptyEvent()
+        payload = payloads.structure(incoming, payloads.PullRequestPayload)
+        pr = pull_request(payload)
+        sender = payload.sender.login
+        updated_at = payload.pull_request.updated_at
+
+        match payload.action:
+            case "opened":
+                yield event.PullRequestOpened(
+                    pr=pr, sender=sender, updated_at=updated_at, title=payload.pull_request.title
+                )
+            case "closed":
+                if payload.pull_request.merged:
+                    yield event.PullRequestMerged(pr=pr, sender=sender, updated_at=updated_at)
+                else:
+                    yield event.PullRequestClosed(pr=pr, sender=sender, updated_at=updated_at)
+            case "reopened":
+                yield event.PullRequestReopened(pr=pr, sender=sender, updated_at=updated_at)
+            case "ready_for_review":
+                yield event.PullRequestReadyForReview(pr=pr, sender=sender, updated_at=updated_at)
+            case "converted_to_draft":
+                yield event.PullRequestConvertedToDraft(
+                    pr=pr, sender=sender, updated_at=updated_at
+                )
+            case "synchronize":
+                yield event.PullRequestSynchronized(
+                    pr=pr,
+                    sender=sender,
+                    updated_at=updated_at,
+                    before=payload.before,
+                    after=payload.after,
+                )
 
 
 if TYPE_CHECKING:
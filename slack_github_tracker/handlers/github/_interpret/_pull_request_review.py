@@ -5,16 +5,51 @@ import attrs
 
 from .. import _event as event
 from .. import _protocols as protocols
+from .. import _reviews as reviews
+from . import _payloads as payloads
+from . import _pull_request as pull_request
 
 
 @attrs.frozen
 class PullRequestReviewEventInterpreter:
+    """
+    Makes events for reviews that are submitted or dismissed.
+
+    The events share one ``Reviews`` so the review summary of each PR is kept up
+    to date as they are processed, without asking github for the reviews.
+    """
+
+    _reviews: reviews.Reviews = attrs.field(factory=reviews.Reviews)
+
     def interpret(self, incoming: protocols.Incoming) -> Iterator[protocols.Event]:
         if incoming.event != "pull_request_review":
             return
 
-        if False:
-            yield event.EmptyEvent()
+        payload = payloads.structure(incoming, payloads.PullRequestReviewPayload)
+
+        kls: type[event.PullRequestReviewEvent]
+        match payload.action:
+            case "submitted":
+                kls = event.PullRequestReviewSubmitted
+            case "dismissed":
+                kls = event.PullRequestReviewDismissed
+            case _:
+                return
+
+        try:
+            state = reviews.ReviewState(payload.review.state.lower())
+        except ValueError:
+            return
+
+        yield kls(
+            pr=pull_request.pull_request(payload),
+            sender=payload.sender.login,
+            reviewer=payload.review.user.login,
+            state=state,
+            review_id=payload.review.id,
+            submitted_at=payload.review.submitted_at,
+            reviews=self._reviews,
+        )
 
 
 if TYPE_CHECKING:
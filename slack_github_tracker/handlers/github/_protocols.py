@@ -1,12 +1,14 @@
-from collections.abc import Iterator
+import datetime
+from collections.abc import Iterator, Mapping
 from typing import Protocol
 
 import slack_bolt.async_app
 import sqlalchemy
 
+from slack_github_tracker import storage
 from slack_github_tracker.protocols import Logger
 
-from .. import background
+from .. import background, digest
 
 
 class Incoming(Protocol):
@@ -44,9 +46,61 @@ class Incoming(Protocol):
 
 
 class Hooks(Protocol):
-    def register(self, incoming: Incoming, /) -> None: ...
+    async def register(self, incoming: Incoming, /) -> None: ...
 
-    def determine_expected_signature(self, body: bytes) -> str: ...
+    def determine_expected_signature(
+        self, body: bytes, /, *, hook_id: str = "", installation_target_id: str = ""
+    ) -> str | None:
+        """
+        Return the signature github sends with this body from this webhook, or
+        None if there is no secret for the webhook
+        """
+
+
+class DeliveryRecorder(Protocol):
+    def record(self, headers: Mapping[str, str], body: bytes, /) -> None:
+        """
+        Keep the raw body and headers of a webhook without waiting for them to
+        be written
+        """
+
+
+class GithubAPI(Protocol):
+    async def pull_request(
+        self, organisation: str, repo: str, pr_number: int
+    ) -> dict[str, object]: ...
+
+    async def pull_request_reviews(
+        self, organisation: str, repo: str, pr_number: int
+    ) -> list[dict[str, object]]: ...
+
+
+class Backfill(Protocol):
+    def request(self, pr: storage.protocols.PR, /) -> None:
+        """
+        Ask for the current state of the PR to be fetched from github in the
+        background
+        """
+
+
+class Deliveries(Protocol):
+    async def is_duplicate(self, delivery: str, /) -> bool:
+        """
+        Return whether a webhook with this delivery id was already received.
+
+        Otherwise the delivery id is remembered.
+        """
+
+    def forget(self, delivery: str, /) -> None:
+        """Forget a delivery id so that a redelivery of it is not a duplicate"""
+
+
+class Versions(Protocol):
+    def advance(self, pr: storage.protocols.PR, updated_at: datetime.datetime, /) -> bool:
+        """
+        Record a change to the PR and return True, or return False if a later
+        change was already applied
+        """
 
 
 class EventProcessInfo(Protocol):
@@ -56,19 +110,32 @@ class EventProcessInfo(Protocol):
     @property
     def database(self) -> sqlalchemy.ext.asyncio.AsyncEngine: ...
 
+    @property
+    def storage(self) -> storage.protocols.Storage: ...
+
+    @property
+    def versions(self) -> Versions: ...
+
     @property
     def background_tasks(self) -> background.protocols.TasksAdder: ...
 
     @property
     def slack_app(self) -> slack_bolt.async_app.AsyncApp: ...
 
+    @property
+    def digest(self) -> digest.protocols.Deliverer: ...
+
 
 class Event(Protocol):
     async def process(self, info: EventProcessInfo, /) -> None: ...
 
 
 class EventHandler(Protocol):
-    def append(self, event: Event, /) -> None: ...
+    def append(self, event: Event, /, *, tenant: str = "") -> None:
+        """
+        Queue the event to be processed, sharing the processing fairly between
+        tenants
+        """
 
 
 class EventInterpreter(Protocol):
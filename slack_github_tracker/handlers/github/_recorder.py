@@ -0,0 +1,348 @@
+import asyncio
+import datetime
+import json
+import os
+import pathlib
+import queue
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterator, Mapping
+from typing import IO, TYPE_CHECKING, cast
+
+import attrs
+from machinery import helpers as hp
+
+from slack_github_tracker import metrics
+from slack_github_tracker.protocols import Logger
+
+from .. import background
+from . import _protocols as protocols
+
+_SEGMENT_PREFIX = "deliveries-"
+_SEGMENT_SUFFIX = ".gz"
+_INDEX_SUFFIX = ".index"
+
+
+@attrs.frozen
+class RecordedDelivery:
+    delivery: str
+    received: float
+    headers: dict[str, str]
+    body: bytes
+
+
+@attrs.frozen
+class _Record:
+    received: float
+    headers: Mapping[str, str]
+    body: bytes
+
+
+def _index_path(segment: pathlib.Path) -> pathlib.Path:
+    return segment.with_name(segment.name.removesuffix(_SEGMENT_SUFFIX) + _INDEX_SUFFIX)
+
+
+def _segments(directory: pathlib.Path) -> list[pathlib.Path]:
+    # Segment names start with when they were made, so they sort oldest first.
+    # The name includes the process id so worker processes can share a directory
+    return sorted(directory.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"))
+
+
+def _segment_pid(segment: pathlib.Path) -> int | None:
+    # Names look like deliveries-<started>-<pid>-<counter>.gz
+    parts = segment.name.removesuffix(_SEGMENT_SUFFIX).split("-")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def _compress(record: _Record) -> bytes:
+    """
+    Return a gzip member holding a json line of the headers followed by the
+    body. Each record is its own member so it can be read without
+    decompressing the rest of the segment.
+    """
+    compressor = zlib.compressobj(level=6, wbits=31)
+    header = json.dumps({"received": record.received, "headers": dict(record.headers)})
+    # The body is given to the compressor as is rather than joined to the header
+    return b"".join(
+        (
+            compressor.compress(header.encode() + b"\n"),
+            compressor.compress(record.body),
+            compressor.flush(),
+        )
+    )
+
+
+def _decompress(member: bytes, delivery: str) -> RecordedDelivery:
+    data = zlib.decompress(member, wbits=31)
+    header, _, body = data.partition(b"\n")
+    found = json.loads(header)
+    return RecordedDelivery(
+        delivery=delivery, received=found["received"], headers=found["headers"], body=body
+    )
+
+
+def _index_entries(index: IO[str]) -> Iterator[tuple[str, int, int]]:
+    for line in index:
+        if not line.endswith("\n"):
+            # The last line may not have been written before the process stopped
+            return
+        delivery, offset, length = line.rstrip("\n").split("\t")
+        yield delivery, int(offset), int(length)
+
+
+def _read_member(data: IO[bytes], offset: int, length: int) -> bytes | None:
+    data.seek(offset)
+    member = data.read(length)
+    if len(member) < length:
+        # The last record may not have been written before the process stopped
+        return None
+    return member
+
+
+def read_segment(segment: pathlib.Path) -> Iterator[RecordedDelivery]:
+    """
+    Yield the deliveries in a segment in the order they were recorded
+    """
+    with open(_index_path(segment)) as index, open(segment, "rb") as data:
+        for delivery, offset, length in _index_entries(index):
+            member = _read_member(data, offset, length)
+            if member is None:
+                return
+            yield _decompress(member, delivery)
+
+
+@attrs.frozen
+class DeliveryLog:
+    """
+    Reads the deliveries written by ``DeliveryRecorder``.
+    """
+
+    directory: pathlib.Path
+
+    def __iter__(self) -> Iterator[RecordedDelivery]:
+        for segment in _segments(self.directory):
+            yield from read_segment(segment)
+
+    def find(self, delivery: str) -> RecordedDelivery | None:
+        """
+        Return the delivery with this id, looking through the newest segments
+        first. Only the small index of each segment is read until it is found.
+        """
+        for segment in reversed(_segments(self.directory)):
+            index_path = _index_path(segment)
+            if not index_path.exists():
+                continue
+
+            with open(index_path) as index:
+                for found, offset, length in _index_entries(index):
+                    if found != delivery:
+                        continue
+
+                    with open(segment, "rb") as data:
+                        member = _read_member(data, offset, length)
+                    if member is not None:
+                        return _decompress(member, found)
+        return None
+
+
+@attrs.define
+class _Segment:
+    path: pathlib.Path
+    started: float
+    data: IO[bytes] = attrs.field(repr=False)
+    index: IO[str] = attrs.field(repr=False)
+    size: int = 0
+
+
+@attrs.define
+class DeliveryRecorder:
+    """
+    Appends the raw body and headers of github webhooks to gzip compressed
+    segment files in ``directory``, so deliveries can be looked at or replayed
+    later.
+
+    ``record`` only puts the delivery on a queue. A background thread
+    compresses and writes it, starting a new segment when the current one is
+    too big or too old, and then deletes the oldest segments until the rest
+    fit within the retention limits. Segments from other processes are left
+    alone while they may still be written to. Each segment has an index of
+    the delivery ids in it and where they are in the segment.
+
+    Deliveries are dropped rather than queued when the writer has too many
+    bytes waiting, so a slow disk never slows down the webhook route.
+    """
+
+    _logger: Logger
+    directory: pathlib.Path
+    _metrics: metrics.Metrics = attrs.field(factory=metrics.Metrics, kw_only=True)
+
+    # Start a new segment when the current one reaches either of these
+    max_segment_bytes: int = attrs.field(default=64 * 1024 * 1024, kw_only=True)
+    max_segment_seconds: float = attrs.field(default=3600, kw_only=True)
+
+    # The oldest segments are deleted when the finished segments add up to
+    # more than this or when they were last written to longer ago than this
+    max_total_bytes: int = attrs.field(default=1024 * 1024 * 1024, kw_only=True)
+    max_age_seconds: float | None = attrs.field(default=7 * 24 * 3600, kw_only=True)
+
+    # Drop deliveries when this many bytes are waiting to be written
+    max_pending_bytes: int = attrs.field(default=64 * 1024 * 1024, kw_only=True)
+
+    clock: Callable[[], float] = attrs.field(default=time.time, kw_only=True)
+
+    _queue: queue.SimpleQueue[_Record | None] = attrs.field(init=False, factory=queue.SimpleQueue)
+    _lock: threading.Lock = attrs.field(init=False, factory=threading.Lock)
+    _pending_bytes: int = attrs.field(init=False, default=0)
+    _thread: threading.Thread | None = attrs.field(init=False, default=None)
+    _segment: _Segment | None = attrs.field(init=False, default=None)
+    _counter: int = attrs.field(init=False, default=0)
+
+    _recorded: metrics.Counter = attrs.field(init=False)
+    _dropped: metrics.Counter = attrs.field(init=False)
+
+    @_recorded.default
+    def _make_recorded(self) -> metrics.Counter:
+        return self._metrics.counter(
+            "github_deliveries_recorded_total", "Github webhooks written to the delivery log"
+        )
+
+    @_dropped.default
+    def _make_dropped(self) -> metrics.Counter:
+        return self._metrics.counter(
+            "github_deliveries_record_dropped_total",
+            "Github webhooks not written to the delivery log because the writer was behind",
+        )
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._pending_bytes
+
+    def record(self, headers: Mapping[str, str], body: bytes, /) -> None:
+        with self._lock:
+            if self._pending_bytes + len(body) > self.max_pending_bytes:
+                self._dropped.inc()
+                return
+            self._pending_bytes += len(body)
+
+        self._queue.put(_Record(received=self.clock(), headers=headers, body=body))
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(
+            target=self._write_forever, name="DeliveryRecorder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Write what is already queued and stop the writer
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def __call__(self, final_future: asyncio.Future[None], task_holder: hp.TaskHolder) -> None:
+        self.start()
+        task_holder.add(self._stop_after(final_future))
+
+    async def _stop_after(self, final_future: asyncio.Future[None]) -> None:
+        try:
+            await asyncio.wait([final_future])
+        finally:
+            await asyncio.to_thread(self.stop)
+
+    def _write_forever(self) -> None:
+        try:
+            while (record := self._queue.get()) is not None:
+                try:
+                    self._write(record)
+                except Exception:
+                    self._logger.exception("Failed to record github delivery")
+                finally:
+                    with self._lock:
+                        self._pending_bytes -= len(record.body)
+        finally:
+            self._close_segment()
+
+    def _write(self, record: _Record) -> None:
+        segment = self._current_segment(record.received)
+        member = _compress(record)
+
+        delivery = record.headers.get("x-github-delivery", "")
+        segment.data.write(member)
+        segment.index.write(f"{delivery}\t{segment.size}\t{len(member)}\n")
+        segment.data.flush()
+        segment.index.flush()
+        segment.size += len(member)
+        self._recorded.inc()
+
+    def _current_segment(self, now: float) -> _Segment:
+        segment = self._segment
+        if segment is not None and (
+            segment.size >= self.max_segment_bytes
+            or now - segment.started >= self.max_segment_seconds
+        ):
+            self._close_segment()
+            segment = None
+
+        if segment is None:
+            self._counter += 1
+            started = datetime.datetime.fromtimestamp(now, datetime.UTC)
+            path = self.directory / (
+                f"{_SEGMENT_PREFIX}{started:%Y%m%dT%H%M%S}-{os.getpid()}-{self._counter:06d}"
+                f"{_SEGMENT_SUFFIX}"
+            )
+            segment = self._segment = _Segment(
+                path=path,
+                started=now,
+                data=open(path, "ab"),
+                index=open(_index_path(path), "a"),
+            )
+            self._enforce_retention(now)
+
+        return segment
+
+    def _close_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.data.close()
+            self._segment.index.close()
+            self._segment = None
+
+    def _enforce_retention(self, now: float) -> None:
+        current = None if self._segment is None else self._segment.path
+        segments = [segment for segment in _segments(self.directory) if segment != current]
+        stats = {segment: segment.stat() for segment in segments}
+        total = sum(stat.st_size for stat in stats.values())
+        pid = os.getpid()
+
+        for segment in segments:
+            stat = stats[segment]
+            too_old = (
+                self.max_age_seconds is not None and now - stat.st_mtime > self.max_age_seconds
+            )
+            if not too_old and total <= self.max_total_bytes:
+                break
+
+            # Other workers sharing the directory may still be writing to their
+            # segment, which they don't do for longer than max_segment_seconds
+            if _segment_pid(segment) != pid and now - stat.st_mtime <= self.max_segment_seconds:
+                continue
+
+            segment.unlink(missing_ok=True)
+            _index_path(segment).unlink(missing_ok=True)
+            total -= stat.st_size
+            self._logger.info("Deleted old github delivery log segment", segment=segment.name)
+
+
+if TYPE_CHECKING:
+    _R: protocols.DeliveryRecorder = cast(DeliveryRecorder, None)
+    _T: background.protocols.TaskAdder = cast(DeliveryRecorder, None)
@@ -0,0 +1,165 @@
+import datetime
+import enum
+from collections.abc import Sequence
+from typing import Protocol
+
+import attrs
+
+from slack_github_tracker import caching, storage
+
+
+class ReviewState(enum.StrEnum):
+    APPROVED = "approved"
+    CHANGES_REQUESTED = "changes_requested"
+    COMMENTED = "commented"
+    DISMISSED = "dismissed"
+
+
+class ReviewDecision(enum.StrEnum):
+    APPROVED = "approved"
+    CHANGES_REQUESTED = "changes_requested"
+    REVIEW_REQUIRED = "review_required"
+
+
+@attrs.frozen
+class ReviewerState:
+    """
+    A reviewer's say in the decision and the review that set it
+    """
+
+    state: ReviewState
+    review_id: int
+    submitted_at: datetime.datetime
+
+
+@attrs.define
+class ReviewSummary:
+    """
+    The latest review from each reviewer of a PR, with counts of the
+    reviewers that approve and that request changes.
+
+    Like github, a review that only comments doesn't change a reviewer's
+    approval or request for changes, and dismissing a review leaves the
+    reviewer with no say in the decision.
+    """
+
+    reviewers: dict[str, ReviewerState] = attrs.field(factory=dict)
+    approvals: int = 0
+    changes_requested: int = 0
+
+    # When each reviewer last submitted a review, including comments that
+    # didn't change their state
+    _latest_activity: dict[str, datetime.datetime] = attrs.field(init=False, factory=dict)
+
+    @classmethod
+    def from_stored(cls, reviews: Sequence[storage.protocols.Review]) -> "ReviewSummary":
+        summary = cls()
+        for review in reviews:
+            summary.apply(
+                review.reviewer,
+                ReviewState(review.state),
+                review_id=review.review_id,
+                submitted_at=review.submitted_at,
+            )
+        return summary
+
+    @property
+    def decision(self) -> ReviewDecision:
+        if self.changes_requested:
+            return ReviewDecision.CHANGES_REQUESTED
+        if self.approvals:
+            return ReviewDecision.APPROVED
+        return ReviewDecision.REVIEW_REQUIRED
+
+    def _count(self, state: ReviewState, amount: int) -> None:
+        if state is ReviewState.APPROVED:
+            self.approvals += amount
+        elif state is ReviewState.CHANGES_REQUESTED:
+            self.changes_requested += amount
+
+    def apply(
+        self,
+        reviewer: str,
+        state: ReviewState,
+        *,
+        review_id: int,
+        submitted_at: datetime.datetime,
+    ) -> ReviewerState | None:
+        """
+        Record a review or the dismissal of a review.
+
+        Return the reviewer's new state, or None if the review is older than
+        what was already recorded for this reviewer, was already dismissed, or
+        dismisses a review that no longer sets their state.
+        """
+        previous = self.reviewers.get(reviewer)
+
+        if previous is not None:
+            if state is ReviewState.DISMISSED:
+                # A dismissal carries the submitted_at of the review it dismisses
+                if review_id != previous.review_id:
+                    return None
+            elif previous.state is ReviewState.DISMISSED and review_id == previous.review_id:
+                # The review was dismissed, and the dismissal arrived first
+                return None
+            elif state is ReviewState.COMMENTED and previous.state is not ReviewState.DISMISSED:
+                # The comment is recorded as activity but the review that set
+                # the state is kept so that it can still be dismissed
+                if submitted_at < self._latest_activity[reviewer]:
+                    return None
+                self._latest_activity[reviewer] = submitted_at
+                return previous
+            elif submitted_at < previous.submitted_at:
+                return None
+
+            self._count(previous.state, -1)
+
+        current = self.reviewers[reviewer] = ReviewerState(
+            state=state, review_id=review_id, submitted_at=submitted_at
+        )
+        self._latest_activity[reviewer] = max(
+            submitted_at, self._latest_activity.get(reviewer, submitted_at)
+        )
+        self._count(state, 1)
+        return current
+
+    def describe(self) -> str:
+        return (
+            f"{self.approvals} approved, {self.changes_requested} requested changes"
+            f" ({self.decision.replace('_', ' ')})"
+        )
+
+
+class _ReviewStorage(Protocol):
+    async def reviews(self, pr: storage.protocols.PR, /) -> Sequence[storage.protocols.Review]: ...
+
+
+def _default_summaries() -> caching.TTLCache[tuple[str, str, int], ReviewSummary]:
+    # Summaries that are dropped are loaded from storage again when needed
+    return caching.TTLCache(maxsize=10_000, ttl=24 * 3600)
+
+
+@attrs.define
+class Reviews:
+    """
+    The review summary of recently reviewed PRs.
+
+    A summary is loaded from storage the first time a PR is seen and then
+    kept up to date in memory, with each change written back to storage.
+    """
+
+    _summaries: caching.TTLCache[tuple[str, str, int], ReviewSummary] = attrs.field(
+        factory=_default_summaries
+    )
+
+    async def summary(self, pr: storage.protocols.PR, source: _ReviewStorage) -> ReviewSummary:
+        key = storage.requests.pr_key(pr)
+        summary = self._summaries.get(key)
+        if summary is None:
+            loaded = ReviewSummary.from_stored(await source.reviews(pr))
+            # Another event for this PR may have loaded it while we waited
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = loaded
+                self._summaries.set(key, summary)
+        return summary
@@ -0,0 +1,119 @@
+import hashlib
+import hmac
+import json
+import pathlib
+from collections.abc import Mapping, Sequence
+
+import attrs
+import cattrs
+
+
+def _signer(secret: str) -> hmac.HMAC:
+    # Copying an HMAC made from the secret skips hashing the key for every webhook
+    return hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+@attrs.frozen
+class Tenant:
+    """
+    An organisation or repository that has a github webhook pointed at us
+    """
+
+    # The hook_installation_target_id of the webhooks, which is the id of the
+    # organisation or repository the webhooks were made in
+    installation_target_id: str
+
+    secret: str = attrs.field(repr=False)
+
+    # Hooks of this tenant that have their own secret
+    hook_secrets: Mapping[str, str] = attrs.field(factory=dict, repr=False)
+
+    # How much of the event processing this tenant gets when others are busy too
+    weight: float = 1
+
+
+@attrs.frozen
+class Tenants:
+    """
+    The webhook secrets and weights of each tenant.
+
+    The secret of a webhook is looked up by its ``x-github-hook-id`` and then
+    its ``x-github-hook-installation-target-id``. Webhooks from neither use
+    ``default_secret``. The HMAC for each secret is made once up front.
+
+    Headers aren't covered by the signature, so a hook is only accepted with
+    the installation target it belongs to. Only github holds the default
+    secret, so webhooks checked with it are queued under their installation
+    target with a weight of 1.
+    """
+
+    tenants: Sequence[Tenant] = ()
+    default_secret: str | None = attrs.field(default=None, repr=False)
+
+    _by_hook_id: dict[str, tuple[str, hmac.HMAC]] = attrs.field(init=False)
+    _by_installation_target_id: dict[str, hmac.HMAC] = attrs.field(init=False)
+    _default: hmac.HMAC | None = attrs.field(init=False)
+
+    @_by_hook_id.default
+    def _make_by_hook_id(self) -> dict[str, tuple[str, hmac.HMAC]]:
+        return {
+            hook_id: (tenant.installation_target_id, _signer(secret))
+            for tenant in self.tenants
+            for hook_id, secret in tenant.hook_secrets.items()
+        }
+
+    @_by_installation_target_id.default
+    def _make_by_installation_target_id(self) -> dict[str, hmac.HMAC]:
+        return {tenant.installation_target_id: _signer(tenant.secret) for tenant in self.tenants}
+
+    @_default.default
+    def _make_default(self) -> hmac.HMAC | None:
+        return None if self.default_secret is None else _signer(self.default_secret)
+
+    @classmethod
+    def from_file(cls, path: pathlib.Path, *, default_secret: str | None = None) -> "Tenants":
+        """
+        Load tenants from a json file holding a list of objects with the
+        fields of ``Tenant``
+        """
+        with open(path) as fle:
+            tenants = cattrs.Converter().structure(json.load(fle), list[Tenant])
+        return cls(tenants=tenants, default_secret=default_secret)
+
+    @property
+    def weights(self) -> dict[str, float]:
+        return {tenant.installation_target_id: tenant.weight for tenant in self.tenants}
+
+    def _find(self, hook_id: str, installation_target_id: str) -> tuple[str, hmac.HMAC] | None:
+        by_hook = self._by_hook_id.get(hook_id)
+        if by_hook is not None:
+            # The hook must be sent from the tenant it was configured for
+            return by_hook if by_hook[0] == installation_target_id else None
+
+        signer = self._by_installation_target_id.get(installation_target_id)
+        if signer is not None:
+            return installation_target_id, signer
+
+        return None if self._default is None else (installation_target_id, self._default)
+
+    def tenant(self, *, hook_id: str = "", installation_target_id: str = "") -> str:
+        """
+        Return the tenant a webhook with a valid signature belongs to
+        """
+        found = self._find(hook_id, installation_target_id)
+        return "" if found is None else found[0]
+
+    def signature(
+        self, body: bytes, *, hook_id: str = "", installation_target_id: str = ""
+    ) -> str | None:
+        """
+        Return the signature github would send with this body, or None if
+        there is no secret for this webhook
+        """
+        found = self._find(hook_id, installation_target_id)
+        if found is None:
+            return None
+
+        signer = found[1].copy()
+        signer.update(body)
+        return f"sha256={signer.hexdigest()}"
@@ -0,0 +1,76 @@
+import asyncio
+import datetime
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Protocol, cast
+
+import attrs
+
+from slack_github_tracker import storage
+from slack_github_tracker.protocols import Logger
+
+from . import _protocols as protocols
+
+
+class _VersionStorage(Protocol):
+    async def pr_versions(self) -> Sequence[storage.protocols.PRVersion]: ...
+
+
+@attrs.define
+class PRVersions:
+    """
+    The ``updated_at`` of the latest change applied to each PR.
+
+    Times are kept as seconds since the epoch against the PR so each PR
+    costs a small tuple and a float. Changes are written to storage as they
+    are applied and loaded back when the server starts. Changes shouldn't be
+    applied until ``wait_for_load`` returns, otherwise a late event for a PR
+    can be applied before the version it is older than is loaded.
+
+    Other processes only write their changes to storage, so these can be
+    behind and are only used to reject changes without asking storage.
+    """
+
+    _logger: Logger
+    _versions: dict[tuple[str, str, int], float] = attrs.field(init=False, factory=dict)
+    _loaded: asyncio.Event = attrs.field(init=False, factory=asyncio.Event)
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def _update(self, key: tuple[str, str, int], version: float) -> bool:
+        if version < self._versions.get(key, version):
+            return False
+        self._versions[key] = version
+        return True
+
+    def advance(self, pr: storage.protocols.PR, updated_at: datetime.datetime, /) -> bool:
+        """
+        Record a change to the PR and return True, or return False if a later
+        change was already applied
+        """
+        key = storage.requests.pr_key(pr)
+        return self._update(key, updated_at.replace(tzinfo=datetime.UTC).timestamp())
+
+    async def wait_for_load(self) -> None:
+        """
+        Return once versions have been loaded from storage, or failed to load
+        """
+        await self._loaded.wait()
+
+    async def load(self, source: _VersionStorage) -> None:
+        try:
+            versions = await source.pr_versions()
+        except Exception:
+            self._logger.exception("Failed to load PR versions")
+        else:
+            for version in versions:
+                self._update(
+                    storage.requests.pr_key(version.pr),
+                    version.updated_at.replace(tzinfo=datetime.UTC).timestamp(),
+                )
+        finally:
+            self._loaded.set()
+
+
+if TYPE_CHECKING:
+    _V: protocols.Versions = cast(PRVersions, None)
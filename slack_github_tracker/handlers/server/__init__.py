@@ -1,3 +1,28 @@
-from ._handlers import Registry, register_sanic_routes
+from ._drain import Drain, DrainStep
+from ._handlers import (
+    GithubWebhook,
+    Registry,
+    SlackEvents,
+    register_health_routes,
+    register_metrics_routes,
+    register_sanic_routes,
+)
+from ._health import Check, LoopLag, Readiness
+from ._retries import SlackRetries
+from ._socket_mode import SocketMode
 
-__all__ = ["register_sanic_routes", "Registry"]
+__all__ = [
+    "register_sanic_routes",
+    "register_metrics_routes",
+    "register_health_routes",
+    "Registry",
+    "Drain",
+    "DrainStep",
+    "Check",
+    "LoopLag",
+    "Readiness",
+    "SocketMode",
+    "SlackRetries",
+    "SlackEvents",
+    "GithubWebhook",
+]
@@ -0,0 +1,122 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+
+import attrs
+
+from slack_github_tracker.protocols import Logger
+
+
+@attrs.frozen
+class DrainStep:
+    """
+    Something that holds on to work that should be finished before the server
+    stops.
+
+    Steps without a ``flush`` are waited on until nothing ``remaining`` is
+    left. Steps with a ``flush`` have it called once. ``abandon`` is called
+    when the deadline is reached with work still remaining, so that work can
+    be logged or persisted.
+    """
+
+    name: str
+    remaining: Callable[[], int]
+    flush: Callable[[], Awaitable[None]] | None = None
+    abandon: Callable[[], None] | None = None
+
+
+@attrs.define
+class Drain:
+    """
+    Finishes outstanding work once the server has stopped accepting requests.
+
+    Steps are drained in order, so a step that produces work for a later step
+    should come first. The background tasks keep running while this happens
+    and are only stopped once the drain is finished.
+
+    Readiness fails for ``grace_seconds`` before the server stops accepting
+    requests so that load balancers have time to stop sending it new ones.
+    """
+
+    _logger: Logger
+    steps: Sequence[DrainStep]
+    poll_every: float = 0.1
+    log_every: float = 5
+    grace_seconds: float = 0
+
+    # Set as soon as the server is asked to stop so readiness can fail straight away
+    stopping: bool = attrs.field(init=False, default=False)
+
+    async def stop_accepting(self) -> None:
+        """
+        Fail readiness and return once the grace period has passed and the
+        server can stop accepting requests.
+        """
+        self.stopping = True
+        if self.grace_seconds > 0:
+            self._logger.info(
+                "Failing readiness before no longer accepting requests",
+                grace_seconds=self.grace_seconds,
+            )
+            await asyncio.sleep(self.grace_seconds)
+
+    def remaining(self) -> dict[str, int]:
+        return {step.name: step.remaining() for step in self.steps}
+
+    async def run(self, *, deadline: float) -> bool:
+        """
+        Drain every step or give up at ``deadline``, which is a time from the
+        clock of the running loop.
+
+        Return whether everything was drained.
+        """
+        self.stopping = True
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        next_log = started
+
+        self._logger.info(
+            "Draining outstanding work",
+            seconds_till_deadline=round(deadline - started, 2),
+            remaining=self.remaining(),
+        )
+
+        for index, step in enumerate(self.steps):
+            if step.flush is not None and step.remaining() > 0:
+                try:
+                    await asyncio.wait_for(step.flush(), timeout=max(0, deadline - loop.time()))
+                except TimeoutError:
+                    self._logger.error("Timed out flushing", step=step.name)
+                except Exception:
+                    self._logger.exception("Failed to flush", step=step.name)
+
+            while step.flush is None and step.remaining() > 0 and loop.time() < deadline:
+                if loop.time() >= next_log:
+                    next_log = loop.time() + self.log_every
+                    self._logger.info(
+                        "Draining",
+                        step=step.name,
+                        seconds_till_deadline=round(deadline - loop.time(), 2),
+                        remaining=self.remaining(),
+                    )
+                await asyncio.sleep(min(self.poll_every, max(0, deadline - loop.time())))
+
+            if loop.time() >= deadline:
+                return self._abandon(self.steps[index:], took=loop.time() - started)
+
+        remaining = self.remaining()
+        if any(remaining.values()):
+            return self._abandon(self.steps, took=loop.time() - started)
+
+        self._logger.info("Drained outstanding work", took=round(loop.time() - started, 2))
+        return True
+
+    def _abandon(self, steps: Sequence[DrainStep], *, took: float) -> bool:
+        self._logger.error(
+            "Stopping with work that was not drained",
+            took=round(took, 2),
+            remaining=self.remaining(),
+        )
+        for step in steps:
+            if step.abandon is not None and step.remaining() > 0:
+                step.abandon()
+        return False
@@ -1,55 +1,186 @@
 import hmac
+import time
 
 import attrs
 import sanic
 import slack_bolt
 from slack_bolt.adapter.sanic import async_handler as bolt_async_handler
+from slack_sdk.signature import SignatureVerifier
 
+from slack_github_tracker import logs, metrics, tracing
+from slack_github_tracker.metrics import Metrics
 from slack_github_tracker.protocols import Logger
 
 from .. import github
+from . import _health as health
+from . import _retries as retries
 
 
 @attrs.frozen
 class Registry:
     slack_app: slack_bolt.async_app.AsyncApp
     github_webhooks: github.protocols.Hooks
+    github_deliveries: github.protocols.Deliveries
+    slack_retries: retries.SlackRetries = attrs.field(factory=retries.SlackRetries)
+    metrics: Metrics = attrs.field(factory=Metrics)
+    github_recorder: github.protocols.DeliveryRecorder | None = None
+
+    # Retries from slack are only recognised in requests signed with this secret
+    slack_signing_secret: str | None = None
+
+
+@attrs.frozen
+class SlackEvents:
+    _logger: Logger
+    _slack_app: slack_bolt.async_app.AsyncApp
+    _retries: retries.SlackRetries
+    _log_sampler: logs.RateSampler = attrs.field(factory=logs.RateSampler)
+    _signing_secret: str | None = None
+
+    _verifier: SignatureVerifier | None = attrs.field(init=False)
+
+    @_verifier.default
+    def _make_verifier(self) -> SignatureVerifier | None:
+        if self._signing_secret is None:
+            return None
+        return SignatureVerifier(self._signing_secret)
+
+    def _authenticated(self, request: sanic.Request) -> bool:
+        if self._verifier is None:
+            return False
+        return self._verifier.is_valid_request(
+            request.body, {name.lower(): value for name, value in request.headers.items()}
+        )
+
+    async def handle(self, request: sanic.Request) -> sanic.response.HTTPResponse:
+        # Bolt parses the body when the request is made, and the key comes from that parse
+        bolt_request = bolt_async_handler.to_async_bolt_request(request)
+
+        # Unsigned requests go straight to bolt to be refused, so they can't
+        # claim the key of a real request
+        key = self._retries.key_for(bolt_request.body) if self._authenticated(request) else None
+
+        if key is not None:
+            is_retry = "x-slack-retry-num" in request.headers
+            if not self._retries.start(key, is_retry=is_retry):
+                suppressed = self._log_sampler.sample("slack_retry")
+                if suppressed is not None:
+                    self._logger.info(
+                        "Answered slack retry without dispatching",
+                        key=key,
+                        retry_num=request.headers.get("x-slack-retry-num"),
+                        retry_reason=request.headers.get("x-slack-retry-reason"),
+                        suppressed=suppressed,
+                    )
+                return sanic.empty(200, headers={"X-Slack-No-Retry": "1"})
+
+        success = False
+        try:
+            bolt_resp = await self._slack_app.async_dispatch(bolt_request)
+            success = bolt_resp.status < 400
+            return bolt_async_handler.to_sanic_response(bolt_resp)
+        finally:
+            if key is not None:
+                self._retries.completed(key, success=success)
 
 
 @attrs.frozen
 class GithubWebhook:
     _logger: Logger
     _hooks: github.protocols.Hooks
+    _deliveries: github.protocols.Deliveries
+    _metrics: metrics.Metrics = attrs.field(factory=metrics.Metrics)
+    _log_sampler: logs.RateSampler = attrs.field(factory=logs.RateSampler)
+
+    # Given the raw webhook once its signature is checked, before it is parsed
+    _recorder: github.protocols.DeliveryRecorder | None = None
+
+    _rejected: metrics.Counter = attrs.field(init=False)
+    _dropped: metrics.Counter = attrs.field(init=False)
+
+    @_rejected.default
+    def _make_rejected(self) -> metrics.Counter:
+        return self._metrics.counter(
+            "github_webhooks_rejected_total",
+            "Github webhooks that were refused, like those with an invalid signature",
+            ("reason",),
+        )
+
+    @_dropped.default
+    def _make_dropped(self) -> metrics.Counter:
+        return self._metrics.counter(
+            "github_webhooks_dropped_total",
+            "Github webhooks that were accepted but not turned into events",
+            ("reason",),
+        )
 
     async def handle(self, request: sanic.Request) -> sanic.response.HTTPResponse:
         logger = self._logger
+        attributes: dict[str, tracing.AttributeValue] = {}
         if "x-github-delivery" in request.headers:
             logger = logger.bind(github_delivery=request.headers["x-github-delivery"])
+            attributes["github_delivery"] = request.headers["x-github-delivery"]
+        if "x-github-event" in request.headers:
+            attributes["github_event"] = request.headers["x-github-event"]
+
+        # Events made from this webhook carry the trace to the task that processes them
+        with tracing.start("github_webhook", **attributes):
+            return await self._handle(request, logger)
 
+    async def _handle(self, request: sanic.Request, logger: Logger) -> sanic.response.HTTPResponse:
         if not request.headers["user-agent"].startswith("GitHub-Hookshot/"):
             # Github documentation say the user agent should always start with this specific string
             logger.error("User agent field was incorrect", found=request.headers["user-agent"])
+            self._rejected.inc("invalid_user_agent")
             return sanic.empty(400)
 
         try:
             hub_signature_256 = request.headers["x-hub-signature-256"]
         except KeyError:
             logger.error("No x-hub-signature-256 header provided")
+            self._rejected.inc("missing_signature")
             return sanic.empty(400)
         else:
             if not hub_signature_256:
                 logger.error("No x-hub-signature-256 header provided")
+                self._rejected.inc("missing_signature")
                 return sanic.empty(400)
 
-        expected_signature = self._hooks.determine_expected_signature(request.body)
-        if not hmac.compare_digest(expected_signature, hub_signature_256):
+        with tracing.span("verify_signature"):
+            expected_signature = self._hooks.determine_expected_signature(
+                request.body,
+                hook_id=request.headers.get("x-github-hook-id", ""),
+                installation_target_id=request.headers.get(
+                    "x-github-hook-installation-target-id", ""
+                ),
+            )
+
+        if expected_signature is None:
+            logger.error(
+                "No secret for this github web hook",
+                hook_id=request.headers.get("x-github-hook-id"),
+            )
+            self._rejected.inc("unknown_hook")
+            return sanic.empty(403)
+
+        valid = hmac.compare_digest(expected_signature, hub_signature_256)
+
+        if not valid:
             logger.error("Request from github web hook has invalid signature")
+            self._rejected.inc("invalid_signature")
             return sanic.empty(403)
 
+        if self._recorder is not None:
+            self._recorder.record(
+                {name.lower(): value for name, value in request.headers.items()}, request.body
+            )
+
         try:
-            body: dict[str, object] = request.json
+            with tracing.span("parse_json"):
+                body: dict[str, object] = request.json
         except (TypeError, ValueError):
             logger.exception("Failed to parse the webhook body as json")
+            self._rejected.inc("invalid_json")
             return sanic.empty(500)
 
         try:
@@ -65,25 +196,44 @@ class GithubWebhook:
                 ),
             }
         except KeyError:
+            self._rejected.inc("missing_headers")
             return sanic.empty(400)
 
         if not all(raw_headers.values()):
             logger.error("Webhook has unexpected empty values")
+            self._rejected.inc("missing_headers")
             return sanic.empty(400)
 
+        with tracing.span("deduplicate"):
+            duplicate = await self._deliveries.is_duplicate(raw_headers["delivery"])
+
+        if duplicate:
+            self._log_dropped(logger, "Duplicate delivery")
+            return sanic.empty()
+
         incoming = github.hooks.Incoming(body=body, logger=logger, **raw_headers)
 
         try:
-            self._hooks.register(incoming)
+            with tracing.span("register"):
+                await self._hooks.register(incoming)
         except github.errors.GithubWebhookDropped as e:
-            logger.info("Event dropped", reason=e.reason)
+            self._log_dropped(logger, e.reason)
             return sanic.empty()
-        except github.errors.GithubWebhookError:
+        except Exception:
+            # Forgotten so github's redelivery of it isn't dropped as a duplicate
             logger.exception("Failed to process webhook")
+            self._deliveries.forget(incoming.delivery)
             return sanic.empty(500)
         else:
             return sanic.empty()
 
+    def _log_dropped(self, logger: Logger, reason: str) -> None:
+        # Most webhooks github sends are dropped, so only some of these are logged
+        self._dropped.inc(reason)
+        suppressed = self._log_sampler.sample(reason)
+        if suppressed is not None:
+            logger.info("Event dropped", reason=reason, suppressed=suppressed)
+
 
 def register_sanic_routes[T_SanicConfig: sanic.Config, T_SanicNamespace](
     *,
@@ -91,13 +241,87 @@ def register_sanic_routes[T_SanicConfig: sanic.Config, T_SanicNamespace](
     sanic_app: sanic.Sanic[T_SanicConfig, T_SanicNamespace],
     registry: Registry,
 ) -> None:
+    requests = registry.metrics.counter(
+        "http_requests_total", "Requests received by each route", ("route", "status")
+    )
+    latency = registry.metrics.histogram(
+        "http_request_duration_seconds", "Time taken to respond to each route", ("route",)
+    )
+
+    slack_events_handler = SlackEvents(
+        logger,
+        registry.slack_app,
+        registry.slack_retries,
+        signing_secret=registry.slack_signing_secret,
+    )
+    github_webhook_handler = GithubWebhook(
+        logger,
+        registry.github_webhooks,
+        registry.github_deliveries,
+        registry.metrics,
+        recorder=registry.github_recorder,
+    )
+
+    registry.metrics.callback(
+        "slack_retries_deduplicated_total",
+        "Slack retries answered without dispatching them",
+        metrics.Kind.COUNTER,
+        lambda: registry.slack_retries.duplicates,
+    )
+
     @sanic_app.post("/slack/events", name="slack_events")
     async def slack_events(request: sanic.Request) -> sanic.response.HTTPResponse:
-        bolt_resp = await registry.slack_app.async_dispatch(
-            bolt_async_handler.to_async_bolt_request(request)
-        )
-        return bolt_async_handler.to_sanic_response(bolt_resp)
+        start = time.perf_counter()
+        response = await slack_events_handler.handle(request)
+        latency.observe(time.perf_counter() - start, "/slack/events")
+        requests.inc("/slack/events", str(response.status))
+        return response
 
     @sanic_app.post("/github/webhook", name="github_webhook")
     async def github_webhook(request: sanic.Request) -> sanic.response.HTTPResponse:
-        return await GithubWebhook(logger, registry.github_webhooks).handle(request)
+        start = time.perf_counter()
+        response = await github_webhook_handler.handle(request)
+        latency.observe(time.perf_counter() - start, "/github/webhook")
+        requests.inc("/github/webhook", str(response.status))
+        return response
+
+
+def register_metrics_routes[T_SanicConfig: sanic.Config, T_SanicNamespace](
+    *,
+    sanic_app: sanic.Sanic[T_SanicConfig, T_SanicNamespace],
+    metrics: metrics.Metrics,
+) -> None:
+    @sanic_app.get("/metrics", name="metrics")
+    async def render_metrics(request: sanic.Request) -> sanic.response.HTTPResponse:
+        return sanic.text(
+            metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+def register_health_routes[T_SanicConfig: sanic.Config, T_SanicNamespace](
+    *,
+    sanic_app: sanic.Sanic[T_SanicConfig, T_SanicNamespace],
+    readiness: health.Readiness,
+) -> None:
+    @sanic_app.get("/healthz", name="healthz")
+    async def healthz(request: sanic.Request) -> sanic.response.HTTPResponse:
+        return sanic.json({"alive": True})
+
+    @sanic_app.get("/readyz", name="readyz")
+    async def readyz(request: sanic.Request) -> sanic.response.HTTPResponse:
+        results = readiness.results()
+        ready = all(result.ok for result in results)
+        return sanic.json(
+            {
+                "ready": ready,
+                "checks": {
+                    result.name: {
+                        "ok": result.ok,
+                        "value": result.value,
+                        "threshold": result.threshold,
+                    }
+                    for result in results
+                },
+            },
+            status=200 if ready else 503,
+        )
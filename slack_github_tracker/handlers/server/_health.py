@@ -0,0 +1,61 @@
+import asyncio
+from collections.abc import Callable, Sequence
+
+import attrs
+
+
+@attrs.define
+class LoopLag:
+    """
+    Measures how late the event loop is to wake up a sleeping task.
+
+    A loop that is busy with other work wakes the monitor up late and that
+    delay is how long anything else waiting on the loop is also delayed by.
+    """
+
+    interval: float = 0.5
+    lag: float = 0
+
+    async def run(self, final_future: asyncio.Future[None]) -> None:
+        loop = asyncio.get_running_loop()
+        while not final_future.done():
+            expected = loop.time() + self.interval
+            await asyncio.wait([final_future], timeout=self.interval)
+            if not final_future.done():
+                self.lag = max(0.0, loop.time() - expected)
+
+
+@attrs.frozen
+class Check:
+    name: str
+    read: Callable[[], float]
+    threshold: float
+
+
+@attrs.frozen
+class CheckResult:
+    name: str
+    value: float
+    threshold: float
+
+    @property
+    def ok(self) -> bool:
+        return self.value <= self.threshold
+
+
+@attrs.frozen
+class Readiness:
+    """
+    Decides whether this instance should be given more traffic.
+
+    Each check reads a value that is already kept up to date in memory so a
+    probe never waits on the database or anything else that may be saturated.
+    """
+
+    checks: Sequence[Check] = ()
+
+    def results(self) -> list[CheckResult]:
+        return [
+            CheckResult(name=check.name, value=check.read(), threshold=check.threshold)
+            for check in self.checks
+        ]
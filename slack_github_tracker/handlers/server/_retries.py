@@ -0,0 +1,65 @@
+import enum
+from collections.abc import Mapping
+
+import attrs
+
+from slack_github_tracker import caching
+
+
+class _State(enum.Enum):
+    IN_FLIGHT = "in_flight"
+    COMPLETED = "completed"
+
+
+def _default_seen() -> caching.TTLCache[str, _State]:
+    # Slack retries a request up to three times over roughly five minutes
+    return caching.TTLCache(maxsize=10_000, ttl=600)
+
+
+@attrs.define
+class SlackRetries:
+    """
+    Used to answer retries from slack for requests that are already being
+    handled, or have already been handled, without dispatching them to bolt
+    again.
+
+    Requests are identified by the ``event_id`` of an events api request or
+    the ``trigger_id`` of a command or interaction. A request that fails or
+    is refused is forgotten so that slack's retry of it gets processed.
+    """
+
+    _seen: caching.TTLCache[str, _State] = attrs.field(factory=_default_seen)
+
+    # The number of retries that were answered without being dispatched
+    duplicates: int = attrs.field(init=False, default=0)
+
+    def key_for(self, body: Mapping[str, object]) -> str | None:
+        """
+        Return the key of a request from the body bolt parsed out of it
+        """
+        for name in ("event_id", "trigger_id"):
+            key = body.get(name)
+            if isinstance(key, str) and key:
+                return f"{name}:{key}"
+
+        return None
+
+    def start(self, key: str, *, is_retry: bool) -> bool:
+        """
+        Return whether the request for this key should be dispatched.
+
+        Retries for a key that is in flight or already completed return
+        ``False``, otherwise the key is recorded as in flight.
+        """
+        if is_retry and key in self._seen:
+            self.duplicates += 1
+            return False
+
+        self._seen.set(key, _State.IN_FLIGHT)
+        return True
+
+    def completed(self, key: str, *, success: bool) -> None:
+        if success:
+            self._seen.set(key, _State.COMPLETED)
+        else:
+            self._seen.pop(key)
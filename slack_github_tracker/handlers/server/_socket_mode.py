@@ -0,0 +1,33 @@
+import asyncio
+
+import attrs
+import slack_bolt
+from machinery import helpers as hp
+from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
+
+from slack_github_tracker.protocols import Logger
+
+
+@attrs.frozen
+class SocketMode:
+    """
+    Receive slack events over a single Socket Mode websocket rather than
+    through the ``/slack/events`` http route.
+
+    The connection is opened when ``run`` starts and closed once the final
+    future is done, so this is expected to be run as a background task.
+    """
+
+    _logger: Logger
+    _slack_app: slack_bolt.async_app.AsyncApp
+    _app_token: str
+
+    async def run(self, final_future: asyncio.Future[None]) -> None:
+        handler = AsyncSocketModeHandler(self._slack_app, app_token=self._app_token)
+        await handler.connect_async()  # type: ignore[no-untyped-call]
+        self._logger.info("Connected to slack using socket mode")
+        try:
+            await hp.wait_for_all_futures(final_future, name="SocketMode::run[wait_for_final]")
+        finally:
+            await handler.close_async()  # type: ignore[no-untyped-call]
+            self._logger.info("Closed socket mode connection to slack")
@@ -1,3 +1,4 @@
+from . import _tracking as tracking
 from ._handlers import Deps, register_slack_handlers
 
-__all__ = ["register_slack_handlers", "Deps"]
+__all__ = ["register_slack_handlers", "Deps", "tracking"]
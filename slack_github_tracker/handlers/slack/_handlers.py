@@ -1,12 +1,14 @@
 from typing import Protocol
 
 import attrs
-import slack_bolt
+import slack_bolt.async_app
 from sqlalchemy.ext.asyncio import AsyncEngine
 
 from slack_github_tracker import storage
+from slack_github_tracker.metrics import Metrics
 from slack_github_tracker.protocols import Logger
 
+from .. import github
 from . import _interpret as interpret
 from . import _tracking as tracking
 
@@ -15,6 +17,14 @@ from . import _tracking as tracking
 class Deps:
     logger: Logger
     database: AsyncEngine
+    metrics: Metrics = attrs.field(factory=Metrics)
+    tracked_prs: storage.TrackedPRs | None = None
+
+    # Used instead of storage made from the database when provided
+    pr_storage: storage.protocols.Storage | None = None
+
+    # Fetches the current state of PRs that start being tracked
+    pr_backfill: github.protocols.Backfill | None = None
 
 
 def register_slack_handlers(deps: Deps, app: slack_bolt.async_app.AsyncApp) -> None:
@@ -24,7 +34,14 @@ def register_slack_handlers(deps: Deps, app: slack_bolt.async_app.AsyncApp) -> N
         ),
     )
     app.command("/track_pr")(
-        track_pr(logger=deps.logger, storage=storage.Storage(deps.database)).from_deserializer(
+        track_pr(
+            logger=deps.logger,
+            storage=(
+                deps.pr_storage
+                or storage.Storage(deps.database, metrics=deps.metrics, tracked=deps.tracked_prs)
+            ),
+            backfill=deps.pr_backfill,
+        ).from_deserializer(
             tracking.TrackPRMessageDeserializer(),
         ),
     )
@@ -48,6 +65,7 @@ class track_pr(interpret.CommandInterpreter[tracking.TrackPRMessage]):
         async def store_pr_request(self, pr_request: storage.protocols.PRRequest) -> None: ...
 
     storage: _StorePRRequest
+    backfill: github.protocols.Backfill | None = None
 
     async def respond(
         self,
@@ -63,5 +81,7 @@ class track_pr(interpret.CommandInterpreter[tracking.TrackPRMessage]):
                 channel_id=command.raw_command.channel_id,
             )
         )
+        if self.backfill is not None:
+            self.backfill.request(command.pr_to_track)
         await say(f"Tracking {command.pr_to_track.display}")
         await respond(f"Hi <@{command.raw_command.user_id}>!")
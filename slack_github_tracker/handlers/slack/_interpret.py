@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING, cast
 
 import attrs
 import cattrs
-import slack_bolt
+import slack_bolt.async_app
 from attrs import AttrsInstance, has
 from cattrs import Converter
 from cattrs.gen import make_dict_structure_fn
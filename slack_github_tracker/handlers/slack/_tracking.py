@@ -3,10 +3,19 @@ from urllib import parse
 
 import attrs
 
+from slack_github_tracker import storage
+
 from . import _interpret as interpret
 from . import _protocols as protocols
 
 
+def display(pr: storage.protocols.PR) -> str:
+    """
+    Return how a PR is shown in messages to slack
+    """
+    return f"PR#{pr.pr_number} in {pr.organisation}/{pr.repo}"
+
+
 @attrs.define
 class InvalidPR(interpret.CommandError):
     command: str
@@ -23,7 +32,7 @@ class PR:
 
     @property
     def display(self) -> str:
-        return f"PR#{self.pr_number} in {self.organisation}/{self.repo}"
+        return display(self)
 
     @classmethod
     def from_text(cls, text: str) -> Self:
@@ -1,7 +1,10 @@
 import abc
 import asyncio
 import logging
+import pathlib
 import signal
+import socket
+from collections.abc import Callable
 from types import SimpleNamespace
 
 import attrs
@@ -13,7 +16,9 @@ from hypercorn.config import Config
 from machinery import helpers as hp
 from sqlalchemy.ext.asyncio import create_async_engine
 
-from . import handlers, protocols
+from . import github_api, handlers, metrics, protocols, storage, tracing
+from .metrics import Metrics
+from .options import EventLoop, SlackTransport
 
 
 @attrs.frozen
@@ -25,6 +30,31 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
     port: int
     logger: protocols.Logger
     graceful_timeout_seconds: int = 600
+    digest_interval_seconds: float = 900
+    digest_channels: frozenset[str] = frozenset()
+    slack_transport: SlackTransport = SlackTransport.HTTP
+    slack_app_token: str | None = None
+    shared_delivery_dedup: bool = False
+    workers: int = 1
+    event_loop: EventLoop = EventLoop.ASYNCIO
+    metrics: Metrics = attrs.field(factory=Metrics)
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    ready_max_event_backlog: int = 1000
+    ready_max_pool_usage: float = 0.9
+    ready_max_loop_lag_seconds: float = 0.5
+    slow_event_seconds: float = 5
+    otlp_endpoint: str | None = None
+    tracked_prs_refresh_seconds: float = 30
+    record_deliveries_dir: pathlib.Path | None = None
+    record_deliveries_max_bytes: int = 1024 * 1024 * 1024
+    record_deliveries_max_age_seconds: float = 7 * 24 * 3600
+    github_token: str | None = None
+    github_api_url: str = "https://api.github.com"
+    pr_backfill_concurrency: int = 4
+    github_tenants_file: pathlib.Path | None = None
+    max_events_in_progress: int = 32
+    drain_grace_seconds: float = 5
 
     def serve_forever(self) -> None:
         config = self.make_hypercorn_config()
@@ -32,13 +62,59 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
 
         database = self.make_database()
         background_tasks = self.make_background_tasks()
-        events_handler = self.make_events_handler()
+        job_scheduler = self.make_job_scheduler()
+        self.configure_job_scheduler(
+            job_scheduler=job_scheduler, background_tasks=background_tasks
+        )
+        trace_exporter = self.make_trace_exporter()
+        self.configure_trace_exporter(
+            trace_exporter=trace_exporter, background_tasks=background_tasks
+        )
+        pr_versions = self.make_pr_versions()
+        self.configure_pr_versions(
+            pr_versions=pr_versions, database=database, background_tasks=background_tasks
+        )
+        pr_reviews = self.make_pr_reviews()
+        github_tenants = self.make_github_tenants()
+        events_handler = self.make_events_handler(
+            tracer=self.make_tracer(trace_exporter=trace_exporter),
+            pr_versions=pr_versions,
+            github_tenants=github_tenants,
+        )
+        digest_scheduler = self.make_digest_scheduler()
 
         github_event_interpreter = self.make_github_event_interpreter(
-            database=database, background_tasks=background_tasks
+            database=database, background_tasks=background_tasks, pr_reviews=pr_reviews
         )
+        tracked_prs = self.make_tracked_prs(database=database)
+        self.configure_tracked_prs(tracked_prs=tracked_prs, job_scheduler=job_scheduler)
         github_webhooks = self.make_github_webhooks(
-            events_handler=events_handler, github_event_interpreter=github_event_interpreter
+            events_handler=events_handler,
+            github_event_interpreter=github_event_interpreter,
+            tracked_prs=tracked_prs,
+            github_tenants=github_tenants,
+        )
+        github_deliveries = self.make_github_deliveries(database=database)
+        github_recorder = self.make_github_recorder()
+        self.configure_github_recorder(
+            github_recorder=github_recorder, background_tasks=background_tasks
+        )
+        self.configure_github_deliveries(
+            github_deliveries=github_deliveries, job_scheduler=job_scheduler
+        )
+
+        github_client = self.make_github_client()
+        self.configure_github_client(
+            github_client=github_client, background_tasks=background_tasks
+        )
+        pr_backfill = self.make_pr_backfill(
+            database=database,
+            github_client=github_client,
+            pr_versions=pr_versions,
+            pr_reviews=pr_reviews,
+        )
+        self.configure_pr_backfill(
+            pr_backfill=pr_backfill, pr_versions=pr_versions, background_tasks=background_tasks
         )
 
         slack_app = self.make_slack_app()
@@ -47,6 +123,24 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
             database=database,
             github_webhooks=github_webhooks,
             background_tasks=background_tasks,
+            tracked_prs=tracked_prs,
+            pr_backfill=pr_backfill,
+        )
+
+        self.configure_slack_transport(slack_app=slack_app, background_tasks=background_tasks)
+
+        drain = self.make_drain(
+            events_handler=events_handler,
+            digest_scheduler=digest_scheduler,
+            github_deliveries=github_deliveries,
+            slack_app=slack_app,
+            trace_exporter=trace_exporter,
+        )
+
+        loop_lag = self.make_loop_lag()
+        self.configure_loop_lag(loop_lag=loop_lag, background_tasks=background_tasks)
+        readiness = self.make_readiness(
+            events_handler=events_handler, database=database, loop_lag=loop_lag, drain=drain
         )
 
         app = self.make_sanic_app()
@@ -55,19 +149,50 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
             slack_app=slack_app,
             database=database,
             github_webhooks=github_webhooks,
+            github_deliveries=github_deliveries,
+            github_recorder=github_recorder,
             background_tasks=background_tasks,
+            readiness=readiness,
+        )
+
+        self.configure_digest_scheduler(
+            digest_scheduler=digest_scheduler,
+            slack_app=slack_app,
+            job_scheduler=job_scheduler,
         )
 
         self.configure_events_handler(
             events_handler=events_handler,
+            pr_versions=pr_versions,
             app=app,
             slack_app=slack_app,
             database=database,
             github_webhooks=github_webhooks,
             background_tasks=background_tasks,
+            digest_scheduler=digest_scheduler,
         )
 
-        asyncio.run(self.serve_app(app=app, config=config, background_tasks=background_tasks))
+        with asyncio.Runner(loop_factory=self.make_event_loop_factory()) as runner:
+            # machinery finds the loop through the event loop policy, which the
+            # runner only sets up for us when it makes the default loop
+            asyncio.set_event_loop(runner.get_loop())
+            runner.run(
+                self.serve_app(
+                    app=app, config=config, background_tasks=background_tasks, drain=drain
+                )
+            )
+
+    def make_event_loop_factory(self) -> Callable[[], asyncio.AbstractEventLoop] | None:
+        if self.event_loop is EventLoop.UVLOOP:
+            try:
+                import uvloop
+            except ImportError as e:
+                raise RuntimeError(
+                    "uvloop is not installed, install slack-github-tracker[uvloop] to use it"
+                ) from e
+            return uvloop.new_event_loop
+
+        return None
 
     def make_slack_app(self) -> slack_bolt.async_app.AsyncApp:
         return slack_bolt.async_app.AsyncApp(
@@ -83,7 +208,43 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
     def make_database(self) -> sqlalchemy.ext.asyncio.AsyncEngine:
         postgres_url = sqlalchemy.engine.url.make_url(self.postgres_url)
         postgres_url = postgres_url.set(drivername="postgresql+psycopg")
-        return create_async_engine(postgres_url)
+        database = create_async_engine(
+            postgres_url,
+            pool_size=self.database_pool_size,
+            max_overflow=self.database_max_overflow,
+        )
+        self.configure_database_metrics(database)
+        return database
+
+    def make_storage(
+        self,
+        *,
+        database: sqlalchemy.ext.asyncio.AsyncEngine,
+        tracked_prs: storage.TrackedPRs | None = None,
+    ) -> storage.protocols.Storage:
+        return storage.Storage(database, metrics=self.metrics, tracked=tracked_prs)
+
+    def configure_database_metrics(self, database: sqlalchemy.ext.asyncio.AsyncEngine) -> None:
+        pool = database.sync_engine.pool
+        if not isinstance(pool, sqlalchemy.pool.QueuePool):
+            return
+
+        self.metrics.callback(
+            "database_pool_size", "Connections the pool keeps open", metrics.Kind.GAUGE, pool.size
+        )
+        self.metrics.callback(
+            "database_pool_checked_out",
+            "Connections currently in use",
+            metrics.Kind.GAUGE,
+            pool.checkedout,
+        )
+        self.metrics.callback(
+            "database_pool_overflow",
+            "Connections open beyond the size of the pool",
+            metrics.Kind.GAUGE,
+            # The pool counts overflow from minus its size until the pool is full
+            lambda: max(pool.overflow(), 0),
+        )
 
     def make_background_tasks(self) -> handlers.background.tasks.Tasks:
         return handlers.background.tasks.Tasks(logger=self.logger)
@@ -93,31 +254,364 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
         *,
         database: sqlalchemy.ext.asyncio.AsyncEngine,
         background_tasks: handlers.background.protocols.TasksAdder,
+        pr_reviews: handlers.github.reviews.Reviews,
     ) -> handlers.github.protocols.EventInterpreter:
-        return handlers.github.interpret.EventInterpreter()
+        interpret = handlers.github.interpret
+        return interpret.EventInterpreter(
+            pull_request_review=interpret.pull_request_review.PullRequestReviewEventInterpreter(
+                reviews=pr_reviews
+            )
+        )
+
+    def make_pr_reviews(self) -> handlers.github.reviews.Reviews:
+        return handlers.github.reviews.Reviews()
+
+    def make_github_client(self) -> github_api.GithubClient | None:
+        if self.github_token is None:
+            return None
+        return github_api.GithubClient(
+            logger=self.logger,
+            token=self.github_token,
+            base_url=self.github_api_url,
+            metrics=self.metrics,
+        )
+
+    def configure_github_client(
+        self,
+        *,
+        github_client: github_api.GithubClient | None,
+        background_tasks: handlers.background.protocols.TasksAdder,
+    ) -> None:
+        if github_client is None:
+            return
+
+        def close_github_client(
+            final_future: asyncio.Future[None], task_holder: hp.TaskHolder
+        ) -> None:
+            async def close() -> None:
+                try:
+                    await asyncio.wait([final_future])
+                finally:
+                    await github_client.close()
+
+            task_holder.add(close())
+
+        background_tasks.append(close_github_client)
+
+    def make_pr_backfill(
+        self,
+        *,
+        database: sqlalchemy.ext.asyncio.AsyncEngine,
+        github_client: github_api.GithubClient | None,
+        pr_versions: handlers.github.versions.PRVersions,
+        pr_reviews: handlers.github.reviews.Reviews,
+    ) -> handlers.github.backfill.Backfill | None:
+        # Without a token there's too small a rate limit to spend on backfills
+        if github_client is None:
+            return None
+
+        return handlers.github.backfill.Backfill(
+            logger=self.logger,
+            github=github_client,
+            storage=self.make_storage(database=database),
+            versions=pr_versions,
+            reviews=pr_reviews,
+            metrics=self.metrics,
+            max_concurrent=self.pr_backfill_concurrency,
+        )
+
+    def configure_pr_backfill(
+        self,
+        *,
+        pr_backfill: handlers.github.backfill.Backfill | None,
+        pr_versions: handlers.github.versions.PRVersions,
+        background_tasks: handlers.background.protocols.TasksAdder,
+    ) -> None:
+        if pr_backfill is None:
+            return
+
+        async def run(final_future: asyncio.Future[None], task_holder: hp.TaskHolder) -> None:
+            # What is fetched goes through the versions like a webhook does
+            await pr_versions.wait_for_load()
+            await pr_backfill.run(final_future=final_future, task_holder=task_holder)
+
+        def run_pr_backfill(
+            final_future: asyncio.Future[None], task_holder: hp.TaskHolder
+        ) -> None:
+            task_holder.add(run(final_future, task_holder))
+
+        background_tasks.append(run_pr_backfill)
+
+    def make_trace_exporter(self) -> tracing.OTLPExporter | None:
+        if self.otlp_endpoint is None:
+            return None
+        return tracing.OTLPExporter(logger=self.logger, endpoint=self.otlp_endpoint)
+
+    def make_tracer(self, *, trace_exporter: tracing.Exporter | None) -> tracing.Tracer:
+        return tracing.Tracer(
+            logger=self.logger, slow_seconds=self.slow_event_seconds, exporter=trace_exporter
+        )
+
+    def make_events_handler(
+        self,
+        *,
+        tracer: tracing.Tracer,
+        pr_versions: handlers.github.versions.PRVersions,
+        github_tenants: handlers.github.tenants.Tenants,
+    ) -> handlers.github.handler.EventHandler:
+        return handlers.github.handler.EventHandler(
+            logger=self.logger,
+            metrics=self.metrics,
+            tracer=tracer,
+            versions=pr_versions,
+            tenant_weights=github_tenants.weights,
+            max_in_progress=self.max_events_in_progress,
+        )
+
+    def make_github_tenants(self) -> handlers.github.tenants.Tenants:
+        if self.github_tenants_file is None:
+            return handlers.github.tenants.Tenants(default_secret=self.github_webhook_secret)
+        return handlers.github.tenants.Tenants.from_file(
+            self.github_tenants_file, default_secret=self.github_webhook_secret
+        )
+
+    def make_pr_versions(self) -> handlers.github.versions.PRVersions:
+        return handlers.github.versions.PRVersions(logger=self.logger)
+
+    def configure_pr_versions(
+        self,
+        *,
+        pr_versions: handlers.github.versions.PRVersions,
+        database: sqlalchemy.ext.asyncio.AsyncEngine,
+        background_tasks: handlers.background.protocols.TasksAdder,
+    ) -> None:
+        def load_pr_versions(
+            final_future: asyncio.Future[None], task_holder: hp.TaskHolder
+        ) -> None:
+            task_holder.add(pr_versions.load(self.make_storage(database=database)))
+
+        background_tasks.append(load_pr_versions)
+
+    def make_loop_lag(self) -> handlers.server.LoopLag:
+        loop_lag = handlers.server.LoopLag()
+        self.metrics.callback(
+            "event_loop_lag_seconds",
+            "How late the event loop was to wake up a sleeping task",
+            metrics.Kind.GAUGE,
+            lambda: loop_lag.lag,
+        )
+        return loop_lag
+
+    def make_readiness(
+        self,
+        *,
+        events_handler: handlers.github.handler.EventHandler,
+        database: sqlalchemy.ext.asyncio.AsyncEngine,
+        loop_lag: handlers.server.LoopLag,
+        drain: handlers.server.Drain,
+    ) -> handlers.server.Readiness:
+        checks = [
+            handlers.server.Check(name="stopping", read=lambda: int(drain.stopping), threshold=0),
+            handlers.server.Check(
+                name="event_backlog",
+                read=lambda: events_handler.backlog,
+                threshold=self.ready_max_event_backlog,
+            ),
+            handlers.server.Check(
+                name="event_loop_lag_seconds",
+                read=lambda: loop_lag.lag,
+                threshold=self.ready_max_loop_lag_seconds,
+            ),
+        ]
 
-    def make_events_handler(self) -> handlers.github.handler.EventHandler:
-        return handlers.github.handler.EventHandler(logger=self.logger)
+        pool = database.sync_engine.pool
+        if isinstance(pool, sqlalchemy.pool.QueuePool):
+            capacity = self.database_pool_size + self.database_max_overflow
+            checks.append(
+                handlers.server.Check(
+                    name="database_pool_usage",
+                    read=lambda: pool.checkedout() / capacity,
+                    threshold=self.ready_max_pool_usage,
+                )
+            )
+
+        return handlers.server.Readiness(checks=checks)
+
+    def make_drain(
+        self,
+        *,
+        events_handler: handlers.github.handler.EventHandler,
+        digest_scheduler: handlers.digest.scheduler.DigestScheduler,
+        github_deliveries: handlers.github.deliveries.Deliveries,
+        slack_app: slack_bolt.async_app.AsyncApp,
+        trace_exporter: tracing.OTLPExporter | None,
+    ) -> handlers.server.Drain:
+        async def flush_digests() -> None:
+            await digest_scheduler.flush(slack_app.client)
+
+        steps = [
+            # Processing events may add to the digests, so they go first
+            handlers.server.DrainStep(
+                name="github_events",
+                remaining=lambda: events_handler.backlog,
+                abandon=events_handler.abandon,
+            ),
+            handlers.server.DrainStep(
+                name="digests",
+                remaining=lambda: digest_scheduler.pending,
+                flush=flush_digests,
+                abandon=digest_scheduler.abandon,
+            ),
+            handlers.server.DrainStep(
+                name="github_deliveries",
+                remaining=lambda: github_deliveries.unstored,
+                flush=github_deliveries.flush,
+            ),
+        ]
+
+        if trace_exporter is not None:
+            steps.append(
+                handlers.server.DrainStep(
+                    name="traces",
+                    remaining=lambda: trace_exporter.pending,
+                    flush=trace_exporter.flush,
+                )
+            )
+
+        return handlers.server.Drain(
+            logger=self.logger, steps=steps, grace_seconds=self.drain_grace_seconds
+        )
+
+    def make_slack_retries(self) -> handlers.server.SlackRetries:
+        return handlers.server.SlackRetries()
+
+    def make_job_scheduler(self) -> handlers.background.scheduler.Scheduler:
+        return handlers.background.scheduler.Scheduler(logger=self.logger, metrics=self.metrics)
+
+    def configure_job_scheduler(
+        self,
+        *,
+        job_scheduler: handlers.background.scheduler.Scheduler,
+        background_tasks: handlers.background.protocols.TasksAdder,
+    ) -> None:
+        background_tasks.append(job_scheduler)
+
+    def make_digest_scheduler(self) -> handlers.digest.scheduler.DigestScheduler:
+        return handlers.digest.scheduler.DigestScheduler(
+            logger=self.logger,
+            interval=self.digest_interval_seconds,
+            channels=self.digest_channels,
+        )
 
     def make_github_webhooks(
         self,
         *,
         events_handler: handlers.github.protocols.EventHandler,
         github_event_interpreter: handlers.github.protocols.EventInterpreter,
+        tracked_prs: storage.TrackedPRs,
+        github_tenants: handlers.github.tenants.Tenants,
     ) -> handlers.github.hooks.Hooks:
         return handlers.github.hooks.Hooks(
             logger=self.logger,
-            secret=self.github_webhook_secret,
             event_adder=events_handler,
             event_interpreter=github_event_interpreter,
+            tracked=tracked_prs,
+            tenants=github_tenants,
+        )
+
+    def make_tracked_prs(
+        self, *, database: sqlalchemy.ext.asyncio.AsyncEngine
+    ) -> storage.TrackedPRs:
+        # Other processes add to the database when they are asked to track a PR
+        tracked_prs = storage.TrackedPRs(
+            logger=self.logger, source=self.make_storage(database=database)
+        )
+        self.metrics.callback(
+            "tracked_prs",
+            "PRs that webhooks are accepted for",
+            metrics.Kind.GAUGE,
+            lambda: len(tracked_prs),
+        )
+        return tracked_prs
+
+    def configure_tracked_prs(
+        self,
+        *,
+        tracked_prs: storage.TrackedPRs,
+        job_scheduler: handlers.background.scheduler.Scheduler,
+    ) -> None:
+        job_scheduler.add(
+            handlers.background.scheduler.Job(
+                name="tracked_prs",
+                schedule=handlers.background.scheduler.Interval(self.tracked_prs_refresh_seconds),
+                run=tracked_prs.load,
+                run_at_start=True,
+            )
+        )
+
+    def make_github_deliveries(
+        self, *, database: sqlalchemy.ext.asyncio.AsyncEngine
+    ) -> handlers.github.deliveries.Deliveries:
+        deliveries = handlers.github.deliveries.Deliveries(
+            logger=self.logger,
+            storage=self.make_storage(database=database) if self.shared_delivery_dedup else None,
+        )
+        self.metrics.callback(
+            "github_deliveries_deduplicated_total",
+            "Github redeliveries that were recognised by their delivery id",
+            metrics.Kind.COUNTER,
+            lambda: deliveries.duplicates,
+        )
+        self.metrics.callback(
+            "github_deliveries_unstored_dropped_total",
+            "Github delivery ids dropped before they could be stored in the database",
+            metrics.Kind.COUNTER,
+            lambda: deliveries.dropped,
         )
+        return deliveries
+
+    def make_github_recorder(self) -> handlers.github.recorder.DeliveryRecorder | None:
+        if self.record_deliveries_dir is None:
+            return None
+
+        return handlers.github.recorder.DeliveryRecorder(
+            logger=self.logger,
+            directory=self.record_deliveries_dir,
+            metrics=self.metrics,
+            max_total_bytes=self.record_deliveries_max_bytes,
+            max_age_seconds=self.record_deliveries_max_age_seconds,
+        )
+
+    def configure_github_recorder(
+        self,
+        *,
+        github_recorder: handlers.github.recorder.DeliveryRecorder | None,
+        background_tasks: handlers.background.protocols.TasksAdder,
+    ) -> None:
+        if github_recorder is not None:
+            background_tasks.append(github_recorder)
 
     def configure_hypercorn_config(self, config: Config) -> Config:
         config.accesslog = logging.getLogger("hypercorn.access")
         config.errorlog = logging.getLogger("hypercorn.access")
         config.bind = [f"127.0.0.1:{self.port}"]
+        if self.workers > 1:
+            config.bind = [f"fd://{self.make_reuse_port_socket()}"]
         return config
 
+    def make_reuse_port_socket(self) -> int:
+        """
+        Each worker process binds its own socket to the same port and the
+        kernel shares incoming connections between them.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.bind(("127.0.0.1", self.port))
+        # Hypercorn makes its own socket object from the file descriptor
+        return sock.detach()
+
     def configure_slack_app(
         self,
         *,
@@ -125,13 +619,45 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
         database: sqlalchemy.ext.asyncio.AsyncEngine,
         background_tasks: handlers.background.protocols.TasksAdder,
         github_webhooks: handlers.github.hooks.Hooks,
+        tracked_prs: storage.TrackedPRs,
+        pr_backfill: handlers.github.protocols.Backfill | None = None,
     ) -> slack_bolt.async_app.AsyncApp:
         handlers.slack.register_slack_handlers(
-            deps=handlers.slack.Deps(logger=self.logger, database=database),
+            deps=handlers.slack.Deps(
+                logger=self.logger,
+                database=database,
+                metrics=self.metrics,
+                tracked_prs=tracked_prs,
+                pr_storage=self.make_storage(database=database, tracked_prs=tracked_prs),
+                pr_backfill=pr_backfill,
+            ),
             app=slack_app,
         )
         return slack_app
 
+    def configure_slack_transport(
+        self,
+        *,
+        slack_app: slack_bolt.async_app.AsyncApp,
+        background_tasks: handlers.background.protocols.TasksAdder,
+    ) -> None:
+        if self.slack_transport is not SlackTransport.SOCKET_MODE:
+            return
+
+        if not self.slack_app_token:
+            raise ValueError("An app level token is required to use slack socket mode")
+
+        socket_mode = handlers.server.SocketMode(
+            logger=self.logger, slack_app=slack_app, app_token=self.slack_app_token
+        )
+
+        def run_socket_mode(
+            final_future: asyncio.Future[None], task_holder: hp.TaskHolder
+        ) -> None:
+            task_holder.add(socket_mode.run(final_future))
+
+        background_tasks.append(run_socket_mode)
+
     def configure_sanic(
         self,
         *,
@@ -140,38 +666,102 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
         database: sqlalchemy.ext.asyncio.AsyncEngine,
         background_tasks: handlers.background.protocols.TasksAdder,
         github_webhooks: handlers.github.hooks.Hooks,
+        github_deliveries: handlers.github.protocols.Deliveries,
+        github_recorder: handlers.github.protocols.DeliveryRecorder | None,
+        readiness: handlers.server.Readiness,
     ) -> sanic.Sanic[T_SanicConfig, T_SanicNamespace]:
         handlers.server.register_sanic_routes(
             logger=self.logger,
             sanic_app=app,
             registry=handlers.server.Registry(
-                slack_app=slack_app, github_webhooks=github_webhooks
+                slack_app=slack_app,
+                github_webhooks=github_webhooks,
+                github_deliveries=github_deliveries,
+                slack_retries=self.make_slack_retries(),
+                metrics=self.metrics,
+                github_recorder=github_recorder,
+                slack_signing_secret=self.slack_signing_secret,
             ),
         )
+        handlers.server.register_metrics_routes(sanic_app=app, metrics=self.metrics)
+        handlers.server.register_health_routes(sanic_app=app, readiness=readiness)
         return app
 
+    def configure_trace_exporter(
+        self,
+        *,
+        trace_exporter: tracing.OTLPExporter | None,
+        background_tasks: handlers.background.protocols.TasksAdder,
+    ) -> None:
+        if trace_exporter is None:
+            return
+
+        def run_trace_exporter(
+            final_future: asyncio.Future[None], task_holder: hp.TaskHolder
+        ) -> None:
+            task_holder.add(trace_exporter.run(final_future=final_future))
+
+        background_tasks.append(run_trace_exporter)
+
+    def configure_loop_lag(
+        self,
+        *,
+        loop_lag: handlers.server.LoopLag,
+        background_tasks: handlers.background.protocols.TasksAdder,
+    ) -> None:
+        def run_loop_lag(final_future: asyncio.Future[None], task_holder: hp.TaskHolder) -> None:
+            task_holder.add(loop_lag.run(final_future))
+
+        background_tasks.append(run_loop_lag)
+
+    def configure_github_deliveries(
+        self,
+        *,
+        github_deliveries: handlers.github.deliveries.Deliveries,
+        job_scheduler: handlers.background.scheduler.Scheduler,
+    ) -> None:
+        for job in github_deliveries.jobs():
+            job_scheduler.add(job)
+
+    def configure_digest_scheduler(
+        self,
+        *,
+        digest_scheduler: handlers.digest.scheduler.DigestScheduler,
+        slack_app: slack_bolt.async_app.AsyncApp,
+        job_scheduler: handlers.background.scheduler.Scheduler,
+    ) -> None:
+        job_scheduler.add(digest_scheduler.job(slack_app.client))
+
     def configure_events_handler(
         self,
         *,
         events_handler: handlers.github.handler.EventHandler,
+        pr_versions: handlers.github.versions.PRVersions,
         app: sanic.Sanic[T_SanicConfig, T_SanicNamespace],
         slack_app: slack_bolt.async_app.AsyncApp,
         database: sqlalchemy.ext.asyncio.AsyncEngine,
         background_tasks: handlers.background.protocols.TasksAdder,
         github_webhooks: handlers.github.hooks.Hooks,
+        digest_scheduler: handlers.digest.protocols.Deliverer,
     ) -> None:
+        async def run(final_future: asyncio.Future[None], task_holder: hp.TaskHolder) -> None:
+            # Webhooks are queued in the meantime, but processing them before the
+            # versions are loaded would let late events skip the staleness check
+            await pr_versions.wait_for_load()
+            await events_handler.run(
+                final_future=final_future,
+                task_holder=task_holder,
+                database=database,
+                background_tasks=background_tasks,
+                slack_app=slack_app,
+                digest=digest_scheduler,
+                event_storage=self.make_storage(database=database),
+            )
+
         def run_events_handler(
             final_future: asyncio.Future[None], task_holder: hp.TaskHolder
         ) -> None:
-            task_holder.add(
-                events_handler.run(
-                    final_future=final_future,
-                    task_holder=task_holder,
-                    database=database,
-                    background_tasks=background_tasks,
-                    slack_app=slack_app,
-                )
-            )
+            task_holder.add(run(final_future, task_holder))
 
         background_tasks.append(run_events_handler)
 
@@ -181,23 +771,41 @@ class ServerBase[T_SanicConfig: sanic.Config, T_SanicNamespace]:
         app: sanic.Sanic[T_SanicConfig, T_SanicNamespace],
         config: Config,
         background_tasks: handlers.background.tasks.Tasks,
+        drain: handlers.server.Drain,
     ) -> None:
         graceful_handle: asyncio.Handle | None = None
+        deadline: float | None = None
+        self.logger.info("Starting server", event_loop=type(asyncio.get_running_loop()).__module__)
         async with background_tasks.runner() as runner:
-            shutdown_event = asyncio.Event()
+            signalled = asyncio.Event()
 
             def on_sigterm() -> None:
-                nonlocal graceful_handle
-                graceful_handle = asyncio.get_running_loop().call_later(
+                nonlocal graceful_handle, deadline
+                if signalled.is_set():
+                    return
+
+                drain.stopping = True
+                loop = asyncio.get_running_loop()
+                # The drain gives up a little early so it can log what it didn't finish
+                # before the background tasks are cancelled
+                deadline = loop.time() + max(0, self.graceful_timeout_seconds - 1)
+                graceful_handle = loop.call_later(
                     self.graceful_timeout_seconds, runner.final_fut.cancel
                 )
-                shutdown_event.set()
+                signalled.set()
+
+            async def shutdown_trigger() -> None:
+                await signalled.wait()
+                await drain.stop_accepting()
 
             asyncio.get_running_loop().add_signal_handler(signal.SIGINT, on_sigterm)
             asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, on_sigterm)
 
             try:
-                await hypercorn_serve(app, config, shutdown_trigger=shutdown_event.wait)
+                # Stops accepting connections and finishes the requests already in flight
+                await hypercorn_serve(app, config, shutdown_trigger=shutdown_trigger)
+                if deadline is not None:
+                    await drain.run(deadline=deadline)
             finally:
                 runner.final_fut.cancel()
 
@@ -0,0 +1,139 @@
+import atexit
+import collections
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from collections.abc import Callable
+
+import attrs
+import structlog
+
+
+def capture_exc_info(
+    logger: object, method_name: str, event_dict: structlog.typing.EventDict
+) -> structlog.typing.EventDict:
+    """
+    A structlog processor that resolves ``exc_info=True`` to the exception
+    being handled.
+
+    This has to happen in the thread that logged the exception, before the
+    record is handed to another thread to be rendered.
+    """
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The default implementation formats the record here, which is the work
+        # we want to move to the listener thread. Records from structlog hold
+        # the event dictionary as their msg and are left as they are.
+        if isinstance(record.msg, dict):
+            return record
+
+        # Records from other libraries have their message merged now in case
+        # their arguments change before the listener gets to them
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# The listeners that haven't been stopped and the handlers that feed them
+_listeners: dict[logging.handlers.QueueListener, _QueueHandler] = {}
+
+
+def _restart_listeners_in_child() -> None:
+    # Listener threads don't exist in a forked process
+    for listener, queue_handler in _listeners.items():
+        listener.queue = queue_handler.queue = queue.SimpleQueue()
+        listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_listeners_in_child)
+
+
+def queued(handler: logging.Handler) -> logging.Handler:
+    """
+    Return a handler that puts records on a queue for a listener thread to
+    pass on to ``handler``.
+
+    The caller of the returned handler only pays for putting the record on the
+    queue. Formatting the record and writing it out happens in the listener.
+
+    A forked process gets its own queue and listener thread. Use
+    ``stop_listeners`` before the process exits to write out what is left on
+    the queue.
+    """
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    queue_handler = _QueueHandler(records)
+
+    listener.start()
+    _listeners[listener] = queue_handler
+    return queue_handler
+
+
+@atexit.register
+def stop_listeners() -> None:
+    """
+    Write out the records already on the queues and stop the listener threads
+    """
+    while _listeners:
+        listener, _ = _listeners.popitem()
+        listener.stop()
+
+
+@attrs.define
+class _Bucket:
+    tokens: float
+    updated: float
+    suppressed: int = 0
+
+
+@attrs.define
+class RateSampler:
+    """
+    Limits how often a log is made for each key.
+
+    Each key may log ``burst`` times in quick succession and then
+    ``per_second`` times a second after that. ``sample`` returns ``None`` when
+    the log should be skipped, otherwise it returns how many logs for that key
+    were skipped since the last one that was made.
+
+    Only the ``maxsize`` most recently used keys are remembered.
+    """
+
+    per_second: float = 1
+    burst: int = 10
+    maxsize: int = 1000
+    clock: Callable[[], float] = time.monotonic
+
+    _buckets: collections.OrderedDict[str, _Bucket] = attrs.field(
+        init=False, factory=collections.OrderedDict
+    )
+
+    def sample(self, key: str) -> int | None:
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(tokens=self.burst, updated=now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(
+                self.burst, bucket.tokens + (now - bucket.updated) * self.per_second
+            )
+            bucket.updated = now
+
+        if bucket.tokens < 1:
+            bucket.suppressed += 1
+            return None
+
+        bucket.tokens -= 1
+        suppressed, bucket.suppressed = bucket.suppressed, 0
+        return suppressed
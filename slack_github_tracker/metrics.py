@@ -0,0 +1,240 @@
+import bisect
+import contextlib
+import enum
+import math
+import time
+from collections.abc import Callable, Iterator, Sequence
+
+import attrs
+
+# Seconds, from a fraction of a millisecond up to the slow end of a Slack api call
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+
+class Kind(enum.Enum):
+    COUNTER = "counter"
+    GAUGE = "gauge"
+    HISTOGRAM = "histogram"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    joined = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return f"{{{joined}}}"
+
+
+@attrs.define
+class Counter:
+    name: str
+    help: str
+    labelnames: tuple[str, ...] = ()
+
+    _values: dict[tuple[str, ...], float] = attrs.field(init=False, factory=dict)
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+@attrs.define
+class Gauge:
+    name: str
+    help: str
+    labelnames: tuple[str, ...] = ()
+
+    _values: dict[tuple[str, ...], float] = attrs.field(init=False, factory=dict)
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+@attrs.define
+class _HistogramValues:
+    counts: list[int]
+    sum: float = 0
+
+
+@attrs.define
+class Histogram:
+    name: str
+    help: str
+    labelnames: tuple[str, ...] = ()
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+
+    _values: dict[tuple[str, ...], _HistogramValues] = attrs.field(init=False, factory=dict)
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._values.get(labels)
+        if values is None:
+            # The last count is for values above every bucket
+            values = self._values[labels] = _HistogramValues(counts=[0] * (len(self.buckets) + 1))
+
+        values.counts[bisect.bisect_left(self.buckets, value)] += 1
+        values.sum += value
+
+    @contextlib.contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels: str) -> int:
+        values = self._values.get(labels)
+        return 0 if values is None else sum(values.counts)
+
+    def samples(self) -> Iterator[str]:
+        names = (*self.labelnames, "le")
+        for labels, values in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), values.counts, strict=True):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket{_format_labels(names, (*labels, _format_value(bound)))}"
+                    f" {cumulative}"
+                )
+            formatted = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{formatted} {_format_value(values.sum)}"
+            yield f"{self.name}_count{formatted} {cumulative}"
+
+
+@attrs.define
+class Callback:
+    """
+    A metric that is read when the metrics are rendered rather than recorded
+    as things happen. Used for values that something else already keeps track
+    of, like the size of a queue.
+    """
+
+    name: str
+    help: str
+    kind: Kind
+    read: Callable[[], float]
+
+    def samples(self) -> Iterator[str]:
+        yield f"{self.name} {_format_value(self.read())}"
+
+
+type Metric = Counter | Gauge | Histogram | Callback
+
+
+def _kind(metric: Metric) -> Kind:
+    match metric:
+        case Counter():
+            return Kind.COUNTER
+        case Gauge():
+            return Kind.GAUGE
+        case Histogram():
+            return Kind.HISTOGRAM
+        case Callback():
+            return metric.kind
+
+
+@attrs.define
+class Metrics:
+    """
+    Holds the metrics for this process and renders them in the Prometheus text
+    format.
+
+    Recording a sample is a dictionary lookup and some arithmetic with no
+    locking. Everything that records metrics runs on the event loop thread, and
+    each worker process has its own ``Metrics``.
+
+    Asking for a metric that already exists returns the existing metric so
+    that each component can ask for the metrics it records into.
+    """
+
+    _metrics: dict[str, Metric] = attrs.field(init=False, factory=dict)
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name=name, help=help, labelnames=labelnames), Counter)
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name=name, help=help, labelnames=labelnames), Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(
+            Histogram(name=name, help=help, labelnames=labelnames, buckets=buckets), Histogram
+        )
+
+    def callback(self, name: str, help: str, kind: Kind, read: Callable[[], float]) -> Callback:
+        callback = Callback(name=name, help=help, kind=kind, read=read)
+        # Callbacks are replaced so they always read from the latest object
+        self._metrics[name] = callback
+        return callback
+
+    def _register[T_Metric: Counter | Gauge | Histogram](
+        self, metric: T_Metric, kls: type[T_Metric]
+    ) -> T_Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is None:
+            self._metrics[metric.name] = metric
+            return metric
+
+        if not isinstance(existing, kls):
+            raise TypeError(f"Metric {metric.name} is already registered as a {_kind(existing)}")
+        return existing
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {name} {_kind(metric).value}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
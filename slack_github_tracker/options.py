@@ -0,0 +1,24 @@
+"""
+Choices for the server that the command line needs to know about.
+
+These live apart from ``http_server`` so the command line can offer them
+without importing the server and everything it depends on.
+"""
+
+import enum
+
+
+class SlackTransport(enum.Enum):
+    # Slack sends events to the /slack/events route
+    HTTP = "http"
+
+    # We hold open a websocket to Slack and events come through that
+    SOCKET_MODE = "socket_mode"
+
+
+class EventLoop(enum.Enum):
+    # The event loop from the standard library
+    ASYNCIO = "asyncio"
+
+    # The event loop from the optional uvloop dependency
+    UVLOOP = "uvloop"
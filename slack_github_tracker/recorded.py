@@ -0,0 +1,124 @@
+"""
+Webhooks from github that were recorded to files, like those in
+``tests/fixtures/github``.
+
+Each file starts with a preamble, then a header per line written as
+``:<name>: <value>``, then an empty line, then the body exactly as github sent
+it.
+
+Webhooks written by ``github.recorder.DeliveryRecorder`` can be read from its
+segment files or from the folder it writes to.
+"""
+
+import itertools
+import json
+import pathlib
+import uuid
+from collections.abc import Iterable
+
+import attrs
+
+from .handlers import github
+from .protocols import Logger
+
+
+@attrs.frozen
+class RecordedWebhook:
+    name: str
+    headers: dict[str, str]
+    body: bytes
+
+    @classmethod
+    def from_file(cls, path: pathlib.Path) -> "RecordedWebhook":
+        headers: dict[str, str] = {}
+        lines = iter(path.read_bytes().split(b"\n"))
+
+        for line in lines:
+            if line.startswith(b":"):
+                break
+        else:
+            raise ValueError(f"No headers found in {path}")
+
+        for line in itertools.chain([line], lines):
+            if not line:
+                break
+            name, _, value = line[1:].decode().partition(": ")
+            headers[name] = value
+
+        return cls(name=path.name, headers=headers, body=b"\n".join(lines))
+
+    @classmethod
+    def from_delivery(cls, delivery: github.recorder.RecordedDelivery) -> "RecordedWebhook":
+        return cls(name=delivery.delivery, headers=delivery.headers, body=delivery.body)
+
+    def dump(self) -> bytes:
+        """
+        Return this webhook in the format read by ``from_file``
+        """
+        preamble = f"Recorded github webhook {self.name}\n\n".encode()
+        headers = "".join(f":{name}: {value}\n" for name, value in self.headers.items())
+        return preamble + headers.encode() + b"\n" + self.body
+
+    @property
+    def event(self) -> str:
+        return self.headers["x-github-event"]
+
+    def signed(self, secret: str) -> dict[str, str]:
+        """
+        Return headers for sending this webhook with a unique delivery id and
+        a signature made with this secret.
+        """
+        headers = {
+            name: value
+            for name, value in self.headers.items()
+            if name.startswith("x-github-") or name in ("user-agent", "content-type")
+        }
+        headers["x-github-delivery"] = str(uuid.uuid4())
+        headers["x-hub-signature-256"] = github.hooks.signature(secret, self.body)
+        return headers
+
+    def incoming(self, logger: Logger) -> github.hooks.Incoming:
+        """
+        Return what the webhook route would give to ``Hooks.register`` for this webhook
+        """
+        return github.hooks.Incoming(
+            body=json.loads(self.body),
+            logger=logger,
+            event=self.event,
+            hook_id=self.headers["x-github-hook-id"],
+            delivery=self.headers["x-github-delivery"],
+            hook_installation_target_id=self.headers["x-github-hook-installation-target-id"],
+            hook_installation_target_type=self.headers["x-github-hook-installation-target-type"],
+        )
+
+
+def from_directory(directory: pathlib.Path) -> list[RecordedWebhook]:
+    if any(directory.glob("*.gz")):
+        return [
+            RecordedWebhook.from_delivery(delivery)
+            for delivery in github.recorder.DeliveryLog(directory)
+        ]
+    return [RecordedWebhook.from_file(path) for path in sorted(directory.iterdir())]
+
+
+def from_segment(segment: pathlib.Path) -> list[RecordedWebhook]:
+    return [
+        RecordedWebhook.from_delivery(delivery)
+        for delivery in github.recorder.read_segment(segment)
+    ]
+
+
+def from_paths(paths: Iterable[pathlib.Path]) -> list[RecordedWebhook]:
+    """
+    Return the webhooks recorded in each path, where a directory holds a
+    recorded webhook per file or the segments of a delivery log
+    """
+    webhooks: list[RecordedWebhook] = []
+    for path in paths:
+        if path.is_dir():
+            webhooks.extend(from_directory(path))
+        elif path.suffix == ".gz":
+            webhooks.extend(from_segment(path))
+        else:
+            webhooks.append(RecordedWebhook.from_file(path))
+    return webhooks
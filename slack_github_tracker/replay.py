@@ -0,0 +1,168 @@
+"""
+Send recorded github webhooks to a running server and measure how it copes.
+
+Each webhook is sent with a new delivery id and signed with the secret the
+server was given, so the server treats every send as a new delivery.
+"""
+
+import asyncio
+import itertools
+import statistics
+import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
+
+import aiohttp
+import attrs
+
+from . import recorded
+
+
+@attrs.define
+class Results:
+    duration: float = 0
+    latencies: list[float] = attrs.field(factory=list)
+    statuses: dict[int, int] = attrs.field(factory=dict)
+
+    # Sends that got no response because the connection failed or timed out
+    errors: int = 0
+
+    def merge(self, other: "Results") -> None:
+        self.duration = max(self.duration, other.duration)
+        self.latencies.extend(other.latencies)
+        self.errors += other.errors
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+    @property
+    def requests_per_second(self) -> float:
+        return len(self.latencies) / self.duration if self.duration else 0
+
+    def percentile(self, percent: float) -> float:
+        if not self.latencies:
+            return 0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "duration_seconds": self.duration,
+            "requests_per_second": self.requests_per_second,
+            "latency_seconds": {
+                "mean": statistics.fmean(self.latencies) if self.latencies else 0,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99),
+                "max": max(self.latencies, default=0),
+            },
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+
+    def summary(self, name: str) -> str:
+        mean = statistics.fmean(self.latencies) if self.latencies else 0
+        return (
+            f"{name}: requests={len(self.latencies)}"
+            f" rps={self.requests_per_second:.1f}"
+            f" mean={mean * 1000:.2f}ms"
+            f" p50={self.percentile(50) * 1000:.2f}ms"
+            f" p90={self.percentile(90) * 1000:.2f}ms"
+            f" p99={self.percentile(99) * 1000:.2f}ms"
+            f" max={max(self.latencies, default=0) * 1000:.2f}ms"
+            f" statuses={dict(sorted(self.statuses.items()))}"
+            f" errors={self.errors}"
+        )
+
+
+async def send(
+    url: str,
+    make_request: Callable[[], tuple[bytes, Mapping[str, str]]],
+    *,
+    concurrency: int,
+    duration: float,
+    rate: float | None = None,
+    total: int | None = None,
+    timeout: float = 30,
+) -> Results:
+    """
+    POST the body and headers returned by ``make_request`` to ``url`` in a
+    loop for ``duration`` seconds or until ``total`` have been sent, with at
+    most ``concurrency`` requests in flight.
+
+    When ``rate`` is given the sends are spread evenly at that many per
+    second. The latency of each send is then measured from when it was meant
+    to start, so a server that falls behind isn't hidden by the sender waiting
+    for it.
+    """
+    results = Results()
+    counter = itertools.count()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        while True:
+            index = next(counter)
+            if total is not None and index >= total:
+                return
+
+            now = time.perf_counter()
+            due = now if rate is None else start + index / rate
+            if due >= deadline:
+                return
+            if due > now:
+                await asyncio.sleep(due - now)
+
+            body, headers = make_request()
+            try:
+                async with session.post(url, data=body, headers=headers) as response:
+                    await response.read()
+            except (aiohttp.ClientError, TimeoutError):
+                results.errors += 1
+                continue
+
+            results.latencies.append(time.perf_counter() - due)
+            results.statuses[response.status] = results.statuses.get(response.status, 0) + 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        results.duration = time.perf_counter() - start
+
+    return results
+
+
+async def send_webhooks(
+    url: str,
+    webhooks: Sequence[recorded.RecordedWebhook],
+    *,
+    secret: str,
+    concurrency: int,
+    duration: float,
+    rate: float | None = None,
+    total: int | None = None,
+    timeout: float = 30,
+) -> Results:
+    """
+    Send the webhooks in a loop with ``send``, each with a new delivery id
+    and signed with ``secret``
+    """
+    if not webhooks:
+        raise ValueError("No webhooks to send")
+
+    cycle: Iterator[recorded.RecordedWebhook] = itertools.cycle(webhooks)
+
+    def make_request() -> tuple[bytes, Mapping[str, str]]:
+        webhook = next(cycle)
+        return webhook.body, webhook.signed(secret)
+
+    return await send(
+        url,
+        make_request,
+        concurrency=concurrency,
+        duration=duration,
+        rate=rate,
+        total=total,
+        timeout=timeout,
+    )
@@ -4,7 +4,9 @@ from . import _protocols as protocols
 from . import _requests as requests
 from ._metadata import metadata
 from ._storage import Storage
+from ._tracked import TrackedPRs
 
 importlib.import_module("._prs", package=__name__)
+importlib.import_module("._deliveries", package=__name__)
 
-__all__ = ["metadata", "protocols", "requests", "Storage"]
+__all__ = ["metadata", "protocols", "requests", "Storage", "TrackedPRs"]
@@ -0,0 +1,12 @@
+import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ._metadata import Base
+
+
+class Delivery(Base):
+    __tablename__ = "github_deliveries"
+
+    delivery_id: Mapped[str] = mapped_column(primary_key=True)
+    received: Mapped[datetime.datetime] = mapped_column(index=True)
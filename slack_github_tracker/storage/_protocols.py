@@ -1,3 +1,5 @@
+import datetime
+from collections.abc import Sequence
 from typing import Protocol
 
 
@@ -23,5 +25,63 @@ class PRRequest(Protocol):
     def channel_id(self) -> str: ...
 
 
+class PRVersion(Protocol):
+    @property
+    def pr(self) -> PR: ...
+
+    @property
+    def updated_at(self) -> datetime.datetime:
+        """When the latest change applied to the PR was made"""
+
+
+class Review(Protocol):
+    @property
+    def pr(self) -> PR: ...
+
+    @property
+    def reviewer(self) -> str: ...
+
+    @property
+    def state(self) -> str:
+        """The latest state of this reviewer's review of the PR"""
+
+    @property
+    def review_id(self) -> int:
+        """The review that set this state"""
+
+    @property
+    def submitted_at(self) -> datetime.datetime: ...
+
+
 class Storage(Protocol):
     async def store_pr_request(self, pr_request: PRRequest, /) -> None: ...
+
+    async def tracked_prs(self, *, added_since: datetime.datetime | None = None) -> Sequence[PR]:
+        """Return every PR that has been tracked, or only those asked for since a time"""
+
+    async def is_tracked(self, pr: PR, /) -> bool:
+        """Return whether any channel has asked to track this PR"""
+
+    async def tracking_channels(self, pr: PR, /) -> Sequence[str]:
+        """Return the channels that asked to track this PR"""
+
+    async def store_pr_version(self, version: PRVersion, /) -> bool:
+        """
+        Store the latest change applied to a PR and return True, or return
+        False if a later one is already stored
+        """
+
+    async def pr_versions(self) -> Sequence[PRVersion]:
+        """Return the latest change applied to every PR"""
+
+    async def store_review(self, review: Review, /) -> None:
+        """Store the latest state of a reviewer's review unless a newer one is stored"""
+
+    async def reviews(self, pr: PR, /) -> Sequence[Review]:
+        """Return the latest state of each reviewer's review of this PR"""
+
+    async def has_delivery(self, delivery_id: str, /) -> bool: ...
+
+    async def store_deliveries(self, delivery_ids: Sequence[str], /) -> None: ...
+
+    async def prune_deliveries(self, *, older_than: datetime.datetime) -> int: ...
@@ -1,5 +1,6 @@
 import datetime
 
+from sqlalchemy import BigInteger, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ._metadata import Base
@@ -7,6 +8,7 @@ from ._metadata import Base
 
 class Request(Base):
     __tablename__ = "pr_requests"
+    __table_args__ = (Index("ix_pr_requests_pr", "organisation", "repo", "pr_number"),)
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
 
@@ -15,4 +17,29 @@ class Request(Base):
     pr_number: Mapped[int]
     user_id: Mapped[str]
     channel_id: Mapped[str]
-    added: Mapped[datetime.datetime]
+    added: Mapped[datetime.datetime] = mapped_column(index=True)
+
+
+class Review(Base):
+    __tablename__ = "pr_reviews"
+
+    organisation: Mapped[str] = mapped_column(primary_key=True)
+    repo: Mapped[str] = mapped_column(primary_key=True)
+    pr_number: Mapped[int] = mapped_column(primary_key=True)
+    reviewer: Mapped[str] = mapped_column(primary_key=True)
+
+    # The latest state of this reviewer's review and the review that set it
+    state: Mapped[str]
+    review_id: Mapped[int] = mapped_column(BigInteger)
+    submitted_at: Mapped[datetime.datetime]
+
+
+class Version(Base):
+    __tablename__ = "pr_versions"
+
+    organisation: Mapped[str] = mapped_column(primary_key=True)
+    repo: Mapped[str] = mapped_column(primary_key=True)
+    pr_number: Mapped[int] = mapped_column(primary_key=True)
+
+    # The updated_at of the latest change applied to the PR
+    updated_at: Mapped[datetime.datetime]
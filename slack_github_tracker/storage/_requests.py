@@ -1,3 +1,4 @@
+import datetime
 from typing import TYPE_CHECKING, cast
 
 import attrs
@@ -5,6 +6,23 @@ import attrs
 from . import _protocols as protocols
 
 
+def pr_key(pr: protocols.PR) -> tuple[str, str, int]:
+    """
+    Return what a PR is stored against.
+
+    Github doesn't care about the case of organisations and repositories, so
+    they are stored in lowercase.
+    """
+    return (pr.organisation.lower(), pr.repo.lower(), pr.pr_number)
+
+
+@attrs.frozen
+class PR:
+    organisation: str
+    repo: str
+    pr_number: int
+
+
 @attrs.frozen
 class PRRequest:
     pr: protocols.PR
@@ -12,5 +30,23 @@ class PRRequest:
     channel_id: str
 
 
+@attrs.frozen
+class PRVersion:
+    pr: protocols.PR
+    updated_at: datetime.datetime
+
+
+@attrs.frozen
+class Review:
+    pr: protocols.PR
+    reviewer: str
+    state: str
+    review_id: int
+    submitted_at: datetime.datetime
+
+
 if TYPE_CHECKING:
+    _PR: protocols.PR = cast(PR, None)
     _PRR: protocols.PRRequest = cast(PRRequest, None)
+    _PRV: protocols.PRVersion = cast(PRVersion, None)
+    _R: protocols.Review = cast(Review, None)
@@ -1,31 +1,269 @@
+import contextlib
 import datetime
+from collections.abc import Iterator, Sequence
 from typing import TYPE_CHECKING, cast
 
 import attrs
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
+from slack_github_tracker import metrics, tracing
+
+from . import _deliveries as deliveries
 from . import _protocols as protocols
 from . import _prs as prs
+from . import _requests as requests
+from ._tracked import TrackedPRs
 
 
 @attrs.frozen
 class Storage:
     engine: AsyncEngine
+    _metrics: metrics.Metrics = attrs.field(factory=metrics.Metrics, kw_only=True)
+
+    # Told about each PR that is tracked
+    _tracked: TrackedPRs | None = attrs.field(default=None, kw_only=True)
+
+    _latency: metrics.Histogram = attrs.field(init=False)
+
+    @_latency.default
+    def _make_latency(self) -> metrics.Histogram:
+        return self._metrics.histogram(
+            "storage_operation_seconds", "Time taken by each storage operation", ("operation",)
+        )
+
+    @contextlib.contextmanager
+    def _measure(self, operation: str) -> Iterator[None]:
+        with self._latency.time(operation), tracing.span(f"storage.{operation}"):
+            yield
 
     async def store_pr_request(self, request: protocols.PRRequest, /) -> None:
+        with self._measure("store_pr_request"):
+            await self._store_pr_request(request)
+
+    async def _store_pr_request(self, request: protocols.PRRequest, /) -> None:
+        organisation, repo, pr_number = requests.pr_key(request.pr)
         async with AsyncSession(self.engine) as session:
             async with session.begin():
                 session.add(
                     prs.Request(
-                        organisation=request.pr.organisation,
-                        repo=request.pr.repo,
-                        pr_number=request.pr.pr_number,
+                        organisation=organisation,
+                        repo=repo,
+                        pr_number=pr_number,
                         user_id=request.user_id,
                         channel_id=request.channel_id,
                         added=datetime.datetime.utcnow(),
                     )
                 )
 
+        if self._tracked is not None:
+            self._tracked.add(request.pr)
+
+    async def tracked_prs(
+        self, *, added_since: datetime.datetime | None = None
+    ) -> Sequence[protocols.PR]:
+        with self._measure("tracked_prs"):
+            return await self._tracked_prs(added_since=added_since)
+
+    async def _tracked_prs(
+        self, *, added_since: datetime.datetime | None = None
+    ) -> Sequence[protocols.PR]:
+        query = sqlalchemy.select(
+            prs.Request.organisation, prs.Request.repo, prs.Request.pr_number
+        ).distinct()
+        if added_since is not None:
+            query = query.where(prs.Request.added >= added_since)
+
+        async with AsyncSession(self.engine) as session:
+            found = await session.execute(query)
+            return [
+                requests.PR(organisation=organisation, repo=repo, pr_number=pr_number)
+                for organisation, repo, pr_number in found
+            ]
+
+    async def is_tracked(self, pr: protocols.PR, /) -> bool:
+        with self._measure("is_tracked"):
+            return await self._is_tracked(pr)
+
+    async def _is_tracked(self, pr: protocols.PR, /) -> bool:
+        organisation, repo, pr_number = requests.pr_key(pr)
+        async with AsyncSession(self.engine) as session:
+            found = await session.scalar(
+                sqlalchemy.select(
+                    sqlalchemy.exists().where(
+                        prs.Request.organisation == organisation,
+                        prs.Request.repo == repo,
+                        prs.Request.pr_number == pr_number,
+                    )
+                )
+            )
+            return bool(found)
+
+    async def tracking_channels(self, pr: protocols.PR, /) -> Sequence[str]:
+        with self._measure("tracking_channels"):
+            return await self._tracking_channels(pr)
+
+    async def _tracking_channels(self, pr: protocols.PR, /) -> Sequence[str]:
+        organisation, repo, pr_number = requests.pr_key(pr)
+        async with AsyncSession(self.engine) as session:
+            found = await session.scalars(
+                sqlalchemy.select(prs.Request.channel_id)
+                .where(
+                    prs.Request.organisation == organisation,
+                    prs.Request.repo == repo,
+                    prs.Request.pr_number == pr_number,
+                )
+                .distinct()
+            )
+            return list(found)
+
+    async def store_pr_version(self, version: protocols.PRVersion, /) -> bool:
+        with self._measure("store_pr_version"):
+            return await self._store_pr_version(version)
+
+    async def _store_pr_version(self, version: protocols.PRVersion, /) -> bool:
+        organisation, repo, pr_number = requests.pr_key(version.pr)
+        async with AsyncSession(self.engine) as session:
+            async with session.begin():
+                insert = postgresql.insert(prs.Version).values(
+                    organisation=organisation,
+                    repo=repo,
+                    pr_number=pr_number,
+                    updated_at=version.updated_at,
+                )
+                # Nothing is returned when a later change is already stored
+                stored = await session.execute(
+                    insert.on_conflict_do_update(
+                        index_elements=["organisation", "repo", "pr_number"],
+                        set_={"updated_at": version.updated_at},
+                        where=prs.Version.updated_at <= insert.excluded.updated_at,
+                    ).returning(prs.Version.updated_at)
+                )
+                return stored.first() is not None
+
+    async def pr_versions(self) -> Sequence[protocols.PRVersion]:
+        with self._measure("pr_versions"):
+            return await self._pr_versions()
+
+    async def _pr_versions(self) -> Sequence[protocols.PRVersion]:
+        async with AsyncSession(self.engine) as session:
+            found = await session.scalars(sqlalchemy.select(prs.Version))
+            return [
+                requests.PRVersion(
+                    pr=requests.PR(
+                        organisation=version.organisation,
+                        repo=version.repo,
+                        pr_number=version.pr_number,
+                    ),
+                    updated_at=version.updated_at,
+                )
+                for version in found
+            ]
+
+    async def store_review(self, review: protocols.Review, /) -> None:
+        with self._measure("store_review"):
+            await self._store_review(review)
+
+    async def _store_review(self, review: protocols.Review, /) -> None:
+        organisation, repo, pr_number = requests.pr_key(review.pr)
+        values = {
+            "state": review.state,
+            "review_id": review.review_id,
+            "submitted_at": review.submitted_at,
+        }
+        async with AsyncSession(self.engine) as session:
+            async with session.begin():
+                insert = postgresql.insert(prs.Review).values(
+                    organisation=organisation,
+                    repo=repo,
+                    pr_number=pr_number,
+                    reviewer=review.reviewer,
+                    **values,
+                )
+                await session.execute(
+                    insert.on_conflict_do_update(
+                        index_elements=["organisation", "repo", "pr_number", "reviewer"],
+                        set_=values,
+                        # Events can be processed out of order
+                        where=prs.Review.submitted_at <= insert.excluded.submitted_at,
+                    )
+                )
+
+    async def reviews(self, pr: protocols.PR, /) -> Sequence[protocols.Review]:
+        with self._measure("reviews"):
+            return await self._reviews(pr)
+
+    async def _reviews(self, pr: protocols.PR, /) -> Sequence[protocols.Review]:
+        organisation, repo, pr_number = requests.pr_key(pr)
+        async with AsyncSession(self.engine) as session:
+            found = await session.scalars(
+                sqlalchemy.select(prs.Review).where(
+                    prs.Review.organisation == organisation,
+                    prs.Review.repo == repo,
+                    prs.Review.pr_number == pr_number,
+                )
+            )
+            return [
+                requests.Review(
+                    pr=pr,
+                    reviewer=review.reviewer,
+                    state=review.state,
+                    review_id=review.review_id,
+                    submitted_at=review.submitted_at,
+                )
+                for review in found
+            ]
+
+    async def has_delivery(self, delivery_id: str, /) -> bool:
+        with self._measure("has_delivery"):
+            return await self._has_delivery(delivery_id)
+
+    async def _has_delivery(self, delivery_id: str, /) -> bool:
+        async with AsyncSession(self.engine) as session:
+            found = await session.scalar(
+                sqlalchemy.select(deliveries.Delivery.delivery_id).where(
+                    deliveries.Delivery.delivery_id == delivery_id
+                )
+            )
+            return found is not None
+
+    async def store_deliveries(self, delivery_ids: Sequence[str], /) -> None:
+        if not delivery_ids:
+            return
+
+        with self._measure("store_deliveries"):
+            await self._store_deliveries(delivery_ids)
+
+    async def _store_deliveries(self, delivery_ids: Sequence[str], /) -> None:
+        received = datetime.datetime.utcnow()
+        async with AsyncSession(self.engine) as session:
+            async with session.begin():
+                await session.execute(
+                    postgresql.insert(deliveries.Delivery)
+                    .values(
+                        [
+                            {"delivery_id": delivery_id, "received": received}
+                            for delivery_id in delivery_ids
+                        ]
+                    )
+                    .on_conflict_do_nothing(index_elements=["delivery_id"])
+                )
+
+    async def prune_deliveries(self, *, older_than: datetime.datetime) -> int:
+        with self._measure("prune_deliveries"):
+            return await self._prune_deliveries(older_than=older_than)
+
+    async def _prune_deliveries(self, *, older_than: datetime.datetime) -> int:
+        async with AsyncSession(self.engine) as session:
+            async with session.begin():
+                result = await session.execute(
+                    sqlalchemy.delete(deliveries.Delivery).where(
+                        deliveries.Delivery.received < older_than
+                    )
+                )
+                return result.rowcount
+
 
 if TYPE_CHECKING:
     _S: protocols.Storage = cast(Storage, None)
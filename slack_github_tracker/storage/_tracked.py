@@ -0,0 +1,108 @@
+import asyncio
+import datetime
+from collections.abc import Sequence
+from typing import Protocol
+
+import attrs
+
+from slack_github_tracker import caching
+from slack_github_tracker.protocols import Logger
+
+from . import _protocols as protocols
+from . import _requests as requests
+
+
+class _TrackedStorage(Protocol):
+    async def tracked_prs(
+        self, *, added_since: datetime.datetime | None = None
+    ) -> Sequence[protocols.PR]: ...
+
+    async def is_tracked(self, pr: protocols.PR, /) -> bool: ...
+
+
+@attrs.define
+class TrackedPRs:
+    """
+    The PRs that have been tracked with ``/track_pr``, kept in memory so
+    webhooks for other PRs can be dropped without looking at the database.
+
+    Until the PRs have been loaded from the database every PR counts as
+    tracked so nothing is dropped. PRs are only ever added because requests
+    to track a PR are never removed.
+
+    Every PR is loaded once and later loads only ask for PRs tracked since
+    the previous load started, going back ``overlap`` further for requests
+    that were still being committed or came from a process with a different
+    clock.
+
+    Other processes only see a newly tracked PR at their next load, so a PR
+    that isn't known here is looked up in the database before it counts as
+    untracked. PRs found there are kept and PRs that aren't are remembered
+    for ``untracked_ttl`` seconds. If the lookup fails the PR counts as tracked.
+    """
+
+    _logger: Logger
+    _source: _TrackedStorage
+    overlap: datetime.timedelta = datetime.timedelta(minutes=5)
+    untracked_ttl: float = 5
+    lookup_timeout: float = 2
+
+    _prs: set[tuple[str, str, int]] = attrs.field(init=False, factory=set)
+    _untracked: caching.TTLCache[tuple[str, str, int], bool] = attrs.field(init=False)
+    _loaded_since: datetime.datetime | None = attrs.field(init=False, default=None)
+
+    loaded: bool = attrs.field(init=False, default=False)
+
+    @_untracked.default
+    def _make_untracked(self) -> caching.TTLCache[tuple[str, str, int], bool]:
+        return caching.TTLCache(maxsize=10_000, ttl=self.untracked_ttl)
+
+    def __len__(self) -> int:
+        return len(self._prs)
+
+    def add(self, pr: protocols.PR) -> None:
+        key = requests.pr_key(pr)
+        self._prs.add(key)
+        self._untracked.pop(key)
+
+    async def is_tracked(self, organisation: str, repo: str, pr_number: int) -> bool:
+        if not self.loaded:
+            return True
+        pr = requests.PR(organisation=organisation, repo=repo, pr_number=pr_number)
+        key = requests.pr_key(pr)
+        if key in self._prs:
+            return True
+        if key in self._untracked:
+            return False
+
+        try:
+            async with asyncio.timeout(self.lookup_timeout):
+                tracked = await self._source.is_tracked(pr)
+        except Exception:
+            self._logger.exception("Failed to check if PR is tracked", pr=key)
+            return True
+
+        if tracked:
+            self._prs.add(key)
+        else:
+            self._untracked.set(key, False)
+        return tracked
+
+    async def load(self) -> None:
+        """
+        Add the PRs from the database, which includes any tracked by other
+        processes since the last load
+        """
+        # Requests are stored with naive utc times
+        started = datetime.datetime.utcnow()
+        added_since = None if self._loaded_since is None else self._loaded_since - self.overlap
+
+        try:
+            prs = await self._source.tracked_prs(added_since=added_since)
+        except Exception:
+            self._logger.exception("Failed to load tracked PRs")
+            return
+
+        self._prs.update(requests.pr_key(pr) for pr in prs)
+        self._loaded_since = started
+        self.loaded = True
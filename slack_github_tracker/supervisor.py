@@ -0,0 +1,104 @@
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.process
+import os
+import signal
+import time
+import types
+from collections.abc import Callable
+
+import attrs
+
+from . import logs
+from .protocols import Logger
+
+
+@attrs.define
+class Supervisor:
+    """
+    Run ``workers`` copies of ``target`` in their own processes.
+
+    Each worker is forked before ``target`` is called, so everything it makes,
+    like the database pool and the background tasks, belongs to that worker.
+
+    Workers that exit while the supervisor is running are restarted. SIGTERM
+    or SIGINT on the supervisor is forwarded to every worker as a SIGTERM and
+    the supervisor then waits for them to finish their graceful shutdown.
+    """
+
+    _logger: Logger
+
+    # The number of worker processes to keep running
+    workers: int
+
+    # Called in each worker process with the index of that worker
+    target: Callable[[int], None]
+
+    # How long to wait before restarting a worker that exited
+    restart_delay_seconds: float = 1
+
+    _stopping: bool = attrs.field(init=False, default=False)
+    _processes: dict[int, multiprocessing.process.BaseProcess] = attrs.field(
+        init=False, factory=dict
+    )
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+
+        for index in range(self.workers):
+            self._start(index)
+
+        while self._processes:
+            multiprocessing.connection.wait(
+                [process.sentinel for process in self._processes.values()], timeout=1
+            )
+
+            for index, process in list(self._processes.items()):
+                if process.exitcode is None:
+                    continue
+
+                process.join()
+                del self._processes[index]
+
+                if self._stopping:
+                    self._logger.info("Worker stopped", worker=index, exitcode=process.exitcode)
+                else:
+                    self._logger.error(
+                        "Worker exited unexpectedly, restarting",
+                        worker=index,
+                        exitcode=process.exitcode,
+                    )
+                    time.sleep(self.restart_delay_seconds)
+                    if not self._stopping:
+                        self._start(index)
+
+    def _start(self, index: int) -> None:
+        process = multiprocessing.get_context("fork").Process(
+            target=self._run_worker, args=(index,), name=f"worker-{index}", daemon=False
+        )
+        process.start()
+        self._processes[index] = process
+        self._logger.info("Started worker", worker=index, pid=process.pid)
+
+    def _run_worker(self, index: int) -> None:
+        # The worker installs its own handlers once its event loop is running
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            self.target(index)
+        finally:
+            # Forked processes exit without running atexit handlers
+            logs.stop_listeners()
+
+    def _on_signal(self, signum: int, frame: types.FrameType | None) -> None:
+        if self._stopping:
+            return
+
+        self._stopping = True
+        self._logger.info(
+            "Stopping workers", signal=signal.Signals(signum).name, workers=len(self._processes)
+        )
+        for process in self._processes.values():
+            if process.pid is not None and process.exitcode is None:
+                os.kill(process.pid, signal.SIGTERM)
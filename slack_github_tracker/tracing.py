@@ -0,0 +1,343 @@
+"""
+Lightweight tracing of github events from the webhook to Slack.
+
+A ``Trace`` is started when a webhook is received and made the current trace
+with a context variable. Events made from that webhook carry a copy of the
+context onto the task that processes them, where the trace is branched so
+each event gets its own stages. Anything along the way can record a stage
+with ``span`` and does nothing when there is no current trace.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import os
+import time
+from collections.abc import Iterator, Sequence
+from typing import Protocol
+
+import aiohttp
+import attrs
+from machinery import helpers as hp
+
+from .protocols import Logger
+
+type AttributeValue = str | int | float | bool
+
+_current: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar(
+    "slack_github_tracker_trace", default=None
+)
+
+
+def _trace_id() -> str:
+    return os.urandom(16).hex()
+
+
+def _span_id() -> str:
+    return os.urandom(8).hex()
+
+
+@attrs.define
+class Span:
+    name: str
+    start_ns: int
+    parent_id: str | None = None
+    end_ns: int | None = None
+    attributes: dict[str, AttributeValue] = attrs.field(factory=dict)
+    span_id: str = attrs.field(factory=_span_id)
+
+    @property
+    def seconds(self) -> float:
+        end_ns = time.time_ns() if self.end_ns is None else self.end_ns
+        return (end_ns - self.start_ns) / 1e9
+
+
+@attrs.define
+class Trace:
+    """
+    The stages of handling one webhook, or one event made from a webhook.
+
+    Every stage is a child of the root span. An event's trace shares its
+    trace id with the webhook it came from and its root span is a child of the
+    webhook's root span.
+    """
+
+    name: str
+    attributes: dict[str, AttributeValue] = attrs.field(factory=dict)
+    parent: "Trace | None" = None
+    trace_id: str = attrs.field()
+    root: Span = attrs.field(init=False)
+    spans: list[Span] = attrs.field(init=False, factory=list)
+
+    # Whether the spans in this trace have been given to an exporter
+    exported: bool = attrs.field(init=False, default=False)
+
+    @trace_id.default
+    def _default_trace_id(self) -> str:
+        return _trace_id() if self.parent is None else self.parent.trace_id
+
+    @root.default
+    def _make_root(self) -> Span:
+        return Span(
+            name=self.name,
+            start_ns=time.time_ns(),
+            parent_id=None if self.parent is None else self.parent.root.span_id,
+            attributes=self.attributes,
+        )
+
+    @property
+    def finished(self) -> bool:
+        return self.root.end_ns is not None
+
+    @property
+    def seconds(self) -> float:
+        """
+        Seconds from the start of the first trace in the chain to the end of this one
+        """
+        first = self
+        while first.parent is not None:
+            first = first.parent
+        end_ns = time.time_ns() if self.root.end_ns is None else self.root.end_ns
+        return (end_ns - first.root.start_ns) / 1e9
+
+    def branch(self, name: str, **attributes: AttributeValue) -> "Trace":
+        return Trace(name=name, attributes=attributes, parent=self)
+
+    def add_span(
+        self, name: str, *, start_ns: int, end_ns: int, **attributes: AttributeValue
+    ) -> Span:
+        span = Span(
+            name=name,
+            start_ns=start_ns,
+            end_ns=end_ns,
+            parent_id=self.root.span_id,
+            attributes=attributes,
+        )
+        self.spans.append(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: AttributeValue) -> Iterator[Span]:
+        span = Span(
+            name=name, start_ns=time.time_ns(), parent_id=self.root.span_id, attributes=attributes
+        )
+        self.spans.append(span)
+        try:
+            yield span
+        finally:
+            span.end_ns = time.time_ns()
+
+    def finish(self) -> None:
+        if self.root.end_ns is None:
+            self.root.end_ns = time.time_ns()
+
+    def chain(self) -> list["Trace"]:
+        """
+        Return the traces this trace branched from, starting with the first
+        """
+        chain = [self]
+        while chain[0].parent is not None:
+            chain.insert(0, chain[0].parent)
+        return chain
+
+    def stages(self) -> dict[str, float]:
+        """
+        Return the seconds taken by each stage in this trace and the traces it
+        branched from
+        """
+        return {
+            span.name: round(span.seconds, 6) for trace in self.chain() for span in trace.spans
+        }
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def use(trace: Trace) -> Iterator[Trace]:
+    """
+    Make ``trace`` the current trace until the context manager exits
+    """
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def start(name: str, **attributes: AttributeValue) -> Iterator[Trace]:
+    """
+    Make a new trace the current trace until the context manager exits.
+
+    The trace is finished when the context manager exits.
+    """
+    with use(Trace(name=name, attributes=attributes)) as trace:
+        try:
+            yield trace
+        finally:
+            trace.finish()
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: AttributeValue) -> Iterator[None]:
+    """
+    Record a stage on the current trace, if there is one
+    """
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    with trace.span(name, **attributes):
+        yield
+
+
+class Exporter(Protocol):
+    def add(self, trace: Trace, /) -> None: ...
+
+
+@attrs.frozen
+class Tracer:
+    """
+    Decides what happens to a trace once it is finished.
+
+    Traces that took at least ``slow_seconds`` are logged with the time taken
+    by each stage, and every trace is given to ``exporter`` when there is one.
+    """
+
+    _logger: Logger
+    slow_seconds: float = 5
+    exporter: Exporter | None = None
+
+    def finish(self, trace: Trace) -> None:
+        trace.finish()
+
+        took = trace.seconds
+        if took >= self.slow_seconds:
+            self._logger.warning(
+                "Slow github event",
+                trace_id=trace.trace_id,
+                trace=trace.name,
+                took=round(took, 6),
+                stages=trace.stages(),
+                attributes={
+                    key: value for part in trace.chain() for key, value in part.attributes.items()
+                },
+            )
+
+        if self.exporter is not None:
+            self.exporter.add(trace)
+
+
+def _otlp_value(value: AttributeValue) -> dict[str, object]:
+    match value:
+        case bool():
+            return {"boolValue": value}
+        case int():
+            return {"intValue": str(value)}
+        case float():
+            return {"doubleValue": value}
+        case _:
+            return {"stringValue": value}
+
+
+def _otlp_attributes(attributes: dict[str, AttributeValue]) -> list[dict[str, object]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def _otlp_span(trace_id: str, span: Span, *, kind: int) -> dict[str, object]:
+    return {
+        "traceId": trace_id,
+        "spanId": span.span_id,
+        "parentSpanId": span.parent_id or "",
+        "name": span.name,
+        "kind": kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+    }
+
+
+# Span kinds from the OpenTelemetry protocol
+_SPAN_KIND_INTERNAL = 1
+_SPAN_KIND_SERVER = 2
+
+
+@attrs.define
+class OTLPExporter:
+    """
+    Sends traces to an OpenTelemetry collector with the OTLP/HTTP JSON
+    protocol.
+
+    Traces are held in memory and sent in batches by ``run``. Once
+    ``max_pending`` traces are waiting, new traces are dropped.
+    """
+
+    _logger: Logger
+    endpoint: str
+    service_name: str = "slack-github-tracker"
+    max_pending: int = 10_000
+
+    dropped: int = attrs.field(init=False, default=0)
+    _pending: list[Trace] = attrs.field(init=False, factory=list)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, trace: Trace, /) -> None:
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append(trace)
+
+    def payload(self, traces: Sequence[Trace]) -> dict[str, object]:
+        spans: list[dict[str, object]] = []
+        for trace in traces:
+            for part in trace.chain():
+                # The webhook's trace is shared by each event made from it
+                if part.exported or not part.finished:
+                    continue
+                part.exported = True
+                kind = _SPAN_KIND_SERVER if part.parent is None else _SPAN_KIND_INTERNAL
+                spans.append(_otlp_span(part.trace_id, part.root, kind=kind))
+                spans.extend(
+                    _otlp_span(part.trace_id, span, kind=_SPAN_KIND_INTERNAL)
+                    for span in part.spans
+                    if span.end_ns is not None
+                )
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes({"service.name": self.service_name})
+                    },
+                    "scopeSpans": [{"scope": {"name": "slack_github_tracker"}, "spans": spans}],
+                }
+            ]
+        }
+
+    async def flush(self, session: aiohttp.ClientSession | None = None) -> None:
+        if not self._pending:
+            return
+
+        traces, self._pending = self._pending, []
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                if session is None:
+                    session = await stack.enter_async_context(aiohttp.ClientSession())
+                async with session.post(self.endpoint, json=self.payload(traces)) as response:
+                    response.raise_for_status()
+        except Exception:
+            self._logger.exception("Failed to export traces", dropped=len(traces))
+
+    async def run(self, *, final_future: asyncio.Future[None], every: float = 5) -> None:
+        async with aiohttp.ClientSession() as session:
+            async with hp.tick(
+                every, final_future=final_future, name="OTLPExporter::run[tick]"
+            ) as ticks:
+                async for _ in ticks:
+                    await self.flush(session)
@@ -0,0 +1,77 @@
+import asyncio
+import datetime
+
+from machinery import helpers as hp
+
+from slack_github_tracker import protocols
+from slack_github_tracker.handlers import background
+
+
+def utc(year: int, month: int, day: int, hour: int = 0, minute: int = 0, second: int = 0) -> float:
+    return datetime.datetime(
+        year, month, day, hour, minute, second, tzinfo=datetime.UTC
+    ).timestamp()
+
+
+class TestCron:
+    def test_it_finds_the_next_matching_minute(self) -> None:
+        every_quarter = background.scheduler.Cron("*/15 * * * *")
+        assert every_quarter.next_after(utc(2024, 3, 1, 10, 7, 30)) == utc(2024, 3, 1, 10, 15)
+        assert every_quarter.next_after(utc(2024, 3, 1, 10, 15)) == utc(2024, 3, 1, 10, 30)
+        assert every_quarter.next_after(utc(2024, 3, 1, 23, 50)) == utc(2024, 3, 2, 0, 0)
+
+    def test_it_understands_days_of_the_week(self) -> None:
+        # 2024-03-01 is a Friday
+        weekday_mornings = background.scheduler.Cron("30 9 * * 1-5")
+        assert weekday_mornings.next_after(utc(2024, 3, 1, 10)) == utc(2024, 3, 4, 9, 30)
+
+        sundays = background.scheduler.Cron("0 0 * * 7")
+        assert sundays.next_after(utc(2024, 3, 1)) == utc(2024, 3, 3)
+
+    def test_it_crosses_into_the_next_year(self) -> None:
+        new_year = background.scheduler.Cron("0 0 1 1 *")
+        assert new_year.next_after(utc(2024, 3, 1)) == utc(2025, 1, 1)
+
+
+class TestScheduler:
+    async def test_it_runs_jobs_and_skips_runs_that_would_overlap(
+        self, logger: protocols.Logger
+    ) -> None:
+        fast: list[float] = []
+        slow_started = asyncio.Event()
+
+        async def run_fast() -> None:
+            fast.append(asyncio.get_running_loop().time())
+
+        async def run_slow() -> None:
+            slow_started.set()
+            await asyncio.sleep(0.35)
+
+        scheduler = background.scheduler.Scheduler(logger=logger)
+        scheduler.add(
+            background.scheduler.Job(
+                name="fast", schedule=background.scheduler.Interval(0.05), run=run_fast
+            )
+        )
+
+        final_future: asyncio.Future[None] = hp.create_future(name="test[final_future]")
+        async with hp.TaskHolder(final_future, name="test[task_holder]") as task_holder:
+            scheduler(final_future, task_holder)
+
+            # Jobs added after the scheduler started are picked up
+            scheduler.add(
+                background.scheduler.Job(
+                    name="slow", schedule=background.scheduler.Interval(0.1), run=run_slow
+                )
+            )
+            await asyncio.wait_for(slow_started.wait(), timeout=1)
+            await asyncio.sleep(0.3)
+            final_future.cancel()
+
+        assert len(fast) >= 5
+        assert scheduler.stats("fast").runs == len(fast)
+        assert scheduler.stats("fast").last_lateness < 0.05
+
+        slow = scheduler.stats("slow")
+        assert slow.skipped >= 2
+        assert slow.runs == 1
@@ -0,0 +1,98 @@
+import asyncio
+
+import attrs
+from machinery import helpers as hp
+
+from slack_github_tracker import protocols
+from slack_github_tracker.handlers import background, digest
+from slack_github_tracker.handlers.slack import _tracking as tracking
+
+
+@attrs.define
+class FakeSender:
+    sent: list[tuple[str, str]] = attrs.field(factory=list)
+
+    async def chat_postMessage(self, *, channel: str, text: str) -> object:
+        self.sent.append((channel, text))
+        return None
+
+
+pr1 = tracking.PR(organisation="delfick", repo="stuff", pr_number=1)
+pr2 = tracking.PR(organisation="delfick", repo="things", pr_number=2)
+
+
+class TestDigestScheduler:
+    async def test_it_sends_immediately_for_channels_not_in_digest_mode(
+        self, logger: protocols.Logger
+    ) -> None:
+        sender = FakeSender()
+        scheduler = digest.scheduler.DigestScheduler(
+            logger=logger, interval=60, channels=frozenset(["C2"])
+        )
+
+        await scheduler.deliver(
+            channel_id="C1",
+            change=digest.scheduler.Change(pr=pr1, description="opened"),
+            sender=sender,
+        )
+        assert sender.sent == [("C1", "PR#1 in delfick/stuff: opened")]
+        assert scheduler.pending == 0
+
+    async def test_it_sends_one_message_per_channel_per_flush(
+        self, logger: protocols.Logger
+    ) -> None:
+        sender = FakeSender()
+        scheduler = digest.scheduler.DigestScheduler(
+            logger=logger, interval=60, channels=frozenset(["C1", "C2"])
+        )
+
+        for channel_id, pr, description in [
+            ("C1", pr1, "opened"),
+            ("C1", pr2, "approved"),
+            ("C2", pr2, "approved"),
+            ("C1", pr1, "merged"),
+        ]:
+            await scheduler.deliver(
+                channel_id=channel_id,
+                change=digest.scheduler.Change(pr=pr, description=description),
+                sender=sender,
+            )
+
+        assert sender.sent == []
+        assert scheduler.pending == 4
+
+        await scheduler.flush(sender)
+        assert scheduler.pending == 0
+        assert sender.sent == [
+            (
+                "C1",
+                "\n".join(
+                    [
+                        "Changes to tracked PRs since the last digest:",
+                        "• PR#1 in delfick/stuff: opened, merged",
+                        "• PR#2 in delfick/things: approved",
+                    ]
+                ),
+            ),
+            ("C2", "PR#2 in delfick/things: approved"),
+        ]
+
+        await scheduler.flush(sender)
+        assert len(sender.sent) == 2
+
+    async def test_it_flushes_on_an_interval(self, logger: protocols.Logger) -> None:
+        sender = FakeSender()
+        scheduler = digest.scheduler.DigestScheduler(
+            logger=logger, interval=0.1, channels=frozenset(["C1"])
+        )
+
+        jobs = background.scheduler.Scheduler(logger=logger)
+        jobs.add(scheduler.job(sender))
+
+        final_future = hp.create_future(name="test[final_future]")
+        async with hp.TaskHolder(final_future, name="test[task_holder]") as task_holder:
+            jobs(final_future, task_holder)
+            scheduler.add("C1", digest.scheduler.Change(pr=pr1, description="opened"))
+            await asyncio.sleep(0.25)
+            assert sender.sent == [("C1", "PR#1 in delfick/stuff: opened")]
+            final_future.cancel()
@@ -0,0 +1,155 @@
+import asyncio
+import datetime
+from collections.abc import Sequence
+from typing import cast
+
+import attrs
+from machinery import helpers as hp
+
+from slack_github_tracker import metrics, protocols, storage
+from slack_github_tracker.handlers import github
+
+
+@attrs.define
+class FakeGithub:
+    fetched: list[int] = attrs.field(factory=list)
+    answered: asyncio.Event = attrs.field(factory=asyncio.Event)
+    in_flight: int = 0
+    most_in_flight: int = 0
+
+    async def pull_request(
+        self, organisation: str, repo: str, pr_number: int
+    ) -> dict[str, object]:
+        self.fetched.append(pr_number)
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            await self.answered.wait()
+        finally:
+            self.in_flight -= 1
+        return {"number": pr_number, "title": "stuff", "updated_at": "2024-11-13T00:34:02Z"}
+
+    async def pull_request_reviews(
+        self, organisation: str, repo: str, pr_number: int
+    ) -> list[dict[str, object]]:
+        return [
+            {
+                "id": 1,
+                "state": "CHANGES_REQUESTED",
+                "user": {"login": "one"},
+                "submitted_at": "2024-11-13T00:10:00Z",
+            },
+            {
+                "id": 2,
+                "state": "APPROVED",
+                "user": {"login": "two"},
+                "submitted_at": "2024-11-13T00:20:00Z",
+            },
+            {"id": 3, "state": "PENDING", "user": {"login": "three"}},
+            # Left by an account that has since been deleted
+            {
+                "id": 5,
+                "state": "APPROVED",
+                "user": None,
+                "submitted_at": "2024-11-13T00:25:00Z",
+            },
+            {"id": 6, "state": "APPROVED", "submitted_at": "not a time", "user": {"login": "six"}},
+            {
+                "id": 4,
+                "state": "APPROVED",
+                "user": {"login": "one"},
+                "submitted_at": "2024-11-13T00:30:00Z",
+            },
+        ]
+
+
+@attrs.define
+class FakeStorage:
+    calls: list[str] = attrs.field(factory=list)
+
+    async def store_pr_version(self, version: storage.protocols.PRVersion, /) -> bool:
+        self.calls.append(f"store_pr_version {version.pr.pr_number}")
+        return True
+
+    async def reviews(self, pr: storage.protocols.PR, /) -> Sequence[storage.protocols.Review]:
+        return []
+
+    async def store_review(self, review: storage.protocols.Review, /) -> None:
+        self.calls.append(f"store_review {review.pr.pr_number} {review.reviewer} {review.state}")
+
+
+def make_backfill(
+    logger: protocols.Logger, fake_github: FakeGithub, fake_storage: FakeStorage
+) -> tuple[github.backfill.Backfill, github.versions.PRVersions, github.reviews.Reviews]:
+    versions = github.versions.PRVersions(logger=logger)
+    reviews = github.reviews.Reviews()
+    backfill = github.backfill.Backfill(
+        logger=logger,
+        github=fake_github,
+        storage=cast(storage.protocols.Storage, fake_storage),
+        versions=versions,
+        reviews=reviews,
+        metrics=metrics.Metrics(),
+        max_concurrent=2,
+    )
+    return backfill, versions, reviews
+
+
+def pr(number: int) -> storage.requests.PR:
+    return storage.requests.PR(organisation="delfick", repo="stuff", pr_number=number)
+
+
+class TestBackfill:
+    async def test_it_stores_the_state_and_reviews_of_the_pr(
+        self, logger: protocols.Logger
+    ) -> None:
+        fake_github, fake_storage = FakeGithub(), FakeStorage()
+        fake_github.answered.set()
+        backfill, versions, reviews = make_backfill(logger, fake_github, fake_storage)
+
+        await backfill.backfill(pr(1))
+        assert fake_storage.calls == [
+            "store_pr_version 1",
+            "store_review 1 one changes_requested",
+            "store_review 1 two approved",
+            "store_review 1 one approved",
+        ]
+
+        summary = await reviews.summary(pr(1), fake_storage)
+        assert (summary.approvals, summary.changes_requested) == (2, 0)
+
+        # Events from before what was fetched are ignored like late webhooks
+        assert not versions.advance(pr(1), datetime.datetime(2024, 11, 13))
+
+        # Nothing is stored again when nothing changed
+        fake_storage.calls.clear()
+        await backfill.backfill(pr(1))
+        assert fake_storage.calls == ["store_pr_version 1"]
+
+    async def test_it_limits_and_deduplicates_backfills(self, logger: protocols.Logger) -> None:
+        fake_github, fake_storage = FakeGithub(), FakeStorage()
+        backfill, _, _ = make_backfill(logger, fake_github, fake_storage)
+
+        # Requests made before the backfill starts are kept until it does
+        backfill.request(pr(1))
+        backfill.request(pr(1))
+
+        final_future: asyncio.Future[None] = hp.create_future()
+        async with hp.TaskHolder(final_future) as task_holder:
+            backfill(final_future, task_holder)
+            for number in (2, 1, 3, 2, 4):
+                backfill.request(pr(number))
+            assert backfill.backlog == 4
+
+            while len(fake_github.fetched) < 2:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            assert fake_github.in_flight == 2
+
+            fake_github.answered.set()
+            while backfill.backlog:
+                await asyncio.sleep(0.01)
+            final_future.cancel()
+
+        assert sorted(fake_github.fetched) == [1, 2, 3, 4]
+        assert fake_github.most_in_flight == 2
@@ -0,0 +1,97 @@
+import asyncio
+import datetime
+from collections.abc import Sequence
+
+import attrs
+
+from slack_github_tracker import protocols
+from slack_github_tracker.handlers import github
+
+
+@attrs.define
+class FakeStorage:
+    stored: set[str] = attrs.field(factory=set)
+    batches: list[list[str]] = attrs.field(factory=list)
+    lookups: list[str] = attrs.field(factory=list)
+    slow: bool = False
+    broken: bool = False
+
+    async def has_delivery(self, delivery_id: str, /) -> bool:
+        self.lookups.append(delivery_id)
+        if self.slow:
+            await asyncio.sleep(10)
+        return delivery_id in self.stored
+
+    async def store_deliveries(self, delivery_ids: Sequence[str], /) -> None:
+        self.batches.append(list(delivery_ids))
+        if self.broken:
+            raise ConnectionError("database is down")
+        self.stored.update(delivery_ids)
+
+    async def prune_deliveries(self, *, older_than: datetime.datetime) -> int:
+        return 0
+
+
+class TestDeliveries:
+    async def test_it_drops_duplicates_in_memory(self, logger: protocols.Logger) -> None:
+        deliveries = github.deliveries.Deliveries(logger=logger)
+
+        assert not await deliveries.is_duplicate("one")
+        assert not await deliveries.is_duplicate("two")
+        assert await deliveries.is_duplicate("one")
+        assert deliveries.duplicates == 1
+
+        deliveries.forget("one")
+        assert not await deliveries.is_duplicate("one")
+        assert deliveries.duplicates == 1
+
+    async def test_it_shares_deliveries_through_storage(self, logger: protocols.Logger) -> None:
+        storage = FakeStorage(stored={"from-another-replica"})
+        deliveries = github.deliveries.Deliveries(logger=logger, storage=storage)
+
+        assert await deliveries.is_duplicate("from-another-replica")
+        assert not await deliveries.is_duplicate("one")
+        assert not await deliveries.is_duplicate("two")
+        assert not await deliveries.is_duplicate("three")
+        deliveries.forget("three")
+
+        assert await deliveries.is_duplicate("one")
+        assert storage.lookups == ["from-another-replica", "one", "two", "three"]
+        assert deliveries.duplicates == 2
+
+        assert storage.batches == []
+        await deliveries.flush()
+        assert storage.batches == [["one", "two"]]
+
+        await deliveries.flush()
+        assert storage.batches == [["one", "two"]]
+
+    async def test_it_gives_up_on_slow_lookups(self, logger: protocols.Logger) -> None:
+        storage = FakeStorage(stored={"one"}, slow=True)
+        deliveries = github.deliveries.Deliveries(
+            logger=logger, storage=storage, lookup_timeout=0.01
+        )
+
+        assert not await deliveries.is_duplicate("one")
+        assert deliveries.unstored == 1
+
+    async def test_it_keeps_a_limited_number_of_unstored_deliveries(
+        self, logger: protocols.Logger
+    ) -> None:
+        storage = FakeStorage(broken=True)
+        deliveries = github.deliveries.Deliveries(logger=logger, storage=storage, max_unstored=3)
+
+        for delivery in ("one", "two", "three"):
+            assert not await deliveries.is_duplicate(delivery)
+        await deliveries.flush()
+
+        # The failed batch stays ahead of newer deliveries and the oldest are dropped
+        assert not await deliveries.is_duplicate("four")
+        assert not await deliveries.is_duplicate("five")
+        deliveries.forget("three")
+        assert (deliveries.unstored, deliveries.dropped) == (2, 2)
+
+        storage.broken = False
+        await deliveries.flush()
+        assert storage.batches[-1] == ["four", "five"]
+        assert deliveries.unstored == 0
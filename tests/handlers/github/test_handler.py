@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, cast
+
+import attrs
+from machinery import helpers as hp
+
+from slack_github_tracker import metrics, protocols
+from slack_github_tracker.handlers import github
+
+
+@attrs.frozen
+class RecordingEvent:
+    name: str
+    processed: list[str]
+
+    async def process(self, info: github.protocols.EventProcessInfo, /) -> None:
+        self.processed.append(self.name)
+        await asyncio.sleep(0)
+
+
+async def process_all(handler: github.handler.EventHandler) -> None:
+    final_future: asyncio.Future[None] = hp.create_future()
+    async with hp.TaskHolder(final_future) as task_holder:
+        task_holder.add(
+            handler.run(
+                final_future=final_future,
+                task_holder=task_holder,
+                database=cast(Any, None),
+                background_tasks=cast(Any, None),
+                slack_app=cast(Any, None),
+                digest=cast(Any, None),
+            )
+        )
+        while handler.backlog:
+            await asyncio.sleep(0.01)
+        final_future.cancel()
+
+
+class TestEventHandler:
+    async def test_it_shares_processing_fairly_between_tenants(
+        self, logger: protocols.Logger
+    ) -> None:
+        collected = metrics.Metrics()
+        handler = github.handler.EventHandler(
+            logger=logger, metrics=collected, tenant_weights={"big": 2}, max_in_progress=1
+        )
+        processed: list[str] = []
+
+        for i in range(6):
+            handler.append(RecordingEvent(f"noisy{i}", processed), tenant="noisy")
+        for i in range(2):
+            handler.append(RecordingEvent(f"quiet{i}", processed), tenant="quiet")
+        for i in range(4):
+            handler.append(RecordingEvent(f"big{i}", processed), tenant="big")
+
+        assert handler.append.backlogs() == {"noisy": 6, "quiet": 2, "big": 4}
+        assert 'github_event_tenant_backlog{tenant="noisy"} 6' in collected.render()
+
+        await process_all(handler)
+
+        # The quiet tenant doesn't wait behind the noisy one, and the tenant
+        # with twice the weight gets twice as many turns
+        assert processed == [
+            "big0",
+            "noisy0",
+            "quiet0",
+            "big1",
+            "big2",
+            "noisy1",
+            "quiet1",
+            "big3",
+            "noisy2",
+            "noisy3",
+            "noisy4",
+            "noisy5",
+        ]
+        assert handler.append.backlogs() == {}
+        assert 'github_event_tenant_backlog{tenant="noisy"} 0' in collected.render()
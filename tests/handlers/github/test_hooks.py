@@ -0,0 +1,187 @@
+import datetime
+import pathlib
+from collections.abc import Sequence
+
+import attrs
+import pytest
+
+from slack_github_tracker import protocols, recorded, storage
+from slack_github_tracker.handlers import github
+
+FIXTURES = pathlib.Path(__file__).parent.parent.parent / "fixtures" / "github"
+
+
+@attrs.define
+class FakeStorage:
+    prs: list[storage.protocols.PR] = attrs.field(factory=list)
+
+    async def tracked_prs(
+        self, *, added_since: datetime.datetime | None = None
+    ) -> Sequence[storage.protocols.PR]:
+        return self.prs
+
+    async def is_tracked(self, pr: storage.protocols.PR, /) -> bool:
+        return storage.requests.pr_key(pr) in {storage.requests.pr_key(p) for p in self.prs}
+
+
+@attrs.define
+class CollectEvents:
+    events: list[github.protocols.Event] = attrs.field(factory=list)
+
+    def append(self, event: github.protocols.Event, /, *, tenant: str = "") -> None:
+        self.events.append(event)
+
+
+@attrs.define
+class CollectTenants:
+    tenants: list[str] = attrs.field(factory=list)
+
+    def append(self, event: github.protocols.Event, /, *, tenant: str = "") -> None:
+        self.tenants.append(tenant)
+
+
+class TestHooks:
+    async def test_it_drops_webhooks_for_untracked_prs(self, logger: protocols.Logger) -> None:
+        source = FakeStorage(
+            prs=[
+                storage.requests.PR(
+                    organisation="Delfick", repo="test-for-github-webhooks", pr_number=1
+                )
+            ]
+        )
+        tracked = storage.TrackedPRs(logger=logger, source=source)
+        collected = CollectEvents()
+        hooks = github.hooks.Hooks(
+            logger=logger,
+            event_adder=collected,
+            event_interpreter=github.interpret.EventInterpreter(),
+            tenants=github.tenants.Tenants(default_secret="secret"),
+            tracked=tracked,
+        )
+
+        async def register(fixture: str) -> None:
+            webhook = recorded.RecordedWebhook.from_file(FIXTURES / fixture)
+            await hooks.register(webhook.incoming(logger))
+
+        # Nothing is dropped until the tracked PRs are loaded
+        await register("opened-revert")
+        assert len(collected.events) == 1
+
+        await tracked.load()
+        assert tracked.loaded
+
+        with pytest.raises(github.errors.GithubWebhookDropped) as e:
+            await register("opened-revert")
+        assert e.value.reason == "Untracked PR"
+        assert len(collected.events) == 1
+
+        await register("opened")
+        await register("submitted-approve")
+        assert len(collected.events) == 3
+
+        tracked.add(
+            storage.requests.PR(
+                organisation="delfick", repo="test-for-github-webhooks", pr_number=2
+            )
+        )
+        await register("opened-revert")
+        assert len(collected.events) == 4
+
+    def test_it_checks_webhooks_with_the_secret_of_their_tenant(
+        self, logger: protocols.Logger
+    ) -> None:
+        hooks = github.hooks.Hooks(
+            logger=logger,
+            event_adder=CollectEvents(),
+            event_interpreter=github.interpret.EventInterpreter(),
+            tenants=github.tenants.Tenants(
+                tenants=[
+                    github.tenants.Tenant(
+                        installation_target_id="100",
+                        secret="org-secret",
+                        hook_secrets={"7": "hook-secret"},
+                    )
+                ]
+            ),
+        )
+        body = b'{"zen": "Keep it logically awesome."}'
+
+        def expected(hook_id: str, installation_target_id: str) -> str | None:
+            return hooks.determine_expected_signature(
+                body, hook_id=hook_id, installation_target_id=installation_target_id
+            )
+
+        assert expected("7", "100") == github.hooks.signature("hook-secret", body)
+        assert expected("8", "100") == github.hooks.signature("org-secret", body)
+        assert expected("8", "200") is None
+
+        # A hook is only accepted from the tenant it belongs to
+        assert expected("7", "200") is None
+
+        hooks = github.hooks.Hooks(
+            logger=logger,
+            event_adder=CollectEvents(),
+            event_interpreter=github.interpret.EventInterpreter(),
+            tenants=github.tenants.Tenants(default_secret="default"),
+        )
+        # Webhooks from other tenants use the default secret
+        assert expected("8", "200") == github.hooks.signature("default", body)
+        assert hooks.determine_expected_signature(body) == github.hooks.signature("default", body)
+
+    async def test_it_queues_events_under_the_tenant_the_secret_belongs_to(
+        self, logger: protocols.Logger
+    ) -> None:
+        webhook = recorded.RecordedWebhook.from_file(FIXTURES / "opened")
+        target = webhook.headers["x-github-hook-installation-target-id"]
+        hook_id = webhook.headers["x-github-hook-id"]
+        collected = CollectTenants()
+
+        async def register(tenants: github.tenants.Tenants) -> list[str]:
+            collected.tenants.clear()
+            await github.hooks.Hooks(
+                logger=logger,
+                event_adder=collected,
+                event_interpreter=github.interpret.EventInterpreter(),
+                tenants=tenants,
+            ).register(webhook.incoming(logger))
+            return collected.tenants
+
+        assert await register(
+            github.tenants.Tenants(tenants=[github.tenants.Tenant(target, secret="s")])
+        ) == [target]
+        assert await register(
+            github.tenants.Tenants(
+                tenants=[github.tenants.Tenant(target, secret="s", hook_secrets={hook_id: "h"})]
+            )
+        ) == [target]
+
+        assert await register(github.tenants.Tenants(default_secret="s")) == [target]
+
+    async def test_it_shares_processing_between_installation_targets_with_the_default_secret(
+        self, logger: protocols.Logger
+    ) -> None:
+        handler = github.handler.EventHandler(logger=logger, max_in_progress=1)
+        hooks = github.hooks.Hooks(
+            logger=logger,
+            event_adder=handler,
+            event_interpreter=github.interpret.EventInterpreter(),
+            tenants=github.tenants.Tenants(default_secret="s"),
+        )
+
+        def incoming(fixture: str, installation_target_id: str) -> github.hooks.Incoming:
+            webhook = recorded.RecordedWebhook.from_file(FIXTURES / fixture)
+            return attrs.evolve(
+                webhook.incoming(logger), hook_installation_target_id=installation_target_id
+            )
+
+        noisy = incoming("opened", "100")
+        quiet = incoming("submitted-approve", "200")
+        for _ in range(3):
+            await hooks.register(noisy)
+        await hooks.register(quiet)
+
+        assert handler.append.backlogs() == {"100": 3, "200": 1}
+        interpreter = github.interpret.EventInterpreter()
+        [noisy_event] = interpreter.interpret(noisy)
+        [quiet_event] = interpreter.interpret(quiet)
+        assert handler.append.pending() == [noisy_event, quiet_event, noisy_event, noisy_event]
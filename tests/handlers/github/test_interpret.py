@@ -0,0 +1,127 @@
+import datetime
+import pathlib
+import sys
+
+import attrs
+import pytest
+
+from slack_github_tracker import protocols, recorded
+from slack_github_tracker.handlers import github
+
+FIXTURES = pathlib.Path(__file__).parent.parent.parent / "fixtures" / "github"
+
+pr1 = github.event.PullRequest(
+    organisation="delfick", repo="test-for-github-webhooks", pr_number=1
+)
+pr2 = attrs.evolve(pr1, pr_number=2)
+
+
+def at(timestamp: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(timestamp)
+
+
+def interpret(incoming: github.protocols.Incoming) -> list[github.protocols.Event]:
+    return list(github.interpret.pull_request.PullRequestEventInterpreter().interpret(incoming))
+
+
+class TestPullRequestEventInterpreter:
+    @pytest.mark.parametrize(
+        ("fixture", "expected"),
+        [
+            (
+                "opened",
+                github.event.PullRequestOpened(
+                    pr=pr1,
+                    sender="delfick",
+                    updated_at=at("2024-11-12T21:49:58"),
+                    title="remove b",
+                ),
+            ),
+            (
+                "opened-revert",
+                github.event.PullRequestOpened(
+                    pr=pr2,
+                    sender="delfick",
+                    updated_at=at("2024-11-13T00:32:01"),
+                    title='Revert "remove b"',
+                ),
+            ),
+            (
+                "closed-merged",
+                github.event.PullRequestMerged(
+                    pr=pr1, sender="delfick", updated_at=at("2024-11-13T00:31:15")
+                ),
+            ),
+            (
+                "closed-nomerge",
+                github.event.PullRequestClosed(
+                    pr=pr2, sender="delfick", updated_at=at("2024-11-13T00:32:58")
+                ),
+            ),
+            (
+                "reopened",
+                github.event.PullRequestReopened(
+                    pr=pr2, sender="delfick", updated_at=at("2024-11-13T00:34:02")
+                ),
+            ),
+            (
+                "ready_for_review",
+                github.event.PullRequestReadyForReview(
+                    pr=pr1, sender="delfick", updated_at=at("2024-11-13T00:00:56")
+                ),
+            ),
+            (
+                "converted_to_draft",
+                github.event.PullRequestConvertedToDraft(
+                    pr=pr1, sender="delfick", updated_at=at("2024-11-12T23:55:59")
+                ),
+            ),
+        ],
+    )
+    def test_it_interprets_recorded_webhooks(
+        self, fixture: str, expected: github.protocols.Event, logger: protocols.Logger
+    ) -> None:
+        webhook = recorded.RecordedWebhook.from_file(FIXTURES / fixture)
+        assert interpret(webhook.incoming(logger)) == [expected]
+
+    def test_it_interprets_pushes(self, logger: protocols.Logger) -> None:
+        incoming = recorded.RecordedWebhook.from_file(FIXTURES / "opened").incoming(logger)
+        incoming.body.update(action="synchronize", before="a" * 40, after="b" * 40)
+        assert interpret(incoming) == [
+            github.event.PullRequestSynchronized(
+                pr=pr1,
+                sender="delfick",
+                updated_at=at("2024-11-12T21:49:58"),
+                before="a" * 40,
+                after="b" * 40,
+            )
+        ]
+
+    def test_it_ignores_other_events_and_actions(self, logger: protocols.Logger) -> None:
+        for webhook in recorded.from_directory(FIXTURES):
+            if webhook.event != "pull_request":
+                assert interpret(webhook.incoming(logger)) == []
+
+        incoming = recorded.RecordedWebhook.from_file(FIXTURES / "opened").incoming(logger)
+        incoming.body["action"] = "labeled"
+        assert interpret(incoming) == []
+
+    def test_it_drops_malformed_webhooks(self, logger: protocols.Logger) -> None:
+        incoming = recorded.RecordedWebhook.from_file(FIXTURES / "opened").incoming(logger)
+        del incoming.body["repository"]
+        with pytest.raises(github.errors.GithubWebhookDropped) as e:
+            interpret(incoming)
+        assert e.value.reason == "Malformed pull_request webhook"
+
+    def test_it_keeps_events_small(self, logger: protocols.Logger) -> None:
+        webhook = recorded.RecordedWebhook.from_file(FIXTURES / "opened")
+        (first,) = interpret(webhook.incoming(logger))
+        (second,) = interpret(webhook.incoming(logger))
+
+        assert not hasattr(first, "__dict__")
+        assert sys.getsizeof(first) < 100
+
+        # Names shared by every event for a repository are only held once
+        assert isinstance(first, github.event.PullRequestOpened)
+        assert isinstance(second, github.event.PullRequestOpened)
+        assert first.pr.repo is second.pr.repo
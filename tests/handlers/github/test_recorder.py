@@ -0,0 +1,124 @@
+import os
+import pathlib
+
+from slack_github_tracker import protocols, recorded
+from slack_github_tracker.handlers import github
+
+FIXTURES = pathlib.Path(__file__).parent.parent.parent / "fixtures" / "github"
+
+
+def record_fixtures(recorder: github.recorder.DeliveryRecorder) -> list[recorded.RecordedWebhook]:
+    webhooks = recorded.from_directory(FIXTURES)
+    recorder.start()
+    try:
+        for webhook in webhooks:
+            recorder.record(webhook.headers, webhook.body)
+    finally:
+        recorder.stop()
+    return webhooks
+
+
+class TestDeliveryRecorder:
+    def test_it_can_find_and_replay_recorded_deliveries(
+        self, logger: protocols.Logger, tmp_path: pathlib.Path
+    ) -> None:
+        recorder = github.recorder.DeliveryRecorder(
+            logger=logger, directory=tmp_path, max_segment_bytes=20_000
+        )
+        webhooks = record_fixtures(recorder)
+
+        # Deliveries are spread over several segments, each with an index
+        segments = sorted(tmp_path.glob("*.gz"))
+        assert len(segments) > 1
+        assert len(list(tmp_path.glob("*.index"))) == len(segments)
+        assert recorder.pending_bytes == 0
+
+        wanted = webhooks[3]
+        found = github.recorder.DeliveryLog(tmp_path).find(wanted.headers["x-github-delivery"])
+        assert found is not None
+        assert (found.headers, found.body) == (wanted.headers, wanted.body)
+        assert github.recorder.DeliveryLog(tmp_path).find("nope") is None
+
+        # The log is read in the order deliveries were recorded
+        replayed = recorded.from_paths([tmp_path])
+        assert [(webhook.headers, webhook.body) for webhook in replayed] == [
+            (webhook.headers, webhook.body) for webhook in webhooks
+        ]
+
+        dumped = tmp_path / "dumped"
+        dumped.write_bytes(replayed[0].dump())
+        assert recorded.RecordedWebhook.from_file(dumped).body == webhooks[0].body
+
+    def test_it_deletes_the_oldest_segments(
+        self, logger: protocols.Logger, tmp_path: pathlib.Path
+    ) -> None:
+        old = tmp_path / "deliveries-20200101T000000-1-000001.gz"
+        old.write_bytes(b"")
+        (tmp_path / "deliveries-20200101T000000-1-000001.index").write_text("")
+        os.utime(old, (0, 0))
+
+        recorder = github.recorder.DeliveryRecorder(
+            logger=logger,
+            directory=tmp_path,
+            max_segment_bytes=20_000,
+            max_total_bytes=40_000,
+            max_age_seconds=24 * 3600,
+        )
+        record_fixtures(recorder)
+
+        segments = sorted(tmp_path.glob("*.gz"))
+        assert old not in segments
+        assert not (tmp_path / "deliveries-20200101T000000-1-000001.index").exists()
+
+        # Only the segment being written to can take the total over the limit
+        assert sum(segment.stat().st_size for segment in segments[:-1]) <= 40_000
+
+    def test_it_drops_deliveries_when_the_writer_is_behind(
+        self, logger: protocols.Logger, tmp_path: pathlib.Path
+    ) -> None:
+        recorder = github.recorder.DeliveryRecorder(
+            logger=logger, directory=tmp_path, max_pending_bytes=100
+        )
+        # The writer isn't started so nothing is taken off the queue
+        recorder.record({"x-github-delivery": "one"}, b"a" * 60)
+        recorder.record({"x-github-delivery": "two"}, b"b" * 60)
+        assert recorder.pending_bytes == 60
+
+        recorder.start()
+        recorder.stop()
+        assert [delivery.delivery for delivery in github.recorder.DeliveryLog(tmp_path)] == ["one"]
+
+    def test_it_leaves_segments_other_workers_may_be_writing_to(
+        self, logger: protocols.Logger, tmp_path: pathlib.Path
+    ) -> None:
+        other = tmp_path / "deliveries-20200101T000000-1-000001.gz"
+        other.write_bytes(b"x" * 50_000)
+        (tmp_path / "deliveries-20200101T000000-1-000001.index").write_text("")
+
+        recorder = github.recorder.DeliveryRecorder(
+            logger=logger, directory=tmp_path, max_segment_bytes=20_000, max_total_bytes=40_000
+        )
+        record_fixtures(recorder)
+
+        # It is over the limit on its own but was written to recently
+        assert other.exists()
+        assert len(list(tmp_path.glob(f"*-{os.getpid()}-*.gz"))) > 0
+
+    def test_it_ignores_a_record_that_was_not_finished(
+        self, logger: protocols.Logger, tmp_path: pathlib.Path
+    ) -> None:
+        recorder = github.recorder.DeliveryRecorder(logger=logger, directory=tmp_path)
+        recorder.start()
+        recorder.record({"x-github-delivery": "one"}, b"a" * 60)
+        recorder.record({"x-github-delivery": "two"}, b"b" * 60)
+        recorder.stop()
+
+        # The process stopped part way through writing the second record
+        (segment,) = tmp_path.glob("*.gz")
+        segment.write_bytes(segment.read_bytes()[:-10])
+
+        log = github.recorder.DeliveryLog(tmp_path)
+        assert log.find("two") is None
+        found = log.find("one")
+        assert found is not None and found.body == b"a" * 60
+        assert [delivery.delivery for delivery in log] == ["one"]
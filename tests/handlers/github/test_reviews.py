@@ -0,0 +1,186 @@
+import datetime
+import pathlib
+from collections.abc import Sequence
+from typing import Any, cast
+
+import attrs
+
+from slack_github_tracker import caching, protocols, recorded, storage
+from slack_github_tracker.handlers import digest, github
+
+FIXTURES = pathlib.Path(__file__).parent.parent.parent / "fixtures" / "github"
+
+ReviewState = github.reviews.ReviewState
+
+
+def at(minute: int) -> datetime.datetime:
+    return datetime.datetime(2024, 11, 13, 0, minute)
+
+
+@attrs.define
+class FakeStorage:
+    stored: dict[str, storage.protocols.Review] = attrs.field(factory=dict)
+
+    async def tracking_channels(self, pr: storage.protocols.PR, /) -> Sequence[str]:
+        return ["C1"]
+
+    async def store_review(self, review: storage.protocols.Review, /) -> None:
+        self.stored[review.reviewer] = review
+
+    async def reviews(self, pr: storage.protocols.PR, /) -> Sequence[storage.protocols.Review]:
+        return list(self.stored.values())
+
+
+@attrs.define
+class FakeDigest:
+    delivered: list[tuple[str, str]] = attrs.field(factory=list)
+
+    async def deliver(
+        self,
+        *,
+        channel_id: str,
+        change: digest.protocols.Change,
+        sender: digest.protocols.MessageSender,
+    ) -> None:
+        self.delivered.append((channel_id, change.description))
+
+
+@attrs.frozen
+class Info:
+    logger: protocols.Logger
+    storage: FakeStorage = attrs.field(factory=FakeStorage)
+    digest: FakeDigest = attrs.field(factory=FakeDigest)
+    database: Any = None
+    background_tasks: Any = None
+    slack_app: Any = attrs.field(factory=lambda: attrs.make_class("App", ["client"])(None))
+
+
+class TestReviewSummary:
+    def test_it_counts_the_latest_review_from_each_reviewer(self) -> None:
+        summary = github.reviews.ReviewSummary()
+        summary.apply("one", ReviewState.CHANGES_REQUESTED, review_id=1, submitted_at=at(1))
+        summary.apply("two", ReviewState.APPROVED, review_id=2, submitted_at=at(2))
+        assert (summary.approvals, summary.changes_requested, summary.decision) == (
+            1,
+            1,
+            github.reviews.ReviewDecision.CHANGES_REQUESTED,
+        )
+
+        # Commenting doesn't take back a request for changes
+        summary.apply("one", ReviewState.COMMENTED, review_id=3, submitted_at=at(3))
+        assert summary.reviewers["one"].state is ReviewState.CHANGES_REQUESTED
+
+        summary.apply("one", ReviewState.APPROVED, review_id=4, submitted_at=at(4))
+        assert (summary.approvals, summary.changes_requested, summary.decision) == (
+            2,
+            0,
+            github.reviews.ReviewDecision.APPROVED,
+        )
+
+        # Older reviews and dismissals of replaced reviews change nothing
+        assert (
+            summary.apply("two", ReviewState.CHANGES_REQUESTED, review_id=0, submitted_at=at(0))
+            is None
+        )
+        assert summary.apply("one", ReviewState.DISMISSED, review_id=1, submitted_at=at(5)) is None
+
+        summary.apply("one", ReviewState.DISMISSED, review_id=4, submitted_at=at(4))
+        summary.apply("two", ReviewState.DISMISSED, review_id=2, submitted_at=at(2))
+        assert (summary.approvals, summary.changes_requested, summary.decision) == (
+            0,
+            0,
+            github.reviews.ReviewDecision.REVIEW_REQUIRED,
+        )
+
+    def test_it_ignores_a_review_that_arrives_after_its_dismissal(self) -> None:
+        summary = github.reviews.ReviewSummary()
+        summary.apply("one", ReviewState.DISMISSED, review_id=1, submitted_at=at(1))
+        assert summary.apply("one", ReviewState.APPROVED, review_id=1, submitted_at=at(1)) is None
+        assert summary.reviewers["one"].state is ReviewState.DISMISSED
+        assert (summary.approvals, summary.changes_requested) == (0, 0)
+
+        # A later review from them still counts
+        summary.apply("one", ReviewState.APPROVED, review_id=2, submitted_at=at(2))
+        assert (summary.approvals, summary.changes_requested) == (1, 0)
+
+    def test_it_dismisses_an_approval_that_was_followed_by_a_comment(self) -> None:
+        summary = github.reviews.ReviewSummary()
+        summary.apply("one", ReviewState.APPROVED, review_id=1, submitted_at=at(1))
+
+        commented = summary.apply("one", ReviewState.COMMENTED, review_id=2, submitted_at=at(50))
+        assert commented == github.reviews.ReviewerState(
+            state=ReviewState.APPROVED, review_id=1, submitted_at=at(1)
+        )
+
+        # Older comments are ignored
+        assert summary.apply("one", ReviewState.COMMENTED, review_id=3, submitted_at=at(5)) is None
+
+        # The dismissal has the submitted_at of the approval it dismisses
+        dismissed = summary.apply("one", ReviewState.DISMISSED, review_id=1, submitted_at=at(1))
+        assert dismissed is not None and dismissed.state is ReviewState.DISMISSED
+        assert summary.decision == github.reviews.ReviewDecision.REVIEW_REQUIRED
+
+
+class TestPullRequestReviewEvents:
+    async def test_it_keeps_the_summary_up_to_date_from_recorded_webhooks(
+        self, logger: protocols.Logger
+    ) -> None:
+        interpreter = github.interpret.pull_request_review.PullRequestReviewEventInterpreter()
+        info = Info(logger=logger)
+
+        for fixture in [
+            "submitted-commented-owner",
+            "submitted-commented-collab",
+            "submitted-changes_requested-collab",
+            "dismissed-collab",
+            "submitted-approve",
+        ]:
+            incoming = recorded.RecordedWebhook.from_file(FIXTURES / fixture).incoming(logger)
+            for event in interpreter.interpret(incoming):
+                await event.process(cast(github.protocols.EventProcessInfo, info))
+
+        assert info.digest.delivered == [
+            ("C1", "reviewed by delfick: 0 approved, 0 requested changes (review required)"),
+            (
+                "C1",
+                "reviewed by kcollasarundell: 0 approved, 0 requested changes (review required)",
+            ),
+            (
+                "C1",
+                "changes requested by kcollasarundell:"
+                " 0 approved, 1 requested changes (changes requested)",
+            ),
+            (
+                "C1",
+                "review from kcollasarundell dismissed by kcollasarundell:"
+                " 0 approved, 0 requested changes (review required)",
+            ),
+            ("C1", "approved by kcollasarundell: 1 approved, 0 requested changes (approved)"),
+        ]
+
+        stored = info.storage.stored["kcollasarundell"]
+        assert (stored.state, stored.review_id) == ("approved", 2431221502)
+
+        # A new process picks up where the stored reviews left off
+        summary = await github.reviews.Reviews().summary(stored.pr, info.storage)
+        assert summary.decision == github.reviews.ReviewDecision.APPROVED
+
+
+class TestReviews:
+    async def test_it_loads_summaries_from_storage_again_once_they_are_dropped(self) -> None:
+        fake_storage = FakeStorage()
+        pr = storage.requests.PR(organisation="delfick", repo="stuff", pr_number=1)
+        fake_storage.stored["one"] = storage.requests.Review(
+            pr=pr, reviewer="one", state="approved", review_id=1, submitted_at=at(1)
+        )
+
+        reviews = github.reviews.Reviews(summaries=caching.TTLCache(maxsize=1, ttl=60))
+        first = await reviews.summary(pr, fake_storage)
+        assert await reviews.summary(pr, fake_storage) is first
+
+        other = storage.requests.PR(organisation="delfick", repo="stuff", pr_number=2)
+        await reviews.summary(other, fake_storage)
+
+        reloaded = await reviews.summary(pr, fake_storage)
+        assert reloaded is not first
+        assert reloaded.decision == github.reviews.ReviewDecision.APPROVED
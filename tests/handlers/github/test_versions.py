@@ -0,0 +1,124 @@
+import asyncio
+import datetime
+import pathlib
+from collections.abc import Sequence
+from typing import Any, cast
+
+import attrs
+
+from slack_github_tracker import protocols, recorded, storage
+from slack_github_tracker.handlers import digest, github
+
+FIXTURES = pathlib.Path(__file__).parent.parent.parent / "fixtures" / "github"
+
+
+@attrs.define
+class FakeStorage:
+    calls: list[str] = attrs.field(factory=list)
+    versions: list[storage.protocols.PRVersion] = attrs.field(factory=list)
+
+    # The latest change stored, which may have come from another process
+    stored: datetime.datetime | None = None
+
+    async def tracking_channels(self, pr: storage.protocols.PR, /) -> Sequence[str]:
+        self.calls.append("tracking_channels")
+        return ["C1"]
+
+    async def store_pr_version(self, version: storage.protocols.PRVersion, /) -> bool:
+        self.calls.append(f"store_pr_version {version.updated_at.isoformat()}")
+        if self.stored is not None and self.stored > version.updated_at:
+            return False
+        self.stored = version.updated_at
+        return True
+
+    async def pr_versions(self) -> Sequence[storage.protocols.PRVersion]:
+        return self.versions
+
+
+@attrs.define
+class FakeDigest:
+    delivered: list[str] = attrs.field(factory=list)
+
+    async def deliver(
+        self,
+        *,
+        channel_id: str,
+        change: digest.protocols.Change,
+        sender: digest.protocols.MessageSender,
+    ) -> None:
+        self.delivered.append(change.description)
+
+
+@attrs.frozen
+class Info:
+    logger: protocols.Logger
+    versions: github.versions.PRVersions
+    storage: FakeStorage = attrs.field(factory=FakeStorage)
+    digest: FakeDigest = attrs.field(factory=FakeDigest)
+    database: Any = None
+    background_tasks: Any = None
+    slack_app: Any = attrs.field(factory=lambda: attrs.make_class("App", ["client"])(None))
+
+
+class TestPRVersions:
+    async def test_it_ignores_events_that_arrive_after_later_changes(
+        self, logger: protocols.Logger
+    ) -> None:
+        info = Info(logger=logger, versions=github.versions.PRVersions(logger=logger))
+        interpreter = github.interpret.EventInterpreter()
+
+        # Github sent the close before the reopen, but the reopen arrived first
+        for fixture in ["reopened", "closed-nomerge"]:
+            incoming = recorded.RecordedWebhook.from_file(FIXTURES / fixture).incoming(logger)
+            for event in interpreter.interpret(incoming):
+                await event.process(cast(github.protocols.EventProcessInfo, info))
+
+        assert info.digest.delivered == ["reopened by delfick"]
+        assert info.storage.calls == [
+            "store_pr_version 2024-11-13T00:34:02",
+            "tracking_channels",
+        ]
+
+    async def test_it_ignores_events_older_than_changes_stored_by_other_processes(
+        self, logger: protocols.Logger
+    ) -> None:
+        info = Info(logger=logger, versions=github.versions.PRVersions(logger=logger))
+        info.storage.stored = datetime.datetime(2024, 11, 14)
+        interpreter = github.interpret.EventInterpreter()
+
+        incoming = recorded.RecordedWebhook.from_file(FIXTURES / "reopened").incoming(logger)
+        for event in interpreter.interpret(incoming):
+            await event.process(cast(github.protocols.EventProcessInfo, info))
+
+        assert info.digest.delivered == []
+        assert info.storage.calls == ["store_pr_version 2024-11-13T00:34:02"]
+
+    async def test_it_loads_versions_from_storage(self, logger: protocols.Logger) -> None:
+        pr = storage.requests.PR(organisation="delfick", repo="stuff", pr_number=1)
+        at = datetime.datetime(2024, 11, 13)
+
+        versions = github.versions.PRVersions(logger=logger)
+        assert versions.advance(pr, at + datetime.timedelta(minutes=1))
+
+        await versions.load(
+            FakeStorage(versions=[storage.requests.PRVersion(pr=pr, updated_at=at)])
+        )
+        assert len(versions) == 1
+
+        # Loading keeps the later version that was already applied
+        assert not versions.advance(pr, at)
+        assert versions.advance(pr, at + datetime.timedelta(minutes=1))
+
+    async def test_it_waits_for_the_load_to_finish_or_fail(self, logger: protocols.Logger) -> None:
+        class BrokenStorage:
+            async def pr_versions(self) -> Sequence[storage.protocols.PRVersion]:
+                raise ConnectionError("database is down")
+
+        for source in (FakeStorage(), BrokenStorage()):
+            versions = github.versions.PRVersions(logger=logger)
+            waiting = asyncio.create_task(versions.wait_for_load())
+            await asyncio.sleep(0.01)
+            assert not waiting.done()
+
+            await versions.load(source)
+            await asyncio.wait_for(waiting, timeout=1)
@@ -0,0 +1,94 @@
+import asyncio
+
+import attrs
+
+from slack_github_tracker import protocols
+from slack_github_tracker.handlers import server
+
+
+@attrs.define
+class FakeWork:
+    remaining: int = 0
+    flushed: int = 0
+    abandoned: int = 0
+
+    async def flush(self) -> None:
+        self.flushed += self.remaining
+        self.remaining = 0
+
+    def abandon(self) -> None:
+        self.abandoned += self.remaining
+
+
+class TestDrain:
+    async def test_it_drains_steps_in_order(self, logger: protocols.Logger) -> None:
+        events = FakeWork(remaining=3)
+        digests = FakeWork(remaining=1)
+
+        async def process_events() -> None:
+            while events.remaining:
+                await asyncio.sleep(0.01)
+                events.remaining -= 1
+                # Processing an event adds to the digest
+                digests.remaining += 1
+
+        drain = server.Drain(
+            logger=logger,
+            steps=[
+                server.DrainStep(name="events", remaining=lambda: events.remaining),
+                server.DrainStep(
+                    name="digests", remaining=lambda: digests.remaining, flush=digests.flush
+                ),
+            ],
+            poll_every=0.005,
+        )
+
+        task = asyncio.create_task(process_events())
+        loop = asyncio.get_running_loop()
+        assert await drain.run(deadline=loop.time() + 5)
+        await task
+
+        assert drain.stopping
+        assert digests.flushed == 4
+        assert drain.remaining() == {"events": 0, "digests": 0}
+
+    async def test_it_abandons_what_remains_at_the_deadline(
+        self, logger: protocols.Logger
+    ) -> None:
+        events = FakeWork(remaining=3)
+        digests = FakeWork(remaining=2)
+
+        drain = server.Drain(
+            logger=logger,
+            steps=[
+                server.DrainStep(
+                    name="events", remaining=lambda: events.remaining, abandon=events.abandon
+                ),
+                server.DrainStep(
+                    name="digests",
+                    remaining=lambda: digests.remaining,
+                    flush=digests.flush,
+                    abandon=digests.abandon,
+                ),
+            ],
+            poll_every=0.005,
+        )
+
+        loop = asyncio.get_running_loop()
+        assert not await drain.run(deadline=loop.time() + 0.05)
+
+        assert events.abandoned == 3
+        assert digests.abandoned == 2
+        assert digests.flushed == 0
+
+    async def test_it_fails_readiness_for_the_grace_period_before_stopping(
+        self, logger: protocols.Logger
+    ) -> None:
+        drain = server.Drain(logger=logger, steps=[], grace_seconds=0.05)
+
+        task = asyncio.create_task(drain.stop_accepting())
+        await asyncio.sleep(0.01)
+        assert drain.stopping
+        assert not task.done()
+
+        await asyncio.wait_for(task, timeout=1)
@@ -0,0 +1,62 @@
+import json
+from typing import cast
+
+import attrs
+import sanic
+
+from slack_github_tracker import protocols
+from slack_github_tracker.handlers import github, server
+
+
+@attrs.frozen
+class FakeRequest:
+    body: bytes
+    headers: dict[str, str]
+
+    @property
+    def json(self) -> object:
+        return json.loads(self.body)
+
+
+@attrs.define
+class BrokenHooks:
+    registered: int = 0
+
+    async def register(self, incoming: github.protocols.Incoming, /) -> None:
+        self.registered += 1
+        raise KeyError("unexpected body")
+
+    def determine_expected_signature(
+        self, body: bytes, /, *, hook_id: str = "", installation_target_id: str = ""
+    ) -> str | None:
+        return "sha256=valid"
+
+
+def webhook() -> sanic.Request:
+    return cast(
+        sanic.Request,
+        FakeRequest(
+            body=b'{"action": "opened"}',
+            headers={
+                "user-agent": "GitHub-Hookshot/1",
+                "x-hub-signature-256": "sha256=valid",
+                "x-github-delivery": "d1",
+                "x-github-event": "pull_request",
+                "x-github-hook-id": "1",
+                "x-github-hook-installation-target-id": "2",
+                "x-github-hook-installation-target-type": "repository",
+            },
+        ),
+    )
+
+
+class TestGithubWebhook:
+    async def test_it_forgets_deliveries_that_fail(self, logger: protocols.Logger) -> None:
+        hooks = BrokenHooks()
+        handler = server.GithubWebhook(logger, hooks, github.deliveries.Deliveries(logger=logger))
+
+        assert (await handler.handle(webhook())).status == 500
+
+        # Github's redelivery is processed again rather than dropped as a duplicate
+        assert (await handler.handle(webhook())).status == 500
+        assert hooks.registered == 2
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from machinery import helpers as hp
+
+from slack_github_tracker.handlers import server
+
+
+class TestReadiness:
+    def test_it_fails_checks_over_their_threshold(self) -> None:
+        backlog = [10]
+        readiness = server.Readiness(
+            checks=[
+                server.Check(name="event_backlog", read=lambda: backlog[0], threshold=100),
+                server.Check(name="event_loop_lag_seconds", read=lambda: 0.1, threshold=0.5),
+            ]
+        )
+        assert all(result.ok for result in readiness.results())
+
+        backlog[0] = 101
+        assert [(result.name, result.ok) for result in readiness.results()] == [
+            ("event_backlog", False),
+            ("event_loop_lag_seconds", True),
+        ]
+
+
+class TestLoopLag:
+    async def test_it_measures_how_late_the_loop_is(self) -> None:
+        final_future: asyncio.Future[None] = hp.create_future()
+        loop_lag = server.LoopLag(interval=0.01)
+        task = asyncio.create_task(loop_lag.run(final_future))
+
+        await asyncio.sleep(0.05)
+        assert loop_lag.lag < 0.05
+
+        # Block the loop so the monitor wakes up late
+        time.sleep(0.2)
+        await asyncio.sleep(0.005)
+        assert loop_lag.lag > 0.1
+
+        final_future.cancel()
+        await task
@@ -0,0 +1,103 @@
+import hashlib
+import hmac
+import time
+from typing import cast
+from urllib import parse
+
+import attrs
+import sanic
+import slack_bolt.async_app
+from slack_bolt.request.async_request import AsyncBoltRequest
+from slack_bolt.response import BoltResponse
+from slack_sdk.signature import SignatureVerifier
+
+from slack_github_tracker import protocols
+from slack_github_tracker.handlers import server
+
+SIGNING_SECRET = "signing-secret"
+
+
+@attrs.frozen
+class FakeRequest:
+    body: bytes
+    headers: dict[str, str]
+    query_string: str = ""
+
+
+@attrs.define
+class FakeSlackApp:
+    dispatched: int = 0
+
+    async def async_dispatch(self, request: AsyncBoltRequest) -> BoltResponse:
+        headers = {name: values[0] for name, values in request.headers.items()}
+        if not SignatureVerifier(SIGNING_SECRET).is_valid_request(request.raw_body, headers):
+            return BoltResponse(status=401, body="")
+        self.dispatched += 1
+        return BoltResponse(status=200, body="")
+
+
+def command(*, signed: bool, retry: bool = False) -> sanic.Request:
+    body = parse.urlencode({"command": "/track_pr", "trigger_id": "1.2"}).encode()
+    timestamp = str(int(time.time()))
+    secret = SIGNING_SECRET if signed else "wrong"
+    digest = hmac.new(secret.encode(), f"v0:{timestamp}:".encode() + body, hashlib.sha256)
+    headers = {
+        "content-type": "application/x-www-form-urlencoded",
+        "x-slack-request-timestamp": timestamp,
+        "x-slack-signature": f"v0={digest.hexdigest()}",
+    }
+    if retry:
+        headers["x-slack-retry-num"] = "1"
+    return cast(sanic.Request, FakeRequest(body=body, headers=headers))
+
+
+class TestSlackRetries:
+    def test_it_finds_a_key_for_events_commands_and_interactions(self) -> None:
+        retries = server.SlackRetries()
+
+        assert retries.key_for({"type": "event_callback", "event_id": "Ev1"}) == "event_id:Ev1"
+        assert retries.key_for({"command": "/track_pr", "trigger_id": "1.2"}) == "trigger_id:1.2"
+        assert retries.key_for({"event_id": ""}) is None
+        assert retries.key_for({"text": "stuff"}) is None
+
+    def test_it_only_dispatches_retries_that_have_not_been_seen(self) -> None:
+        retries = server.SlackRetries()
+
+        assert retries.start("event_id:Ev1", is_retry=False)
+        assert not retries.start("event_id:Ev1", is_retry=True)
+
+        retries.completed("event_id:Ev1", success=True)
+        assert not retries.start("event_id:Ev1", is_retry=True)
+
+        assert retries.start("event_id:Ev2", is_retry=True)
+        assert retries.duplicates == 2
+
+    def test_it_dispatches_retries_for_requests_that_failed(self) -> None:
+        retries = server.SlackRetries()
+
+        assert retries.start("event_id:Ev1", is_retry=False)
+        retries.completed("event_id:Ev1", success=False)
+        assert retries.start("event_id:Ev1", is_retry=True)
+        assert retries.duplicates == 0
+
+
+class TestSlackEvents:
+    async def test_it_only_recognises_retries_of_signed_requests(
+        self, logger: protocols.Logger
+    ) -> None:
+        slack_app = FakeSlackApp()
+        events = server.SlackEvents(
+            logger,
+            cast(slack_bolt.async_app.AsyncApp, slack_app),
+            server.SlackRetries(),
+            signing_secret=SIGNING_SECRET,
+        )
+
+        # An unsigned copy is refused and doesn't claim the key
+        assert (await events.handle(command(signed=False))).status == 401
+        assert (await events.handle(command(signed=False, retry=True))).status == 401
+        assert slack_app.dispatched == 0
+
+        assert (await events.handle(command(signed=True))).status == 200
+        assert (await events.handle(command(signed=True, retry=True))).status == 200
+        assert slack_app.dispatched == 1
@@ -0,0 +1,88 @@
+import datetime
+from collections.abc import Sequence
+
+import attrs
+
+from slack_github_tracker import protocols, storage
+
+
+@attrs.define
+class FakeStorage:
+    prs: list[storage.protocols.PR] = attrs.field(factory=list)
+    asked: list[datetime.datetime | None] = attrs.field(factory=list)
+
+    # What is_tracked finds, as if other processes tracked them
+    database: set[tuple[str, str, int]] = attrs.field(factory=set)
+    lookups: list[tuple[str, str, int]] = attrs.field(factory=list)
+    broken: bool = False
+
+    async def tracked_prs(
+        self, *, added_since: datetime.datetime | None = None
+    ) -> Sequence[storage.protocols.PR]:
+        self.asked.append(added_since)
+        prs, self.prs = self.prs, []
+        return prs
+
+    async def is_tracked(self, pr: storage.protocols.PR, /) -> bool:
+        key = storage.requests.pr_key(pr)
+        self.lookups.append(key)
+        if self.broken:
+            raise ConnectionError("database is down")
+        return key in self.database
+
+
+class TestTrackedPRs:
+    async def test_it_only_loads_prs_tracked_since_the_last_load(
+        self, logger: protocols.Logger
+    ) -> None:
+        source = FakeStorage(
+            prs=[storage.requests.PR(organisation="Delfick", repo="Stuff", pr_number=1)]
+        )
+        tracked = storage.TrackedPRs(
+            logger=logger, source=source, overlap=datetime.timedelta(minutes=1)
+        )
+
+        before = datetime.datetime.utcnow()
+        await tracked.load()
+        assert source.asked == [None]
+
+        source.prs = [storage.requests.PR(organisation="delfick", repo="other", pr_number=2)]
+        await tracked.load()
+        added_since = source.asked[1]
+        assert added_since is not None
+        assert before - datetime.timedelta(minutes=1) <= added_since < before
+
+        # Case doesn't matter
+        assert await tracked.is_tracked("delfick", "stuff", 1)
+        assert await tracked.is_tracked("Delfick", "Other", 2)
+        assert not await tracked.is_tracked("delfick", "stuff", 2)
+
+    async def test_it_asks_the_database_about_prs_it_has_not_loaded(
+        self, logger: protocols.Logger
+    ) -> None:
+        source = FakeStorage()
+        tracked = storage.TrackedPRs(logger=logger, source=source)
+        await tracked.load()
+
+        # Tracked by another process since the load
+        source.database.add(("delfick", "stuff", 1))
+        assert await tracked.is_tracked("Delfick", "Stuff", 1)
+        assert await tracked.is_tracked("delfick", "stuff", 1)
+        assert source.lookups == [("delfick", "stuff", 1)]
+
+        # PRs that aren't tracked are remembered for a short while
+        assert not await tracked.is_tracked("delfick", "stuff", 2)
+        assert not await tracked.is_tracked("delfick", "stuff", 2)
+        assert source.lookups == [("delfick", "stuff", 1), ("delfick", "stuff", 2)]
+
+        # Unless this process tracks it
+        tracked.add(storage.requests.PR(organisation="delfick", repo="stuff", pr_number=2))
+        assert await tracked.is_tracked("delfick", "stuff", 2)
+
+        # Nothing is dropped when the database can't be asked
+        source.broken = True
+        assert await tracked.is_tracked("delfick", "stuff", 3)
+
+        # And that answer isn't remembered
+        source.broken = False
+        assert not await tracked.is_tracked("delfick", "stuff", 3)
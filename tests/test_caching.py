@@ -0,0 +1,48 @@
+import attrs
+
+from slack_github_tracker import caching
+
+
+@attrs.define
+class FakeClock:
+    now: float = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    def test_it_expires_entries(self) -> None:
+        clock = FakeClock()
+        cache: caching.TTLCache[str, int] = caching.TTLCache(maxsize=10, ttl=5, clock=clock)
+
+        cache.set("one", 1)
+        clock.now = 3
+        cache.set("two", 2)
+        assert cache.get("one") == 1
+        assert "two" in cache
+
+        clock.now = 5
+        assert cache.get("one") is None
+        assert "one" not in cache
+        assert cache.get("two") == 2
+
+        clock.now = 8
+        cache.expire()
+        assert len(cache) == 0
+
+    def test_it_evicts_the_least_recently_used(self) -> None:
+        cache: caching.TTLCache[str, int] = caching.TTLCache(maxsize=2, ttl=60)
+
+        cache.set("one", 1)
+        cache.set("two", 2)
+        assert cache.get("one") == 1
+
+        cache.set("three", 3)
+        assert len(cache) == 2
+        assert "two" not in cache
+        assert cache.get("one") == 1
+        assert cache.get("three") == 3
+
+        assert cache.pop("one") == 1
+        assert cache.pop("one") is None
@@ -0,0 +1,264 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import attrs
+import pytest
+from aiohttp import web
+
+from slack_github_tracker import github_api, metrics, protocols
+
+
+@attrs.define
+class FakeGithub:
+    url: str = ""
+    version: int = 1
+    remaining: int = 5000
+    reset: float = 1_000_000
+    # How many requests to refuse with a secondary rate limit
+    limited: int = 0
+    requests: list[tuple[str, str | None]] = attrs.field(factory=list)
+    answered: asyncio.Event = attrs.field(factory=asyncio.Event)
+
+    async def pull_request(self, request: web.Request) -> web.Response:
+        if_none_match = request.headers.get("If-None-Match")
+        self.requests.append((request.path, if_none_match))
+        await self.answered.wait()
+
+        etag = f'"v{self.version}"'
+        headers = {
+            "ETag": etag,
+            "x-ratelimit-limit": "5000",
+            "x-ratelimit-remaining": str(self.remaining),
+            "x-ratelimit-reset": str(self.reset),
+        }
+        if if_none_match == etag:
+            return web.Response(status=304, headers=headers)
+
+        if self.limited:
+            self.limited -= 1
+            return web.json_response(
+                {"message": "You have exceeded a secondary rate limit"},
+                status=403,
+                headers={**headers, "Retry-After": "3"},
+            )
+
+        self.remaining -= 1
+        headers["x-ratelimit-remaining"] = str(self.remaining)
+        number = int(request.match_info["number"])
+        if number == 404:
+            return web.json_response({"message": "Not Found"}, status=404, headers=headers)
+        return web.json_response({"number": number, "version": self.version}, headers=headers)
+
+
+@pytest.fixture
+async def fake_github() -> AsyncIterator[FakeGithub]:
+    fake = FakeGithub()
+    fake.answered.set()
+    app = web.Application()
+    app.router.add_get("/repos/{organisation}/{repo}/pulls/{number}", fake.pull_request)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    try:
+        _, port = runner.addresses[0]
+        fake.url = f"http://127.0.0.1:{port}"
+        yield fake
+    finally:
+        await runner.cleanup()
+
+
+@pytest.fixture
+async def client(
+    logger: protocols.Logger, fake_github: FakeGithub
+) -> AsyncIterator[github_api.GithubClient]:
+    client = github_api.GithubClient(
+        logger=logger, token="t0ken", base_url=fake_github.url, metrics=metrics.Metrics()
+    )
+    try:
+        yield client
+    finally:
+        await client.close()
+
+
+class TestGithubClient:
+    async def test_it_uses_etags_to_ask_if_a_response_changed(
+        self, client: github_api.GithubClient, fake_github: FakeGithub
+    ) -> None:
+        first = await client.get("/repos/delfick/tracker/pulls/1")
+        assert first == github_api.Response(
+            status=200, body={"number": 1, "version": 1}, etag='"v1"'
+        )
+        assert client.rate_limit.remaining == 4999
+
+        second = await client.get("/repos/delfick/tracker/pulls/1")
+        assert second.from_cache
+        assert second.body == first.body
+
+        fake_github.version = 2
+        assert await client.pull_request("delfick", "tracker", 1) == {"number": 1, "version": 2}
+
+        assert fake_github.requests == [
+            ("/repos/delfick/tracker/pulls/1", None),
+            ("/repos/delfick/tracker/pulls/1", '"v1"'),
+            ("/repos/delfick/tracker/pulls/1", '"v1"'),
+        ]
+        # The 304 didn't cost anything
+        assert client.rate_limit.remaining == 4998
+
+    async def test_it_coalesces_identical_requests(
+        self, client: github_api.GithubClient, fake_github: FakeGithub
+    ) -> None:
+        fake_github.answered.clear()
+        gets = [
+            asyncio.create_task(client.pull_request("delfick", "tracker", number))
+            for number in (1, 1, 1, 2)
+        ]
+        while len(fake_github.requests) < 2:
+            await asyncio.sleep(0.01)
+        fake_github.answered.set()
+
+        found = await asyncio.gather(*gets)
+        assert [pr["number"] for pr in found] == [1, 1, 1, 2]
+        assert sorted(path for path, _ in fake_github.requests) == [
+            "/repos/delfick/tracker/pulls/1",
+            "/repos/delfick/tracker/pulls/2",
+        ]
+
+    async def test_it_keeps_a_shared_request_going_when_a_caller_is_cancelled(
+        self, client: github_api.GithubClient, fake_github: FakeGithub
+    ) -> None:
+        fake_github.answered.clear()
+        first = asyncio.create_task(client.pull_request("delfick", "tracker", 1))
+        second = asyncio.create_task(client.pull_request("delfick", "tracker", 1))
+        while not fake_github.requests:
+            await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        fake_github.answered.set()
+
+        assert await second == {"number": 1, "version": 1}
+        assert first.cancelled()
+        assert len(fake_github.requests) == 1
+
+    async def test_it_raises_errors_to_everything_waiting(
+        self, client: github_api.GithubClient
+    ) -> None:
+        gets = [client.pull_request("delfick", "tracker", 404) for _ in range(2)]
+        errors = await asyncio.gather(*gets, return_exceptions=True)
+        assert all(
+            isinstance(error, github_api.GithubAPIError) and error.status == 404
+            for error in errors
+        )
+
+    async def test_it_spreads_out_requests_when_the_budget_is_low(
+        self, logger: protocols.Logger, fake_github: FakeGithub
+    ) -> None:
+        fake_github.remaining = 11
+        fake_github.reset = 1100
+        slept: list[float] = []
+
+        async def sleep(seconds: float) -> None:
+            slept.append(seconds)
+
+        client = github_api.GithubClient(
+            logger=logger,
+            token=None,
+            base_url=fake_github.url,
+            rate_limit_reserve=10,
+            clock=lambda: 1000,
+            sleep=sleep,
+        )
+        try:
+            for number in range(3):
+                await client.pull_request("delfick", "tracker", number)
+        finally:
+            await client.close()
+
+        # The first request knows nothing about the budget and the second has 10 left
+        assert slept == [10, 100 / 9]
+
+    async def test_it_shares_the_budget_between_requests_made_at_the_same_time(
+        self, logger: protocols.Logger, fake_github: FakeGithub
+    ) -> None:
+        fake_github.remaining = 11
+        fake_github.reset = 1100
+        slept: list[float] = []
+
+        async def sleep(seconds: float) -> None:
+            slept.append(seconds)
+            await asyncio.sleep(0)
+
+        client = github_api.GithubClient(
+            logger=logger,
+            token=None,
+            base_url=fake_github.url,
+            rate_limit_reserve=10,
+            clock=lambda: 1000,
+            sleep=sleep,
+        )
+        try:
+            await client.pull_request("delfick", "tracker", 0)
+            await asyncio.gather(
+                *(client.pull_request("delfick", "tracker", number) for number in (1, 2, 3))
+            )
+        finally:
+            await client.close()
+
+        assert slept == [10, 100 / 9, 100 / 8]
+
+    async def test_it_waits_and_tries_again_when_github_says_to(
+        self, logger: protocols.Logger, fake_github: FakeGithub
+    ) -> None:
+        fake_github.limited = 1
+        slept: list[float] = []
+        now = 1000.0
+
+        async def sleep(seconds: float) -> None:
+            nonlocal now
+            slept.append(seconds)
+            now += seconds
+
+        client = github_api.GithubClient(
+            logger=logger, token=None, base_url=fake_github.url, clock=lambda: now, sleep=sleep
+        )
+        try:
+            assert await client.pull_request("delfick", "tracker", 1) == {
+                "number": 1,
+                "version": 1,
+            }
+
+            # Github isn't asked again forever
+            fake_github.limited = 5
+            with pytest.raises(github_api.GithubAPIError) as e:
+                await client.pull_request("delfick", "tracker", 2)
+            assert e.value.status == 403
+        finally:
+            await client.close()
+
+        assert slept == [3, 3, 3]
+        assert len(fake_github.requests) == 5
+
+
+class TestRateLimit:
+    def test_it_waits_for_the_reset_when_nothing_remains(self) -> None:
+        rate_limit = github_api.RateLimit(limit=5000, remaining=0, reset=1060)
+        assert rate_limit.delay(now=1000, reserve=10) == 60
+        assert rate_limit.delay(now=1060, reserve=10) == 0
+
+    def test_it_takes_requests_in_flight_out_of_what_remains(self) -> None:
+        rate_limit = github_api.RateLimit(limit=5000, remaining=12, reset=1100)
+        assert rate_limit.delay(now=1000, reserve=10) == 0
+        assert rate_limit.delay(now=1000, reserve=10, in_flight=2) == 10
+        assert rate_limit.delay(now=1000, reserve=10, in_flight=20) == 100
+
+    def test_it_ignores_responses_from_before_the_latest(self) -> None:
+        rate_limit = github_api.RateLimit()
+        rate_limit.update(
+            {"x-ratelimit-limit": "5000", "x-ratelimit-remaining": "10", "x-ratelimit-reset": "60"}
+        )
+        rate_limit.update(
+            {"x-ratelimit-limit": "5000", "x-ratelimit-remaining": "20", "x-ratelimit-reset": "60"}
+        )
+        assert rate_limit.remaining == 10
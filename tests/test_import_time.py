@@ -0,0 +1,60 @@
+import subprocess
+import sys
+
+# The command line took over a second to import when it imported the server
+# eagerly and takes around a tenth of that now. The budget leaves room for
+# slower machines while still catching the server being imported again.
+IMPORT_TIME_BUDGET_SECONDS = 0.4
+
+HEAVY_MODULES = (
+    "sanic",
+    "slack_bolt",
+    "hypercorn",
+    "sqlalchemy",
+    "psycopg",
+    "slack_github_tracker.http_server",
+    "slack_github_tracker.handlers",
+)
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Return the cumulative microseconds taken to import each top level module
+    imported when ``module`` is imported in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Nested imports are indented by two spaces after the separator
+        nested = name.startswith("   ")
+        times[name.strip()] = int(cumulative)
+        if not nested:
+            # Only modules imported directly by the import statement have a
+            # cumulative time that isn't already counted by a parent
+            times.setdefault("<total>", 0)
+            times["<total>"] += int(cumulative)
+    return times
+
+
+class TestImportTime:
+    def test_the_cli_does_not_import_the_server(self) -> None:
+        times = import_times("slack_github_tracker.cli")
+        imported = [
+            name
+            for name in times
+            if any(name == heavy or name.startswith(f"{heavy}.") for heavy in HEAVY_MODULES)
+        ]
+        assert imported == []
+
+    def test_the_cli_imports_within_budget(self) -> None:
+        times = import_times("slack_github_tracker.cli")
+        assert times["<total>"] / 1_000_000 < IMPORT_TIME_BUDGET_SECONDS
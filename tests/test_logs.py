@@ -0,0 +1,71 @@
+import logging
+import threading
+
+import attrs
+
+from slack_github_tracker import logs
+
+
+@attrs.define
+class FakeClock:
+    now: float = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRateSampler:
+    def test_it_limits_logs_per_key(self) -> None:
+        clock = FakeClock()
+        sampler = logs.RateSampler(per_second=1, burst=2, clock=clock)
+
+        assert sampler.sample("dropped") == 0
+        assert sampler.sample("dropped") == 0
+        assert sampler.sample("dropped") is None
+        assert sampler.sample("dropped") is None
+
+        # Other keys have their own limit
+        assert sampler.sample("duplicate") == 0
+
+        clock.now = 1
+        assert sampler.sample("dropped") == 2
+        assert sampler.sample("dropped") is None
+
+        clock.now = 10
+        assert sampler.sample("dropped") == 1
+        assert sampler.sample("dropped") == 0
+        assert sampler.sample("dropped") is None
+
+
+class TestQueued:
+    def test_it_hands_records_to_the_handler_from_another_thread(self) -> None:
+        records: list[object] = []
+        threads: set[str] = set()
+
+        class Collect(logging.Handler):
+            def emit(self, record: logging.LogRecord) -> None:
+                records.append(record.msg)
+                threads.add(threading.current_thread().name)
+
+        logger = logging.getLogger("tests.test_logs")
+        logger.propagate = False
+        handler = logs.queued(Collect())
+        logger.addHandler(handler)
+        try:
+            event = {"event": "Event dropped", "reason": "Unrecognised webhook event"}
+            logger.info(event)
+            logger.info("delivery %s", "one")
+        finally:
+            logs.stop_listeners()
+            logger.removeHandler(handler)
+
+        # The event dictionary from structlog is passed on as it is
+        assert records == [event, "delivery one"]
+        assert threading.current_thread().name not in threads
+
+    def test_it_forgets_listeners_once_they_are_stopped(self) -> None:
+        handler = logs.queued(logging.NullHandler())
+        assert handler in logs._listeners.values()
+
+        logs.stop_listeners()
+        assert not logs._listeners
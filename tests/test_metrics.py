@@ -0,0 +1,52 @@
+import pytest
+
+from slack_github_tracker import metrics
+
+
+class TestMetrics:
+    def test_it_renders_in_the_prometheus_text_format(self) -> None:
+        registry = metrics.Metrics()
+
+        requests = registry.counter("requests_total", "Requests", ("route", "status"))
+        requests.inc("/github/webhook", "200")
+        requests.inc("/github/webhook", "200")
+        requests.inc("/slack/events", "403")
+
+        latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+        latency.observe(0.05, "/github/webhook")
+        latency.observe(0.5, "/github/webhook")
+        latency.observe(3, "/github/webhook")
+
+        depth = [4]
+        registry.callback("queue_depth", "Depth", metrics.Kind.GAUGE, lambda: depth[0])
+
+        assert registry.render() == "\n".join(
+            [
+                "# HELP latency_seconds Latency",
+                "# TYPE latency_seconds histogram",
+                'latency_seconds_bucket{route="/github/webhook",le="0.1"} 1',
+                'latency_seconds_bucket{route="/github/webhook",le="1"} 2',
+                'latency_seconds_bucket{route="/github/webhook",le="+Inf"} 3',
+                'latency_seconds_sum{route="/github/webhook"} 3.55',
+                'latency_seconds_count{route="/github/webhook"} 3',
+                "# HELP queue_depth Depth",
+                "# TYPE queue_depth gauge",
+                "queue_depth 4",
+                "# HELP requests_total Requests",
+                "# TYPE requests_total counter",
+                'requests_total{route="/github/webhook",status="200"} 2',
+                'requests_total{route="/slack/events",status="403"} 1',
+                "",
+            ]
+        )
+
+        depth[0] = 0
+        assert "queue_depth 0\n" in registry.render()
+
+    def test_it_returns_existing_metrics_by_name(self) -> None:
+        registry = metrics.Metrics()
+        counter = registry.counter("dropped_total", "Dropped", ("reason",))
+        assert registry.counter("dropped_total", "Dropped", ("reason",)) is counter
+
+        with pytest.raises(TypeError):
+            registry.gauge("dropped_total", "Dropped")
@@ -0,0 +1,73 @@
+import pathlib
+from collections.abc import AsyncIterator
+
+import attrs
+import pytest
+from aiohttp import web
+
+from slack_github_tracker import recorded, replay
+from slack_github_tracker.handlers import github
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures" / "github"
+
+
+@attrs.define
+class FakeServer:
+    secret: str
+    url: str = ""
+    deliveries: list[str] = attrs.field(factory=list)
+
+    async def webhook(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        if request.headers["x-hub-signature-256"] != github.hooks.signature(self.secret, body):
+            return web.Response(status=403)
+
+        self.deliveries.append(request.headers["x-github-delivery"])
+        return web.Response(status=200)
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[FakeServer]:
+    server = FakeServer(secret="s3cret")
+    app = web.Application()
+    app.router.add_post("/github/webhook", server.webhook)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    try:
+        _, port = runner.addresses[0]
+        server.url = f"http://127.0.0.1:{port}/github/webhook"
+        yield server
+    finally:
+        await runner.cleanup()
+
+
+class TestReplay:
+    async def test_it_signs_each_webhook_with_a_new_delivery(self, server: FakeServer) -> None:
+        webhooks = recorded.from_paths([FIXTURES])
+        results = await replay.send_webhooks(
+            server.url, webhooks, secret=server.secret, concurrency=4, duration=10, total=50
+        )
+
+        assert len(results.latencies) == 50
+        assert results.errors == 0
+        assert results.statuses == {200: 50}
+        assert len(set(server.deliveries)) == 50
+
+    async def test_it_counts_the_status_of_each_response(self, server: FakeServer) -> None:
+        webhooks = recorded.from_paths([FIXTURES / "opened"])
+        results = await replay.send_webhooks(
+            server.url, webhooks, secret="wrong", concurrency=2, duration=10, total=3
+        )
+        assert results.statuses == {403: 3}
+        assert results.as_dict()["statuses"] == {"403": 3}
+
+    async def test_it_spreads_sends_at_the_rate(self, server: FakeServer) -> None:
+        webhooks = recorded.from_paths([FIXTURES / "opened"])
+        results = await replay.send_webhooks(
+            server.url, webhooks, secret=server.secret, concurrency=4, duration=0.5, rate=20
+        )
+        # A send is due every 50ms, and none are started after the duration
+        assert 8 <= len(results.latencies) <= 10
+        assert results.statuses == {200: len(results.latencies)}
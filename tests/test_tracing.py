@@ -0,0 +1,93 @@
+import asyncio
+from typing import Any, cast
+
+import attrs
+from machinery import helpers as hp
+
+from slack_github_tracker import protocols, tracing
+from slack_github_tracker.handlers import github
+
+
+@attrs.define
+class CollectTraces:
+    traces: list[tracing.Trace] = attrs.field(factory=list)
+    finished: asyncio.Event = attrs.field(factory=asyncio.Event)
+
+    def add(self, trace: tracing.Trace, /) -> None:
+        self.traces.append(trace)
+        self.finished.set()
+
+
+@attrs.frozen
+class StoringEvent:
+    async def process(self, info: github.protocols.EventProcessInfo, /) -> None:
+        with tracing.span("storage.store_pr_request"):
+            await asyncio.sleep(0.01)
+
+
+class TestTracing:
+    async def test_it_carries_the_webhook_trace_to_the_event(
+        self, logger: protocols.Logger
+    ) -> None:
+        exporter = CollectTraces()
+        tracer = tracing.Tracer(logger=logger, slow_seconds=0, exporter=exporter)
+        handler = github.handler.EventHandler(logger=logger, tracer=tracer)
+
+        with tracing.start("github_webhook", github_delivery="d1") as webhook:
+            with tracing.span("register"):
+                handler.append(StoringEvent())
+
+        # Nothing is traced outside of the webhook
+        assert tracing.current() is None
+
+        final_future: asyncio.Future[None] = hp.create_future()
+        async with hp.TaskHolder(final_future) as task_holder:
+            task_holder.add(
+                handler.run(
+                    final_future=final_future,
+                    task_holder=task_holder,
+                    database=cast(Any, None),
+                    background_tasks=cast(Any, None),
+                    slack_app=cast(Any, None),
+                    digest=cast(Any, None),
+                )
+            )
+            await asyncio.wait_for(exporter.finished.wait(), timeout=5)
+            final_future.cancel()
+
+        (trace,) = exporter.traces
+        assert trace.parent is webhook
+        assert trace.trace_id == webhook.trace_id
+        assert trace.root.parent_id == webhook.root.span_id
+        assert list(trace.stages()) == [
+            "register",
+            "queue_wait",
+            "process",
+            "storage.store_pr_request",
+        ]
+        assert trace.stages()["storage.store_pr_request"] >= 0.01
+
+    def test_it_makes_an_otlp_payload_with_each_span_once(self, logger: protocols.Logger) -> None:
+        with tracing.start("github_webhook", github_delivery="d1") as webhook:
+            with tracing.span("register"):
+                pass
+
+        first = webhook.branch("EmptyEvent")
+        first.finish()
+        second = webhook.branch("EmptyEvent")
+        second.finish()
+
+        exporter = tracing.OTLPExporter(logger=logger, endpoint="http://localhost/v1/traces")
+        payload: Any = exporter.payload([first, second])
+
+        spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [span["name"] for span in spans] == [
+            "github_webhook",
+            "register",
+            "EmptyEvent",
+            "EmptyEvent",
+        ]
+        assert {span["traceId"] for span in spans} == {webhook.trace_id}
+        assert spans[0]["attributes"] == [
+            {"key": "github_delivery", "value": {"stringValue": "d1"}}
+        ]
@@ -121,6 +121,16 @@ def tests(args: list[str]) -> None:
     run("python", "-m", "pytest", *args)
 
 
+@cli.command(context_settings=dict(ignore_unknown_options=True))
+@click.argument("name")
+@click.argument("args", nargs=-1, type=click.UNPROCESSED)
+def bench(name: str, args: list[str]) -> None:
+    """
+    Run one of the benchmarks in the benchmarks folder
+    """
+    run("python", "-m", f"benchmarks.{name}", *args)
+
+
 @cli.command(context_settings=dict(ignore_unknown_options=True))
 @click.option(
     "--postgres-url",